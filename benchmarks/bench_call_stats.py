@@ -0,0 +1,74 @@
+"""
+Benchmark: cost of per-(plugin, hook) call statistics on dispatch.
+
+Registers plugins whose hooks do nothing, then times
+dispatch_event() (one hook per plugin) and handle_message() (filter_message
+and handle_command per plugin) with collect_stats off, on with the default
+sampling (one dispatch in SAMPLE_EVERY timed) and on with every call timed.
+
+Usage:
+    PYTHONPATH=src python benchmarks/bench_call_stats.py [--plugins 10] [--calls 20000] [--repeat 5]
+"""
+import argparse
+import time
+from pathlib import Path
+
+from plugflow import BasePlugin, PluginManager
+from plugflow.metrics import SAMPLE_EVERY
+
+
+def make_plugins(count: int):
+    plugins = []
+    for i in range(count):
+        cls = type(f"Trivial{i}", (BasePlugin,), {
+            "name": f"trivial_{i}",
+            "on_event": lambda self, event, data, manager: None,
+            "handle_command": lambda self, command, args: None,
+        })
+        plugins.append(cls())
+    return plugins
+
+
+def build(count: int, collect_stats: bool, sample_every: int = SAMPLE_EVERY) -> PluginManager:
+    mgr = PluginManager(collect_stats=collect_stats, stats_sample_every=sample_every)
+    for plg in make_plugins(count):
+        mgr._add_record(plg, Path("<bench>"), None)
+    return mgr
+
+
+def bench(fns, calls: int, repeat: int):
+    # interleaved runs, best of repeat: the least disturbed by other load
+    best = [float("inf")] * len(fns)
+    for _ in range(repeat):
+        for i, fn in enumerate(fns):
+            t0 = time.perf_counter()
+            for _ in range(calls):
+                fn()
+            best[i] = min(best[i], time.perf_counter() - t0)
+    return [b / calls for b in best]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--plugins", type=int, default=10)
+    ap.add_argument("--calls", type=int, default=20000)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    print(f"{args.plugins} trivial plugins, best of {args.repeat} x {args.calls} calls")
+    for label, call in (("dispatch_event", lambda m: m.dispatch_event("tick", 1)),
+                        ("handle_message", lambda m: m.handle_message("/noop"))):
+        mgr_off = build(args.plugins, False)
+        mgr_on = build(args.plugins, True)
+        mgr_all = build(args.plugins, True, 1)
+        off, on, every = bench([lambda: call(mgr_off), lambda: call(mgr_on), lambda: call(mgr_all)],
+                               args.calls, args.repeat)
+        print(f"{label:>15}: off {off * 1e6:7.2f} us")
+        for name, t in ((f"sampled 1/{SAMPLE_EVERY}", on), ("every call", every)):
+            per_plugin = (t - off) / args.plugins
+            print(f"{name:>15}: on  {t * 1e6:7.2f} us  "
+                  f"overhead {(t - off) / off:6.1%} ({per_plugin * 1e9:.0f} ns per plugin)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark: finding a module's plugin classes through the BasePlugin subclass
+registry vs. the previous inspect.getmembers scan.
+
+Each synthetic plugin module star-imports large standard library namespaces
+(socket, ctypes, typing, tkinter constants, ...) and defines a few plugin
+classes, so its namespace has hundreds to thousands of attributes.
+
+Usage:
+    PYTHONPATH=src python benchmarks/bench_class_registry.py [--modules 200] [--repeat 5]
+"""
+import argparse
+import inspect
+import statistics
+import time
+import types
+
+from plugflow import BasePlugin
+from plugflow.loader import _instantiate_from_module
+
+HEAVY_IMPORTS = [
+    "from socket import *",
+    "from ctypes import *",
+    "from typing import *",
+    "from errno import *",
+    "from stat import *",
+    "from os import *",
+    "from collections.abc import *",
+]
+
+SOURCE = """
+{imports}
+from plugflow import BasePlugin
+
+class Alpha(BasePlugin):
+    name = "alpha_{i}"
+
+class Beta(BasePlugin):
+    name = "beta_{i}"
+
+class Gamma(BasePlugin):
+    name = "gamma_{i}"
+"""
+
+
+def make_modules(count: int):
+    modules = []
+    imports = "\n".join(HEAVY_IMPORTS)
+    for i in range(count):
+        module = types.ModuleType(f"bench_registry_{i}")
+        exec(compile(SOURCE.format(imports=imports, i=i), module.__name__, "exec"), module.__dict__)
+        modules.append(module)
+    return modules
+
+
+def getmembers_scan(module):
+    # The previous lookup: inspect and sort every attribute of the namespace
+    out = []
+    for _, cls in inspect.getmembers(module, inspect.isclass):
+        if issubclass(cls, BasePlugin) and cls is not BasePlugin and cls.__module__ == module.__name__:
+            out.append(cls(None))
+    return out
+
+
+def registry_lookup(module):
+    return _instantiate_from_module(module, None)
+
+
+def bench(fn, modules, repeat: int):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for m in modules:
+            fn(m)
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--modules", type=int, default=200)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    modules = make_modules(args.modules)
+    attrs = statistics.mean(len(vars(m)) for m in modules)
+    print(f"{args.modules} modules, {attrs:.0f} attributes each, 3 plugin classes each")
+    assert [p.name for p in getmembers_scan(modules[0])] == [p.name for p in registry_lookup(modules[0])]
+    for label, fn in (("getmembers", getmembers_scan), ("registry", registry_lookup)):
+        median = bench(fn, modules, args.repeat)
+        print(f"{label:>10}: {median * 1000:8.2f} ms total  "
+              f"{median / args.modules * 1e6:8.1f} us/module (median of {args.repeat})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Benchmark: os.scandir discovery engine vs. the previous rglob-based walk.
+
+Builds a synthetic plugin root with ~50k files (plugins, packages,
+__pycache__ folders, a virtualenv and vendored node_modules) and times
+candidate discovery including the stat every candidate needs.
+
+Usage:
+    PYTHONPATH=src python benchmarks/bench_discovery.py [--files 50000] [--repeat 5]
+"""
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from plugflow.loader import _scan_entries
+
+
+def build_tree(root: Path, total: int) -> None:
+    # 40% plugin sources, 20% bytecode caches, 40% virtualenv / vendored files
+    plugins = int(total * 0.4)
+    per_dir = 50
+    for i in range(plugins // per_dir):
+        d = root / f"group_{i:04d}"
+        cache = d / "__pycache__"
+        cache.mkdir(parents=True)
+        for j in range(per_dir):
+            (d / f"plugin_{j}.py").write_text("X = 1\n")
+            if j % 2 == 0:
+                (cache / f"plugin_{j}.cpython-311.pyc").write_bytes(b"\0")
+        if i % 10 == 0:
+            pkg = d / "pkg"
+            pkg.mkdir()
+            (pkg / "__init__.py").write_text("")
+    vendored = total - plugins - plugins // 2
+    for base in (root / "venv" / "lib" / "site-packages", root / "node_modules"):
+        for i in range(vendored // 2 // per_dir):
+            d = base / f"lib_{i:04d}"
+            d.mkdir(parents=True)
+            for j in range(per_dir):
+                (d / f"mod_{j}.py").write_text("")
+
+
+def rglob_walk(root: Path) -> int:
+    # The previous engine: rglob everything, then stat each candidate
+    n = 0
+    for p in root.rglob("*.py"):
+        target = p.parent if p.name == "__init__.py" else p
+        target.stat()
+        n += 1
+    return n
+
+
+def scandir_walk(root: Path) -> int:
+    n = 0
+    for _ in _scan_entries(root, recursive=True):
+        n += 1
+    return n
+
+
+def bench(fn, root: Path, repeat: int):
+    times = []
+    count = 0
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        count = fn(root)
+        times.append(time.perf_counter() - t0)
+    return count, statistics.median(times)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--files", type=int, default=50000)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        build_tree(root, args.files)
+        total = sum(1 for _ in root.rglob("*"))
+        print(f"tree: {total} entries under {root}")
+        for label, fn in (("rglob", rglob_walk), ("scandir", scandir_walk)):
+            count, median = bench(fn, root, args.repeat)
+            print(f"{label:>8}: {count:6d} candidates  {median * 1000:8.1f} ms (median of {args.repeat})")
+
+
+if __name__ == "__main__":
+    main()
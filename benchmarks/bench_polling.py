@@ -0,0 +1,98 @@
+"""
+Benchmark: per-tick cost of the incremental poller vs. a full rescan.
+
+Builds a plugin root with ~20k files (plain plugins in nested groups plus
+packages with submodules) and times one polling tick when nothing changed
+and when one file changed. The full rescan is the previous poller: list
+every directory, stat every candidate and walk every package.
+
+Usage:
+    PYTHONPATH=src python benchmarks/bench_polling.py [--files 20000] [--repeat 7]
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from plugflow.loader import _scan_entries
+from plugflow.watcher import DirectoryWatcher
+
+
+def build_tree(root: Path, total: int) -> None:
+    per_dir = 50
+    for i in range(total // per_dir):
+        d = root / f"group_{i // 20:03d}" / f"sub_{i:04d}"
+        if i % 10 == 0:
+            # a package with submodules
+            d.mkdir(parents=True)
+            (d / "__init__.py").write_text("")
+            for j in range(per_dir - 1):
+                (d / f"mod_{j}.py").write_text("X = 1\n")
+            continue
+        d.mkdir(parents=True)
+        for j in range(per_dir):
+            (d / f"plugin_{j}.py").write_text("X = 1\n")
+    # settle directory mtimes so listings are cacheable
+    past = time.time() - 60
+    for dirpath, _, _ in os.walk(root):
+        os.utime(dirpath, (past, past))
+
+
+def full_rescan(root: Path) -> int:
+    # The previous poller: scandir everything, float mtimes, os.walk per package
+    n = 0
+    for target, st in _scan_entries(root, recursive=True):
+        newest = st.st_mtime
+        if target.is_dir():
+            for dirpath, dirnames, filenames in os.walk(target):
+                dirnames[:] = [d for d in dirnames if d != "__pycache__"]
+                for fn in filenames:
+                    if fn.endswith(".py"):
+                        newest = max(newest, os.stat(os.path.join(dirpath, fn)).st_mtime)
+        n += 1
+    return n
+
+
+def bench(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return statistics.median(times)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--files", type=int, default=20000)
+    ap.add_argument("--repeat", type=int, default=7)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        build_tree(root, args.files)
+        total = sum(1 for _ in root.rglob("*"))
+        changes = []
+        watcher = DirectoryWatcher(root, backend="poll", on_change=changes.append)
+        watcher.start()  # initial scan only; ticks are driven below
+        watcher.stop()
+        print(f"tree: {total} entries, {len(watcher._stamps)} targets")
+
+        full = bench(lambda: full_rescan(root), args.repeat)
+        idle = bench(watcher._poll_once, args.repeat)
+        print(f"    full rescan: {full * 1000:8.1f} ms/tick")
+        print(f"    incremental: {idle * 1000:8.1f} ms/tick, {watcher.relisted} directories listed (no change)")
+
+        target = root / "group_003" / "sub_0061" / "plugin_7.py"
+        def one_change():
+            target.write_text(f"X = {time.perf_counter_ns()}\n")
+            watcher._poll_once()
+        changed = bench(one_change, args.repeat)
+        print(f"    incremental: {changed * 1000:8.1f} ms/tick, {watcher.relisted} directories listed (one file changed)")
+        assert changes and changes[-1] == target
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Benchmark: cost of the tracer hook on dispatch, installed and not.
+
+Registers plugins whose hooks do nothing, then times dispatch_event() with no
+tracer, with the no-op Tracer base class and with InMemoryTracer. It also
+counts the function calls (Python and C) one dispatch_event() and one
+handle_message() make per plugin. Unlike the times, the counts do not depend
+on machine load, so they can be compared with any earlier release: on CPython
+3.11 dispatch_event() makes 8 calls per plugin without a tracer, as it did
+before tracing and lazy loading were added. The lazy row shows the same for
+a lazy manager whose plugins have all been built.
+
+Usage:
+    PYTHONPATH=src python benchmarks/bench_tracing.py [--plugins 10] [--calls 20000] [--repeat 5]
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from plugflow import BasePlugin, PluginManager
+from plugflow.tracing import InMemoryTracer, Tracer
+
+
+class _Dropping(InMemoryTracer):
+    # keeps the benchmark's memory flat
+    def end(self, span):
+        pass
+
+
+def make_plugins(count: int):
+    plugins = []
+    for i in range(count):
+        cls = type(f"Trivial{i}", (BasePlugin,), {
+            "name": f"trivial_{i}",
+            "on_event": lambda self, event, data, manager: None,
+        })
+        plugins.append(cls())
+    return plugins
+
+
+def build(count: int, tracer, lazy: bool = False) -> PluginManager:
+    mgr = PluginManager(tracer=tracer, lazy=lazy)
+    for plg in make_plugins(count):
+        mgr._add_record(type(plg) if lazy else plg, Path("<bench>"), None)
+    return mgr
+
+
+def bench(fns, calls: int, repeat: int):
+    # interleaved runs, best of repeat: the least disturbed by other load
+    best = [float("inf")] * len(fns)
+    for _ in range(repeat):
+        for i, fn in enumerate(fns):
+            t0 = time.perf_counter()
+            for _ in range(calls):
+                fn()
+            best[i] = min(best[i], time.perf_counter() - t0)
+    return [b / calls for b in best]
+
+
+def calls_per_plugin(tracer, dispatch, lazy: bool = False) -> int:
+    # function calls of one dispatch, as the difference between 2 and 1 plugins;
+    # fewest of a few runs, so a garbage collection does not count
+    counts = []
+    for plugins in (1, 2):
+        mgr = build(plugins, tracer, lazy)
+        dispatch(mgr)  # builds lazy plugins
+        fewest = None
+        for _ in range(5):
+            seen = [0]
+
+            def profile(frame, event, arg):
+                if event in ("call", "c_call"):
+                    seen[0] += 1
+            sys.setprofile(profile)
+            dispatch(mgr)
+            sys.setprofile(None)
+            fewest = seen[0] if fewest is None else min(fewest, seen[0])
+        counts.append(fewest)
+    return counts[1] - counts[0]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--plugins", type=int, default=10)
+    ap.add_argument("--calls", type=int, default=20000)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    configs = (("no tracer", lambda: None, False), ("lazy", lambda: None, True),
+               ("no-op Tracer", Tracer, False), ("InMemoryTracer", _Dropping, False))
+    managers = [build(args.plugins, make(), lazy) for _, make, lazy in configs]
+    times = bench([lambda m=m: m.dispatch_event("tick", 1) for m in managers], args.calls, args.repeat)
+
+    def event(mgr):
+        mgr.dispatch_event("tick", 1)
+
+    def message(mgr):
+        mgr.handle_message("hello")
+
+    print(f"{args.plugins} trivial plugins, dispatch_event, best of {args.repeat} x {args.calls} calls")
+    base = times[0]
+    for (label, make, lazy), t in zip(configs, times):
+        extra = (t - base) / args.plugins
+        print(f"{label:>15}: {t * 1e6:7.2f} us  {extra * 1e9:+6.0f} ns per plugin  calls per plugin: "
+              f"{calls_per_plugin(make(), event, lazy):2d} dispatch_event, "
+              f"{calls_per_plugin(make(), message, lazy):2d} handle_message")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,7 @@ import logging
 from pathlib import Path
 from typing import Optional
 from plugflow import PluginManager
+from plugflow.exporter import CONTENT_TYPE, render
 
 PLUGINS_DIR = Path(__file__).parent / "plugins"
 
@@ -33,6 +34,13 @@ class PluginHTTPRequestHandler(http.server.BaseHTTPRequestHandler):
             else:
                 plugins = []
             self.wfile.write(json.dumps({"plugins": plugins}).encode())
+        elif self.path == '/metrics' and self.plugin_manager:
+            # Prometheus scrape endpoint
+            body = render(self.plugin_manager).encode()
+            self.send_response(200)
+            self.send_header('Content-type', CONTENT_TYPE)
+            self.end_headers()
+            self.wfile.write(body)
         elif self.path.startswith('/api/handle/'):
             endpoint = self.path[12:]  # Remove '/api/handle/'
             self.handle_plugin_endpoint(endpoint, {})
@@ -148,6 +156,7 @@ class PluginHTTPServer:
             context={"server": self},
             hot_reload=True,
             poll_interval=2.0,
+            collect_stats=True,
         )
         self.plugin_manager.load_all()
         print(f"Loaded plugins: {self.plugin_manager.list_plugins()}")
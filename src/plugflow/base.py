@@ -1,7 +1,31 @@
 
 from __future__ import annotations
+import weakref
 from abc import ABC
-from typing import Any, Dict, Iterable, Optional
+from typing import Any, Dict, Iterable, List, Optional, Type
+
+# defining module name -> plugin classes created in it, in definition order
+_subclasses: Dict[str, List["weakref.ref[type]"]] = {}
+
+def _discard(module: str, ref: "weakref.ref[type]") -> None:
+    refs = _subclasses.get(module)
+    if refs is None:
+        return
+    try:
+        refs.remove(ref)
+    except ValueError:
+        pass
+    if not refs:
+        _subclasses.pop(module, None)
+
+def plugin_classes(module: str) -> List[Type["BasePlugin"]]:
+    """BasePlugin subclasses defined in the named module that are still alive."""
+    out = []
+    for ref in _subclasses.get(module, ()):
+        cls = ref()
+        if cls is not None:
+            out.append(cls)
+    return out
 
 class BasePlugin(ABC):
     """Base plugin class.
@@ -20,6 +44,13 @@ class BasePlugin(ABC):
     version: str = "0.1.0"
     priority: int = 100
 
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        # lets the loader find a module's plugins without scanning its namespace;
+        # weak so unloaded plugin classes can be collected
+        module = cls.__module__
+        _subclasses.setdefault(module, []).append(weakref.ref(cls, lambda ref: _discard(module, ref)))
+
     def __init__(self, context: Any = None, **kwargs: Any) -> None:
         self.context = context
         self.config = kwargs
@@ -0,0 +1,206 @@
+from __future__ import annotations
+import dis
+import importlib.util
+import os
+import sys
+import types
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+# (name, level, fromlist) of one import statement
+ImportSpec = Tuple[str, int, Tuple[str, ...]]
+
+_IMPORT_NAME = dis.opmap["IMPORT_NAME"]
+_LOAD_CONST = dis.opmap["LOAD_CONST"]
+_LOAD_SMALL_INT = dis.opmap.get("LOAD_SMALL_INT", -1)  # Python 3.14+
+_EXTENDED_ARG = dis.EXTENDED_ARG
+_CACHE = dis.opmap.get("CACHE", -1)                    # Python 3.11+
+
+def scan_imports(code: types.CodeType) -> List[ImportSpec]:
+    """Import statements in a code object and every code object nested in it.
+
+    Imports inside functions count as well: they are dependencies even if
+    they have not run yet. Reads the raw bytecode instead of going through
+    dis.get_instructions, which costs more than compiling the module.
+    """
+    out: List[ImportSpec] = []
+    stack = [code]
+    while stack:
+        co = stack.pop()
+        stack.extend(c for c in co.co_consts if isinstance(c, types.CodeType))
+        raw = co.co_code
+        if _IMPORT_NAME not in raw[::2]:
+            continue
+        consts: List[object] = []
+        ext = 0
+        for i in range(0, len(raw), 2):
+            op = raw[i]
+            arg = raw[i + 1] | ext
+            if op == _EXTENDED_ARG:
+                ext = arg << 8
+                continue
+            ext = 0
+            if op == _LOAD_CONST:
+                consts.append(co.co_consts[arg])
+            elif op == _LOAD_SMALL_INT:
+                consts.append(arg)
+            elif op == _IMPORT_NAME:
+                level = consts[-2] if len(consts) >= 2 and isinstance(consts[-2], int) else 0
+                fromlist = consts[-1] if consts and isinstance(consts[-1], tuple) else ()
+                out.append((co.co_names[arg], level, tuple(fromlist)))
+                consts.clear()
+            elif op != _CACHE:
+                consts.clear()
+    return out
+
+def _imported_names(imports: Iterable[ImportSpec], package: Optional[str]) -> Set[str]:
+    names: Set[str] = set()
+    for name, level, fromlist in imports:
+        try:
+            resolved = importlib.util.resolve_name("." * level + name, package) if level else name
+        except (ImportError, ValueError):
+            continue
+        parts = resolved.split(".")
+        for i in range(1, len(parts) + 1):
+            names.add(".".join(parts[:i]))
+        for item in fromlist:
+            if item != "*":
+                names.add(f"{resolved}.{item}")
+    return names
+
+def _within(path: str, roots: Iterable[str]) -> bool:
+    return any(path == root or path.startswith(root + os.sep) for root in roots)
+
+# file -> (st_mtime_ns, imports) for helper modules the loader did not execute
+_helper_imports: Dict[str, Tuple[int, List[ImportSpec]]] = {}
+
+def _helper_module_imports(module: types.ModuleType, file: str) -> List[ImportSpec]:
+    try:
+        mtime = os.stat(file).st_mtime_ns
+    except OSError:
+        return []
+    cached = _helper_imports.get(file)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    loader = getattr(module, "__loader__", None)
+    try:
+        code = loader.get_code(module.__name__) if loader is not None else None
+    except Exception:
+        code = None
+    imports = scan_imports(code) if code is not None else []
+    _helper_imports[file] = (mtime, imports)
+    return imports
+
+def module_dependencies(module: types.ModuleType, imports: List[ImportSpec], roots: Iterable[str],
+                        own: str) -> Dict[str, Dict[str, Set[str]]]:
+    """Files below roots that a plugin module imports, directly or through other helpers.
+
+    own is the plugin's own file or package directory; files inside it are part
+    of the plugin and not reported. Returns {file: {"modules": module names,
+    "imports": files that file imports}} with absolute paths; the plugin
+    module's direct dependencies are listed under the key "".
+    """
+    roots = [os.path.abspath(r) for r in roots]
+    own = os.path.abspath(own)
+    graph: Dict[str, Dict[str, Set[str]]] = {}
+    pending: List[Tuple[str, List[ImportSpec], Optional[str]]] = [
+        ("", imports, getattr(module, "__package__", None) or module.__name__)]
+    while pending:
+        node, node_imports, package = pending.pop()
+        edges = graph.setdefault(node, {"modules": set(), "imports": set()})["imports"]
+        for name in _imported_names(node_imports, package):
+            dep = sys.modules.get(name)
+            file = getattr(dep, "__file__", None)
+            if not file:
+                continue
+            file = os.path.abspath(file)
+            if not _within(file, roots) or _within(file, [own]):
+                continue
+            edges.add(file)
+            seen = file in graph
+            entry = graph.setdefault(file, {"modules": set(), "imports": set()})
+            entry["modules"].add(name)
+            if not seen:
+                dep_package = getattr(dep, "__package__", None) or name
+                pending.append((file, _helper_module_imports(dep, file), dep_package))
+    return graph
+
+class DependencyGraph:
+    """Which plugin targets depend on which files below the plugin roots.
+
+    Nodes are absolute file paths. A target is a plugin file, package directory
+    or bundle that produced loaded plugins; every other node is a helper module.
+    """
+    def __init__(self) -> None:
+        self._imports: Dict[str, Set[str]] = {}        # node -> files it imports
+        self._importers: Dict[str, Set[str]] = {}      # file -> nodes importing it
+        self._modules: Dict[str, Set[str]] = {}        # helper file -> sys.modules names
+        self._targets: Dict[str, Any] = {}             # target -> path as the manager knows it
+
+    def _set_edges(self, node: str, files: Set[str]) -> None:
+        for old in self._imports.get(node, set()) - files:
+            users = self._importers.get(old)
+            if users is not None:
+                users.discard(node)
+                if not users:
+                    del self._importers[old]
+        self._imports[node] = set(files)
+        for f in files:
+            self._importers.setdefault(f, set()).add(node)
+
+    def set_target(self, target: str, deps: Dict[str, Dict[str, Set[str]]], path: Any) -> None:
+        self._targets[target] = path
+        self._set_edges(target, deps.get("", {}).get("imports", set()))
+        for file, entry in deps.items():
+            if not file:
+                continue
+            self._modules.setdefault(file, set()).update(entry["modules"])
+            self._set_edges(file, entry["imports"])
+
+    def remove_target(self, target: str) -> None:
+        self._targets.pop(target, None)
+        self._set_edges(target, set())
+        self._imports.pop(target, None)
+
+    def dependents(self, *files: str) -> Tuple[List[Any], List[str]]:
+        """Targets affected by a change to files (or to anything below them, for
+        package directories), dependencies first, and the sys.modules names of
+        helper modules that must be re-imported. The changed files themselves
+        are not listed as targets."""
+        changed = set(files)
+        for file in files:
+            inside = file + os.sep
+            changed |= {n for n in self._importers if n.startswith(inside)}
+        affected: Set[str] = set()
+        stack = list(changed)
+        while stack:
+            node = stack.pop()
+            for user in self._importers.get(node, ()):
+                if user not in affected:
+                    affected.add(user)
+                    stack.append(user)
+        helpers = changed | affected
+        modules = sorted(m for node in helpers for m in self._modules.get(node, ()))
+        targets = [self._targets[t] for t in self._toposort(affected)
+                   if t in self._targets and t not in changed]
+        return targets, modules
+
+    def _toposort(self, nodes: Set[str]) -> List[str]:
+        order: List[str] = []
+        done: Set[str] = set()
+        for start in sorted(nodes):
+            if start in done:
+                continue
+            stack: List[Tuple[str, bool]] = [(start, False)]
+            while stack:
+                node, expanded = stack.pop()
+                if expanded:
+                    order.append(node)
+                    continue
+                if node in done:
+                    continue
+                done.add(node)
+                stack.append((node, True))
+                for dep in sorted(self._imports.get(node, ())):
+                    if dep in nodes and dep not in done:
+                        stack.append((dep, False))
+        return order
@@ -0,0 +1,145 @@
+from __future__ import annotations
+import hashlib
+import importlib
+import json
+import os
+import sys
+import types
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .loader import PluginItem, _instantiate_from_object, plugin_name
+from .profiling import LoadProfile
+
+_CACHE_VERSION = 1
+
+def default_cache_path() -> Path:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(Path.home(), ".cache")
+    return Path(base) / "plugflow" / "entry_points.json"
+
+def _environment_key(group: str) -> str:
+    # one cache file serves every interpreter/virtualenv that uses it
+    return hashlib.sha256(f"{sys.prefix}\0{sys.executable}\0{group}".encode()).hexdigest()[:16]
+
+def _environment_fingerprint() -> List[Tuple[str, int]]:
+    """sys.path directories with their mtimes.
+
+    Installing or removing a distribution adds or removes its *.dist-info
+    directory, which changes the mtime of the site-packages directory holding it.
+    """
+    out = []
+    for entry in sys.path:
+        try:
+            st = os.stat(entry or ".")
+        except OSError:
+            continue
+        out.append((entry, st.st_mtime_ns))
+    return out
+
+def _scan_metadata(group: str) -> List[Tuple[str, str]]:
+    from importlib import metadata
+    eps = metadata.entry_points()
+    if hasattr(eps, "select"):
+        selected = eps.select(group=group)
+    else:  # Python < 3.10
+        selected = eps.get(group, [])  # type: ignore[union-attr]
+    seen = set()
+    out = []
+    for ep in selected:
+        # the same distribution may be visible twice on sys.path
+        if ep.name in seen:
+            continue
+        seen.add(ep.name)
+        out.append((ep.name, ep.value))
+    return out
+
+def _read_cache(cache_path: Path) -> Dict[str, Any]:
+    try:
+        with open(cache_path, "r", encoding="utf-8") as fh:
+            data = json.load(fh)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != _CACHE_VERSION:
+        return {}
+    return data
+
+def _write_cache(cache_path: Path, data: Dict[str, Any]) -> None:
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(data, fh)
+        os.replace(tmp, cache_path)
+    except OSError:
+        # a read-only cache location only costs a metadata scan next time
+        pass
+
+def entry_point_specs(group: str, cache_path: Optional[Path] = None) -> List[Tuple[str, str]]:
+    """Returns (name, "module:attr") pairs registered under an entry-point group.
+
+    The scan result is cached in cache_path (default: ~/.cache/plugflow) and
+    reused until a directory on sys.path changes.
+    """
+    cache_path = cache_path or default_cache_path()
+    key = _environment_key(group)
+    fingerprint = [list(item) for item in _environment_fingerprint()]
+    data = _read_cache(cache_path)
+    cached = data.get("entries", {}).get(key)
+    if cached and cached.get("fingerprint") == fingerprint:
+        return [(name, value) for name, value in cached["entry_points"]]
+
+    specs = _scan_metadata(group)
+    data = {"version": _CACHE_VERSION, "entries": dict(data.get("entries", {}))}
+    data["entries"][key] = {"group": group, "fingerprint": fingerprint,
+                            "entry_points": [list(item) for item in specs]}
+    _write_cache(cache_path, data)
+    return specs
+
+def _resolve(value: str, reload: bool = False) -> Tuple[types.ModuleType, Any]:
+    module_name, _, attr = value.partition(":")
+    module = importlib.import_module(module_name.strip())
+    if reload:
+        module = importlib.reload(module)
+    obj: Any = module
+    for part in attr.strip().split(".") if attr.strip() else ():
+        obj = getattr(obj, part)
+    return module, obj
+
+def load_entry_point(name: str, value: str, context: Any, lazy: bool = False, reload: bool = False
+                     ) -> Tuple[List[Tuple[PluginItem, Path, types.ModuleType]], LoadProfile]:
+    """Plugins of one entry point, as (plugin, path, module) tuples, and the load profile.
+
+    With reload=True the target's module is re-executed with importlib.reload().
+    """
+    profile = LoadProfile(Path(f"<entry point {name}>"))
+    with profile.phase("exec"):
+        module, obj = _resolve(value, reload)
+    path = Path(getattr(module, "__file__", None) or f"<entry point {name}>")
+    profile.path = path
+    profile.module = module.__name__
+    with profile.phase("instantiate"):
+        plugins = _instantiate_from_object(obj, context, lazy)
+    return [(plg, path, module) for plg in plugins], profile
+
+def discover_entry_points(group: str, context: Any, cache_path: Optional[Path] = None,
+                          profiles: Optional[List[LoadProfile]] = None, lazy: bool = False,
+                          specs: Optional[Dict[str, Tuple[str, str]]] = None
+                          ) -> List[Tuple[PluginItem, Path, types.ModuleType]]:
+    """Returns list of tuples (plugin, path, module) for plugins registered under group.
+
+    A target may be a module (instantiated with the same rules as plugin files),
+    a plugin class or instance, a register(context) callable or a list of plugins.
+    Entry points are imported normally, so their profile has a single exec phase.
+    With lazy=True plugin classes are reported uninstantiated. specs, if given,
+    receives the (entry point name, value) each plugin name came from.
+    """
+    result = []
+    for name, value in entry_point_specs(group, cache_path):
+        found, profile = load_entry_point(name, value, context, lazy)
+        result.extend(found)
+        if specs is not None:
+            for plg, _, _ in found:
+                specs[plugin_name(plg)] = (name, value)
+        if profiles is not None:
+            profiles.append(profile)
+    return result
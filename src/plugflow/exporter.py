@@ -0,0 +1,160 @@
+from __future__ import annotations
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from .manager import PluginManager
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Exported histogram bounds in seconds: every other power-of-two bucket of
+# plugflow.metrics, 1.024 us to 17.2 s
+EXPORT_BUCKETS = [2 ** i for i in range(10, 36, 2)]
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items()) + "}"
+
+def _value(v: float) -> str:
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+class _Family:
+    __slots__ = ("name", "kind", "help", "samples")
+    def __init__(self, name: str, kind: str, help: str) -> None:
+        self.name = name
+        self.kind = kind
+        self.help = help
+        self.samples: List[Tuple[str, Dict[str, str], float]] = []
+
+    def add(self, value: float, labels: Optional[Dict[str, str]] = None, suffix: str = "") -> None:
+        self.samples.append((suffix, labels or {}, value))
+
+    def lines(self) -> List[str]:
+        out = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        out.extend(f"{self.name}{suffix}{_labels(labels)} {_value(v)}" for suffix, labels, v in self.samples)
+        return out
+
+def render(manager: "PluginManager") -> str:
+    """The manager's metrics in Prometheus text exposition format (version 0.0.4).
+
+    Uses runtime_metrics(), stats() and memory_stats(), none of which takes
+    the manager lock, so rendering never waits for or blocks dispatch. With
+    track_memory=True each render takes a tracemalloc snapshot.
+    """
+    runtime = manager.runtime_metrics()
+    plugins = _Family("plugflow_plugins", "gauge", "Loaded plugins.")
+    plugins.add(runtime["plugins"])
+    instantiated = _Family("plugflow_plugins_instantiated", "gauge",
+                           "Loaded plugins whose instance exists (lazy plugins are not until first use).")
+    instantiated.add(runtime["instantiated"])
+    reloads = _Family("plugflow_reloads_total", "counter", "Hot reloads performed.")
+    reloads.add(runtime["reloads"])
+    reloaded = _Family("plugflow_reloaded_plugins_total", "counter", "Plugins loaded by hot reloads.")
+    reloaded.add(runtime["reloaded_plugins"])
+    reload_seconds = _Family("plugflow_reload_seconds_total", "counter", "Time spent in hot reloads.")
+    reload_seconds.add(runtime["reload_seconds"])
+    queue = _Family("plugflow_reload_queue_depth", "gauge", "Changed paths waiting to be reloaded.")
+    queue.add(runtime["reload_queue"])
+    families = [plugins, instantiated, reloads, reloaded, reload_seconds, queue]
+
+    interval = _Family("plugflow_watch_interval_seconds", "gauge", "Current polling interval of a watched root.")
+    polls = _Family("plugflow_watch_polls_total", "counter", "Scans of a watched root.")
+    scans = _Family("plugflow_watch_scan_seconds_total", "counter", "Time spent scanning a watched root.")
+    for w in runtime["watch"]:
+        if "root" not in w:
+            continue  # subscription closed meanwhile
+        labels = {"root": w["root"], "backend": w["backend"]}
+        interval.add(w["interval"], labels)
+        polls.add(w["polls"], labels)
+        scans.add(w["scan_total"], labels)
+    families += [interval, polls, scans]
+
+    calls = _Family("plugflow_hook_calls_total", "counter", "Plugin hook calls (collect_stats=True).")
+    errors = _Family("plugflow_hook_errors_total", "counter", "Plugin hook calls that raised.")
+    latency = _Family("plugflow_hook_duration_seconds", "histogram",
+                      "Plugin hook call latency, of the calls sampled for timing.")
+    for plugin, hooks in manager.stats().items():
+        for hook, s in hooks.items():
+            labels = {"plugin": plugin, "hook": hook}
+            calls.add(s["calls"], labels)
+            errors.add(s["errors"], labels)
+            # the histogram covers the timed calls only, unscaled, so all its
+            # series only grow. stats buckets count calls shorter than their
+            # bound, so each one falls in every exported bucket with a bound
+            # at least as large
+            histogram = s["histogram"]
+            seen = 0
+            j = 0
+            for bound in EXPORT_BUCKETS:
+                le = bound / 1e9
+                while j < len(histogram) and histogram[j][0] <= le:
+                    seen += histogram[j][1]
+                    j += 1
+                latency.add(seen, {**labels, "le": repr(le)}, "_bucket")
+            latency.add(s["timed"], {**labels, "le": "+Inf"}, "_bucket")
+            latency.add(s["mean"] * s["timed"], labels, "_sum")
+            latency.add(s["timed"], labels, "_count")
+    families += [calls, errors, latency]
+
+    current = _Family("plugflow_plugin_memory_bytes", "gauge",
+                      "Live allocations made by a plugin's code (track_memory=True).")
+    peak = _Family("plugflow_plugin_memory_peak_bytes", "gauge",
+                   "Largest plugflow_plugin_memory_bytes seen since reset_stats().")
+    for plugin, usage in sorted(manager.memory_stats().items()):
+        current.add(usage["current"], {"plugin": plugin})
+        peak.add(usage["peak"], {"plugin": plugin})
+    families += [current, peak]
+
+    lines: List[str] = []
+    for family in families:
+        lines.extend(family.lines())
+    return "\n".join(lines) + "\n"
+
+class MetricsServer:
+    """Serves render(manager) on GET /metrics from a daemon thread."""
+    def __init__(self, manager: "PluginManager", port: int = 9464, addr: str = "127.0.0.1") -> None:
+        self.manager = manager
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = render(manager).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:
+                manager.log.debug(f"metrics: {format % args}")
+
+        self._server = ThreadingHTTPServer((addr, port), Handler)
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self._server.server_address[1]
+
+    def start(self) -> "MetricsServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True,
+                                        name=f"plugflow-metrics:{self.port}")
+        self._thread.start()
+        return self
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+def start_http_server(manager: "PluginManager", port: int = 9464, addr: str = "127.0.0.1") -> MetricsServer:
+    """Serves the manager's metrics at http://addr:port/metrics; port 0 picks a free port."""
+    return MetricsServer(manager, port, addr).start()
@@ -0,0 +1,112 @@
+from __future__ import annotations
+import ctypes
+import ctypes.util
+import errno
+import os
+import struct
+import sys
+from typing import List, Optional, Tuple
+
+# Event masks from <sys/inotify.h>
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_EXCL_UNLINK = 0x04000000
+IN_ISDIR = 0x40000000
+
+IN_CLOEXEC = 0o2000000
+IN_NONBLOCK = 0o4000
+
+# struct inotify_event { int wd; uint32_t mask, cookie, len; char name[]; }
+_EVENT = struct.Struct("iIII")
+
+# (wd, mask, cookie, name)
+Event = Tuple[int, int, int, str]
+
+_libc: Optional[ctypes.CDLL] = None
+
+def _load() -> Optional[ctypes.CDLL]:
+    global _libc
+    if _libc is not None or not sys.platform.startswith("linux"):
+        return _libc
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_init1.restype = ctypes.c_int
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        libc.inotify_add_watch.restype = ctypes.c_int
+        libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        libc.inotify_rm_watch.restype = ctypes.c_int
+    except (OSError, AttributeError):
+        return None
+    _libc = libc
+    return libc
+
+def available() -> bool:
+    """Whether inotify can be used: Linux with a libc exposing inotify_init1."""
+    return _load() is not None
+
+def _error(what: str) -> OSError:
+    err = ctypes.get_errno()
+    return OSError(err, f"{what}: {os.strerror(err)}")
+
+class Inotify:
+    """A non-blocking inotify file descriptor with directory watches.
+
+    Raises OSError if inotify is unavailable or the watch limit is reached
+    (errno ENOSPC, see /proc/sys/fs/inotify/max_user_watches).
+    """
+    def __init__(self) -> None:
+        libc = _load()
+        if libc is None:
+            raise OSError(errno.ENOSYS, "inotify is not available on this platform")
+        self._libc = libc
+        fd = libc.inotify_init1(IN_CLOEXEC | IN_NONBLOCK)
+        if fd < 0:
+            raise _error("inotify_init1")
+        self._fd = fd
+
+    def fileno(self) -> int:
+        return self._fd
+
+    def add_watch(self, path: str, mask: int) -> int:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), mask)
+        if wd < 0:
+            raise _error(f"inotify_add_watch({path})")
+        return wd
+
+    def rm_watch(self, wd: int) -> None:
+        # EINVAL: the kernel already dropped the watch (directory deleted)
+        self._libc.inotify_rm_watch(self._fd, wd)
+
+    def read(self) -> List[Event]:
+        """Every event queued so far; an empty list if there is none."""
+        events: List[Event] = []
+        while True:
+            try:
+                data = os.read(self._fd, 65536)
+            except BlockingIOError:
+                return events
+            if not data:
+                return events
+            offset = 0
+            while offset + _EVENT.size <= len(data):
+                wd, mask, cookie, length = _EVENT.unpack_from(data, offset)
+                offset += _EVENT.size
+                name = data[offset:offset + length].split(b"\0", 1)[0]
+                offset += length
+                events.append((wd, mask, cookie, os.fsdecode(name)))
+
+    def close(self) -> None:
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
@@ -1,65 +1,403 @@
 
 from __future__ import annotations
+import fnmatch
+import hashlib
+import importlib.machinery
 import importlib.util
+import os
+import re
+import stat
 import sys
+import time
 import types
 import inspect
+import weakref
+import zipfile
+import zipimport
 from pathlib import Path
-from typing import Any, Iterable, List, Tuple, Dict, Optional, Set
+from typing import Any, Callable, Iterable, Iterator, List, Tuple, Dict, Optional, Set, Type, Union
 
-from .base import BasePlugin
+from .base import BasePlugin, plugin_classes
+from .deps import ImportSpec, scan_imports
+from .profiling import LoadProfile
 
-def _unique_module_name(path: Path) -> str:
-    # Make module unique by absolute path and current file version
-    key = str(path.resolve()) + f":{path.stat().st_mtime_ns}"
-    import hashlib
+# Directories that never contain plugins: skipped without being listed.
+DEFAULT_EXCLUDE: Tuple[str, ...] = (
+    "__pycache__", ".*", "*.egg-info", "venv", "site-packages", "node_modules",
+)
+
+def _compile_patterns(patterns: Iterable[str]) -> Optional["re.Pattern[str]"]:
+    patterns = list(patterns)
+    if not patterns:
+        return None
+    return re.compile("|".join(f"(?:{fnmatch.translate(p)})" for p in patterns))
+
+class DiscoveryRules:
+    """Which entries below a plugin root are considered plugin candidates.
+
+    include: glob patterns a candidate (file or package) must match, `None` accepts all.
+    exclude: glob patterns for files and directories to skip, added to DEFAULT_EXCLUDE.
+             Excluded directories are pruned and never listed.
+    max_depth: how many directory levels below the root to descend (`None` = unlimited).
+
+    Patterns are matched against both the entry name and its root-relative POSIX path.
+    """
+    __slots__ = ("include", "exclude", "max_depth", "_include_re", "_exclude_re")
+
+    def __init__(self, include: Optional[Iterable[str]] = None,
+                 exclude: Optional[Iterable[str]] = None,
+                 max_depth: Optional[int] = None) -> None:
+        self.include = tuple(include) if include is not None else None
+        self.exclude = DEFAULT_EXCLUDE + tuple(exclude or ())
+        self.max_depth = max_depth
+        self._include_re = _compile_patterns(self.include) if self.include is not None else None
+        self._exclude_re = _compile_patterns(self.exclude)
+
+    def excluded(self, name: str, rel: str) -> bool:
+        rx = self._exclude_re
+        return rx is not None and (rx.match(name) is not None or rx.match(rel) is not None)
+
+    def included(self, name: str, rel: str) -> bool:
+        if self.include is None:
+            return True
+        rx = self._include_re
+        return rx is not None and (rx.match(name) is not None or rx.match(rel) is not None)
+
+DEFAULT_RULES = DiscoveryRules()
+
+# Every module the loader creates is named MODULE_PREFIX + digest
+MODULE_PREFIX = "plugflow_ext_"
+
+# Plugin bundles: archives importable through zipimport
+BUNDLE_SUFFIXES: Tuple[str, ...] = (".zip", ".whl", ".pyz")
+
+def is_bundle(path: Path) -> bool:
+    return path.suffix.lower() in BUNDLE_SUFFIXES and path.is_file()
+
+def _unique_module_name(path: Path, st: Optional[os.stat_result] = None, member: str = "") -> str:
+    # Make module unique by absolute path (plus archive member) and current file version
+    mtime_ns = st.st_mtime_ns if st is not None else path.stat().st_mtime_ns
+    key = str(path.resolve()) + (f"!{member}" if member else "") + f":{mtime_ns}"
     digest = hashlib.sha256(key.encode()).hexdigest()[:16]
-    return f"plugflow_ext_{digest}"
+    return f"{MODULE_PREFIX}{digest}"
 
-def _iter_python_entries(plugins_dir: Path, recursive: bool = True) -> Iterable[Path]:
+def _file_digest(path: str) -> Tuple[int, bytes]:
+    h = hashlib.blake2b(digest_size=16)
+    size = 0
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            size += len(chunk)
+            h.update(chunk)
+    return size, h.digest()
+
+def content_fingerprint(target: Path) -> Optional[Tuple[int, bytes]]:
+    """(size, blake2b digest) of a plugin file or bundle, or of every .py file of a package.
+
+    Unlike mtimes, the fingerprint survives touch, git checkout and rsync of
+    byte-identical files. Returns None if target cannot be read.
+    """
+    try:
+        if not target.is_dir():
+            return _file_digest(str(target))
+        h = hashlib.blake2b(digest_size=16)
+        total = 0
+        stack = [str(target)]
+        files = []
+        while stack:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name != "__pycache__" and not entry.name.startswith("."):
+                            stack.append(entry.path)
+                    elif entry.name.endswith(".py"):
+                        files.append(entry.path)
+        for f in sorted(files):
+            size, digest = _file_digest(f)
+            total += size
+            h.update(os.path.relpath(f, target).encode())
+            h.update(digest)
+        return total, h.digest()
+    except OSError:
+        return None
+
+def _listdir(dir_path: str) -> List[Any]:
+    with os.scandir(dir_path) as it:
+        return list(it)
+
+def _scan_entries(plugins_dir: Path, recursive: bool = True,
+                  rules: Optional[DiscoveryRules] = None,
+                  listdir: Callable[[str], List[Any]] = _listdir) -> Iterator[Tuple[Path, os.stat_result]]:
+    """Walks plugins_dir with os.scandir and yields (candidate, stat) pairs.
+
+    Candidates are .py files and packages (directories with __init__.py); the
+    stat result comes from the DirEntry so callers never stat a file again.
+    Excluded directories are pruned before they are listed. A package, the root
+    included, is a single candidate: its submodules are left to its own imports.
+    listdir may return cached DirEntry-like objects (name, path, is_dir(),
+    is_symlink(), stat()) instead of listing every directory again.
+    """
+    rules = rules or DEFAULT_RULES
+    max_depth = rules.max_depth if recursive else 0
+    root = os.fspath(plugins_dir)
+    # (directory, root-relative prefix, depth, DirEntry of the directory or None for root)
+    stack: List[Tuple[str, str, int, Any]] = [(root, "", 0, None)]
+    while stack:
+        dir_path, prefix, depth, dir_entry = stack.pop()
+        try:
+            entries = listdir(dir_path)
+        except OSError:
+            continue
+        if recursive and any(e.name == "__init__.py" for e in entries):
+            if dir_entry is not None:
+                # package below the root: one plugin, never descended into
+                if rules.included(dir_entry.name, prefix[:-1]):
+                    try:
+                        yield Path(dir_path), dir_entry.stat()
+                    except OSError:
+                        pass
+                continue
+            # the root itself is a package: likewise one plugin, so its modules
+            # are not loaded a second time on their own
+            if rules.included(os.path.basename(dir_path), "."):
+                try:
+                    yield Path(dir_path), os.stat(dir_path)
+                except OSError:
+                    pass
+            continue
+        subdirs = []
+        for entry in entries:
+            name = entry.name
+            rel = prefix + name
+            try:
+                if entry.is_dir():
+                    if rules.excluded(name, rel):
+                        continue
+                    if not recursive:
+                        if (rules.included(name, rel)
+                                and os.path.isfile(os.path.join(entry.path, "__init__.py"))):
+                            yield Path(entry.path), entry.stat()
+                    elif not entry.is_symlink() and (max_depth is None or depth < max_depth):
+                        subdirs.append((entry.path, rel + "/", depth + 1, entry))
+                    continue
+                if not name.endswith(".py") or rules.excluded(name, rel):
+                    continue
+                if recursive and name == "__init__.py":
+                    continue
+                if rules.included(name, rel):
+                    yield Path(entry.path), entry.stat()
+            except OSError:
+                # entry vanished between listing and stat
+                continue
+        # keep traversal order close to a depth-first directory listing
+        stack.extend(reversed(subdirs))
+
+def _iter_python_entries(plugins_dir: Path, recursive: bool = True,
+                         rules: Optional[DiscoveryRules] = None) -> Iterable[Path]:
     """Searches for .py files and packages with __init__.py."""
-    if recursive:
-        for p in plugins_dir.rglob("*.py"):
-            # For recursive mode, consider all .py files and packages
-            if p.name == "__init__.py":
-                yield p.parent  # yield the package directory
+    for p, _ in _scan_entries(plugins_dir, recursive=recursive, rules=rules):
+        yield p
+
+# archive path -> (st_mtime_ns, st_size, {directory: (subdirs, files)})
+_bundle_cache: Dict[str, Tuple[int, int, Dict[str, Tuple[Set[str], Set[str]]]]] = {}
+
+def _invalidate_bundle(archive: str) -> None:
+    """Forgets zipimport state for an archive that changed on disk."""
+    # zipimport keeps the parsed central directory per archive, and importers
+    # created for package paths inside it hold on to the old offsets
+    getattr(zipimport, "_zip_directory_cache", {}).pop(archive, None)
+    prefixes = (archive + os.sep, archive + "/")
+    for key in [k for k in list(sys.path_importer_cache) if k == archive or k.startswith(prefixes)]:
+        sys.path_importer_cache.pop(key, None)
+
+def _bundle_tree(bundle: Path, st: os.stat_result) -> Dict[str, Tuple[Set[str], Set[str]]]:
+    """Directory tree of an archive, read from its central directory once per version."""
+    archive = os.fspath(bundle)
+    cached = _bundle_cache.get(archive)
+    if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        return cached[2]
+    if cached:
+        _invalidate_bundle(archive)
+    tree: Dict[str, Tuple[Set[str], Set[str]]] = {"": (set(), set())}
+    with zipfile.ZipFile(archive) as zf:
+        names = zf.namelist()
+    for name in names:
+        parts = name.rstrip("/").split("/")
+        is_dir = name.endswith("/")
+        parent = ""
+        for i, part in enumerate(parts):
+            node = tree.setdefault(parent, (set(), set()))
+            if i == len(parts) - 1 and not is_dir:
+                node[1].add(part)
             else:
-                yield p  # yield the .py file
-    else:
-        for p in plugins_dir.glob("*.py"):
-            yield p
-        for p in plugins_dir.iterdir():
-            if p.is_dir() and (p / "__init__.py").exists():
-                yield p
-
-def _load_module_from_path(path: Path) -> types.ModuleType:
-    if path.is_dir():
+                node[0].add(part)
+                parent = f"{parent}/{part}" if parent else part
+                tree.setdefault(parent, (set(), set()))
+    _bundle_cache[archive] = (st.st_mtime_ns, st.st_size, tree)
+    return tree
+
+def _scan_bundle(bundle: Path, st: os.stat_result, recursive: bool = True,
+                 rules: Optional[DiscoveryRules] = None) -> Iterator[Tuple[str, bool]]:
+    """Yields (member, is_package) candidates of an archive with the same rules as _scan_entries."""
+    rules = rules or DEFAULT_RULES
+    max_depth = rules.max_depth if recursive else 0
+    tree = _bundle_tree(bundle, st)
+    stack: List[Tuple[str, int]] = [("", 0)]
+    while stack:
+        d, depth = stack.pop()
+        dirs, files = tree.get(d, (set(), set()))
+        if d and recursive and "__init__.py" in files:
+            if rules.included(d.rpartition("/")[2], d):
+                yield d, True
+            continue
+        prefix = d + "/" if d else ""
+        subdirs = []
+        for name in sorted(dirs):
+            rel = prefix + name
+            if rules.excluded(name, rel):
+                continue
+            if not recursive:
+                if "__init__.py" in tree[rel][1] and rules.included(name, rel):
+                    yield rel, True
+            elif max_depth is None or depth < max_depth:
+                subdirs.append((rel, depth + 1))
+        for name in sorted(files):
+            rel = prefix + name
+            # the archive root is not a package and __main__ belongs to an app bundle
+            if not name.endswith(".py") or name in ("__init__.py", "__main__.py"):
+                continue
+            if not rules.excluded(name, rel) and rules.included(name, rel):
+                yield rel, False
+        stack.extend(reversed(subdirs))
+
+def _drop_submodules(module_name: str) -> None:
+    # submodules are imported by the package itself; never reuse stale ones
+    prefix = module_name + "."
+    for stale in [m for m in list(sys.modules) if m.startswith(prefix)]:
+        del sys.modules[stale]
+
+def purge_module(module: types.ModuleType) -> bool:
+    """Removes a loader-created plugin module and its submodules from sys.modules.
+
+    Modules plugflow did not create (e.g. entry-point packages) are left alone.
+    Returns True when the module was registered and got removed.
+    """
+    name = getattr(module, "__name__", "")
+    # an unchanged file reloads under the same name: leave its successor alone
+    if not name.startswith(MODULE_PREFIX) or sys.modules.get(name) is not module:
+        return False
+    _drop_submodules(name)
+    del sys.modules[name]
+    return True
+
+# import statements of every module the loader executed, for dependency tracking
+_module_imports: "weakref.WeakKeyDictionary[types.ModuleType, List[ImportSpec]]" = weakref.WeakKeyDictionary()
+
+def module_imports(module: types.ModuleType) -> List[ImportSpec]:
+    return _module_imports.get(module, [])
+
+# content_fingerprint of the target each module was loaded from, taken before
+# its source was read: an edit racing the load then still reads as a change
+_module_fingerprints: "weakref.WeakKeyDictionary[types.ModuleType, Tuple[int, bytes]]" = weakref.WeakKeyDictionary()
+
+def loaded_fingerprint(module: types.ModuleType) -> Optional[Tuple[int, bytes]]:
+    return _module_fingerprints.get(module)
+
+def _bytecode_cacheable(loader: Any, filename: str) -> bool:
+    # __pycache__ entries are validated against the source's mtime in whole
+    # seconds and its size, so a same-size edit within the second the cached
+    # version was written in would go unnoticed: files modified during the
+    # current second are compiled without the cache
+    if not isinstance(loader, importlib.machinery.SourceFileLoader):
+        return False  # e.g. zipimport, which never writes bytecode
+    try:
+        return int(os.stat(filename).st_mtime) < int(time.time())
+    except OSError:
+        return False
+
+def _exec_source(module: types.ModuleType, loader: Any, filename: str, profile: LoadProfile) -> None:
+    # compile and exec separately so each step shows up in the load profile
+    sys.modules[module.__name__] = module
+    try:
+        if _bytecode_cacheable(loader, filename):
+            # reads __pycache__ bytecode, or the source and writes the bytecode
+            with profile.phase("compile"):
+                code = loader.get_code(module.__name__)
+                _module_imports[module] = scan_imports(code)
+        else:
+            with profile.phase("read"):
+                source = loader.get_data(filename)
+            with profile.phase("compile"):
+                code = compile(source, filename, "exec", dont_inherit=True)
+                _module_imports[module] = scan_imports(code)
+        with profile.phase("exec"):
+            exec(code, module.__dict__)
+    except BaseException:
+        # a module that failed to execute must not linger in sys.modules
+        purge_module(module)
+        raise
+
+def _load_module_from_bundle(bundle: Path, member: str, is_pkg: bool, st: os.stat_result,
+                             profile: Optional[LoadProfile] = None) -> types.ModuleType:
+    parent, _, modname = member.rpartition("/")
+    if not is_pkg:
+        modname = modname[:-3]
+    location = os.path.join(os.fspath(bundle), *parent.split("/")) if parent else os.fspath(bundle)
+    importer = zipimport.zipimporter(location)
+    filename = importer.get_filename(modname)
+    module_name = _unique_module_name(bundle, st, member)
+    spec = importlib.machinery.ModuleSpec(module_name, importer, origin=filename, is_package=is_pkg)
+    spec.has_location = True
+    if is_pkg:
+        # relative imports resolve through zipimport's path hook for this location
+        spec.submodule_search_locations = [os.path.join(location, modname)]
+        _drop_submodules(module_name)
+    module = importlib.util.module_from_spec(spec)
+    _exec_source(module, importer, filename, profile or LoadProfile(bundle, module_name))
+    return module
+
+def _load_module_from_path(path: Path, st: Optional[os.stat_result] = None,
+                           profile: Optional[LoadProfile] = None) -> types.ModuleType:
+    is_dir = stat.S_ISDIR(st.st_mode) if st is not None else path.is_dir()
+    if is_dir:
         file = path / "__init__.py"
     else:
         file = path
-    module_name = _unique_module_name(path)
+    module_name = _unique_module_name(path, st)
     spec = importlib.util.spec_from_file_location(module_name, file)
     if not spec or not spec.loader:
         raise ImportError(f"Failed to create spec for {path}")
+    if is_dir:
+        _drop_submodules(module_name)
     module = importlib.util.module_from_spec(spec)
-    sys.modules[module_name] = module
-    spec.loader.exec_module(module)  # type: ignore[assignment]
+    fingerprint = content_fingerprint(path)
+    _exec_source(module, spec.loader, str(file), profile or LoadProfile(path, module_name))
+    if fingerprint is not None:
+        _module_fingerprints[module] = fingerprint
     return module
 
-def _instantiate_from_module(module: types.ModuleType, context: Any) -> List[BasePlugin]:
-    out: List[BasePlugin] = []
+# A plugin instance, or with lazy=True a plugin class the manager instantiates on first use
+PluginItem = Union[BasePlugin, Type[BasePlugin]]
+
+def plugin_name(item: PluginItem) -> str:
+    """Name of a plugin instance or of a plugin class not instantiated yet."""
+    if isinstance(item, type):
+        return item.name or item.__name__
+    return item.plugin_name
+
+def _as_plugin(item: Any, context: Any, lazy: bool = False) -> Optional[PluginItem]:
+    if inspect.isclass(item) and issubclass(item, BasePlugin):
+        return item if lazy else item(context)
+    if isinstance(item, BasePlugin):
+        return item
+    return None
+
+def _instantiate_from_module(module: types.ModuleType, context: Any, lazy: bool = False) -> List[PluginItem]:
+    out: List[PluginItem] = []
 
     # 1) register(context) -> Iterable[BasePlugin | Type[BasePlugin]]
     reg = getattr(module, "register", None)
     if callable(reg):
-        produced = list(reg(context))  # type: ignore
-        for item in produced:
-            if inspect.isclass(item) and issubclass(item, BasePlugin):
-                out.append(item(context))
-            elif isinstance(item, BasePlugin):
-                out.append(item)
-            else:
-                raise TypeError("register() must return instances or classes of BasePlugin")
+        out = _instantiate_from_object(reg, context, lazy)
         if out:
             return out
 
@@ -71,25 +409,103 @@ def _instantiate_from_module(module: types.ModuleType, context: Any) -> List[Bas
                 out.append(obj)
             elif isinstance(obj, Iterable):
                 for el in obj:
-                    if inspect.isclass(el) and issubclass(el, BasePlugin):
-                        out.append(el(context))
-                    elif isinstance(el, BasePlugin):
-                        out.append(el)
+                    plg = _as_plugin(el, context, lazy)
+                    if plg is not None:
+                        out.append(plg)
             if out:
                 return out
 
-    # 3) all BasePlugin subclasses in module
-    for _, cls in inspect.getmembers(module, inspect.isclass):
-        if issubclass(cls, BasePlugin) and cls is not BasePlugin and cls.__module__ == module.__name__:
-            out.append(cls(context))
+    # 3) all BasePlugin subclasses defined in the module (registered by
+    # BasePlugin.__init_subclass__) and bound to their name, sorted by name
+    namespace = vars(module)
+    for cls in sorted(plugin_classes(module.__name__), key=lambda c: c.__name__):
+        if namespace.get(cls.__name__) is cls:
+            out.append(cls if lazy else cls(context))
+    return out
+
+def _instantiate_from_object(obj: Any, context: Any, lazy: bool = False) -> List[PluginItem]:
+    """Plugins from an entry-point target or register(): a module, a plugin class
+    or instance, a register-like callable, or an iterable of classes/instances.
+
+    With lazy=True plugin classes are returned as they are, not instantiated."""
+    if isinstance(obj, types.ModuleType):
+        return _instantiate_from_module(obj, context, lazy)
+    plg = _as_plugin(obj, context, lazy)
+    if plg is not None:
+        return [plg]
+    if callable(obj):
+        obj = obj(context)
+    out: List[PluginItem] = []
+    for item in obj:
+        plg = _as_plugin(item, context, lazy)
+        if plg is None:
+            raise TypeError("register() must return instances or classes of BasePlugin")
+        out.append(plg)
     return out
 
-def discover_and_load(plugins_dir: Path, context: Any, recursive: bool = True) -> List[Tuple[BasePlugin, Path, types.ModuleType]]:
-    """Returns list of tuples (plugin, path, module)."""
+def discover_and_load(plugins_dir: Path, context: Any, recursive: bool = True,
+                      rules: Optional[DiscoveryRules] = None,
+                      profiles: Optional[List[LoadProfile]] = None,
+                      lazy: bool = False) -> List[Tuple[PluginItem, Path, types.ModuleType]]:
+    """Returns list of tuples (plugin, path, module).
+
+    plugins_dir may also be a .zip/.whl/.pyz bundle; its plugins are reported
+    with the bundle as their path, since the archive is reloaded as a whole.
+    A single .py file is loaded as one plugin module.
+    When profiles is given, a LoadProfile is appended for every loaded module.
+    With lazy=True plugin classes are reported uninstantiated.
+    """
     result = []
-    for item in _iter_python_entries(plugins_dir, recursive=recursive):
-        module = _load_module_from_path(item if item.is_file() else Path(item))
-        plugins = _instantiate_from_module(module, context)
-        for plg in plugins:
-            result.append((plg, Path(item), module))
+    if plugins_dir.suffix == ".py" and plugins_dir.is_file():
+        return load_target(plugins_dir, context, profiles=profiles, lazy=lazy)
+    if is_bundle(plugins_dir):
+        st = plugins_dir.stat()
+        fingerprint = content_fingerprint(plugins_dir)
+        for member, is_pkg in _scan_bundle(plugins_dir, st, recursive=recursive, rules=rules):
+            profile = LoadProfile(plugins_dir)
+            module = _load_module_from_bundle(plugins_dir, member, is_pkg, st, profile)
+            if fingerprint is not None:
+                _module_fingerprints[module] = fingerprint
+            _collect(result, module, plugins_dir, context, profile, profiles, lazy)
+        return result
+    for item, st in _scan_entries(plugins_dir, recursive=recursive, rules=rules):
+        profile = LoadProfile(item)
+        module = _load_module_from_path(item, st, profile)
+        _collect(result, module, item, context, profile, profiles, lazy)
+    return result
+
+def load_target(target: Path, context: Any, recursive: bool = True,
+                rules: Optional[DiscoveryRules] = None,
+                profiles: Optional[List[LoadProfile]] = None,
+                lazy: bool = False) -> List[Tuple[PluginItem, Path, types.ModuleType]]:
+    """Loads one discovery candidate: a .py file, a package directory or a bundle.
+
+    Unlike discover_and_load, a package directory is imported as a package
+    rather than scanned as a plugins root.
+    """
+    if is_bundle(target):
+        return discover_and_load(target, context, recursive=recursive, rules=rules, profiles=profiles,
+                                 lazy=lazy)
+    result: List[Tuple[PluginItem, Path, types.ModuleType]] = []
+    profile = LoadProfile(target)
+    module = _load_module_from_path(target, target.stat(), profile)
+    _collect(result, module, target, context, profile, profiles, lazy)
     return result
+
+def _collect(result: List[Tuple[PluginItem, Path, types.ModuleType]], module: types.ModuleType,
+             path: Path, context: Any, profile: LoadProfile,
+             profiles: Optional[List[LoadProfile]], lazy: bool = False) -> None:
+    profile.module = module.__name__
+    try:
+        with profile.phase("instantiate"):
+            plugins = _instantiate_from_module(module, context, lazy)
+    except BaseException:
+        purge_module(module)
+        raise
+    for plg in plugins:
+        result.append((plg, path, module))
+    if not plugins:
+        # helper modules are reachable through their importers, not through sys.modules
+        purge_module(module)
+    if profiles is not None:
+        profiles.append(profile)
@@ -1,21 +1,65 @@
 
 from __future__ import annotations
+import asyncio
+import gc
+import json
 import logging
+import os
+import sys
 import threading
+import time
+import weakref
+from collections import deque
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Union
-import sys
+from typing import IO, Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Type, Union
 
 from .base import BasePlugin
-from .loader import discover_and_load
-from .watcher import DirectoryWatcher
+from .deps import DependencyGraph, module_dependencies
+from .entrypoints import discover_entry_points, load_entry_point
+from .loader import (MODULE_PREFIX, DiscoveryRules, PluginItem, content_fingerprint, discover_and_load,
+                     load_target, loaded_fingerprint, module_imports, plugin_name, purge_module)
+from .memory import MemoryAccounting, MemorySnapshot, compare
+from .metrics import SAMPLE_EVERY, CallStats
+from .profiling import HookProfiler, LoadProfile, PluginProfile, build_report
+from .tracing import Span, Tracer, current_tracer
+from .watcher import ChangeQueue, DirectoryWatcher, Subscription, shared_watch_service
 
 class PluginRecord:
-    __slots__ = ("plugin", "path", "module")
-    def __init__(self, plugin: BasePlugin, path: Path, module) -> None:
+    __slots__ = ("plugin", "path", "module", "factory", "entry_point")
+    def __init__(self, plugin: Optional[BasePlugin], path: Path, module,
+                 factory: Optional[Type[BasePlugin]] = None) -> None:
         self.plugin = plugin
         self.path = path
         self.module = module
+        # plugin class of a lazy record, until first use instantiates it
+        self.factory = factory
+        # (name, "module:attr") of the entry point the plugin was loaded from
+        self.entry_point: Optional[Tuple[str, str]] = None
+
+class _OwnedLock:
+    """A lock that knows whether the calling thread holds it."""
+    __slots__ = ("_lock", "_owner", "_depth")
+    def __init__(self, lock: Any) -> None:
+        self._lock = lock
+        self._owner: Optional[int] = None
+        self._depth = 0
+
+    def __enter__(self) -> "_OwnedLock":
+        self._lock.acquire()
+        self._owner = threading.get_ident()
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._depth -= 1
+        if not self._depth:
+            self._owner = None
+        self._lock.release()
+
+    def held(self) -> bool:
+        # only the holder sets _owner to its own ident, and clears it before releasing
+        return self._owner == threading.get_ident()
 
 class PluginManager:
     def __init__(self,
@@ -24,16 +68,68 @@ class PluginManager:
                  recursive: bool = True,
                  hot_reload: bool = False,
                  poll_interval: float = 1.0,
-                 logger: Optional[logging.Logger] = None) -> None:
+                 max_poll_interval: Optional[float] = None,
+                 logger: Optional[logging.Logger] = None,
+                 include: Optional[Iterable[str]] = None,
+                 exclude: Optional[Iterable[str]] = None,
+                 max_depth: Optional[int] = None,
+                 entry_point_group: Optional[str] = None,
+                 entry_point_cache: Optional[Union[str, Path]] = None,
+                 lazy: bool = False,
+                 watch_backend: str = "auto",
+                 reload_debounce: float = 0.1,
+                 collect_stats: bool = False,
+                 tracer: Optional[Tracer] = None,
+                 track_memory: bool = False,
+                 stats_sample_every: int = SAMPLE_EVERY) -> None:
         self.paths = [Path(p) for p in (plugins_paths or [])]
         self.context = context
         self.recursive = recursive
+        self.rules = DiscoveryRules(include=include, exclude=exclude, max_depth=max_depth)
+        self.entry_point_group = entry_point_group
+        self.entry_point_cache = Path(entry_point_cache) if entry_point_cache else None
+        # defer constructing plugin classes (and on_load) until dispatch or get() needs them
+        self.lazy = lazy
         self.hot_reload = hot_reload
         self.poll_interval = poll_interval
+        # adaptive polling: back off from poll_interval up to this while roots are idle
+        self.max_poll_interval = max_poll_interval
+        self.watch_backend = watch_backend
+        # quiet period that batches a burst of changes into one reload
+        self.reload_debounce = reload_debounce
         self.log = logger or self._default_logger()
-        self._lock = threading.RLock()
+        # per-(plugin, hook) call counts and latency histograms, see stats();
+        # times one in stats_sample_every dispatches of each hook
+        self._call_stats: Optional[CallStats] = CallStats(stats_sample_every) if collect_stats else None
+        # per-plugin allocation accounting; starts tracemalloc, see memory_stats()
+        self._memory: Optional[MemoryAccounting] = MemoryAccounting() if track_memory else None
+        # receives a span per plugin hook call and load/reload phase, see set_tracer()
+        self._tracer: Optional[Tracer] = tracer
+        # set while profile() runs; it wraps the installed tracer
+        self._profiler: Optional[HookProfiler] = None
+        self._profile_lock = threading.Lock()
+        self._lock = _OwnedLock(threading.RLock())
+        # serializes reloads, which prepare new modules without holding _lock
+        self._reload_lock = _OwnedLock(threading.Lock())
         self._records: Dict[str, PluginRecord] = {}
-        self._watchers: List[DirectoryWatcher] = []
+        # abspath of a file, package or bundle -> names of the plugins loaded from it
+        self._by_path: Dict[str, Set[str]] = {}
+        self._load_profiles: Dict[str, LoadProfile] = {}
+        # id(module) -> (module, names of loaded plugins it produced)
+        self._module_users: Dict[int, Tuple[Any, set]] = {}
+        # (kind, name, detail, weakref) of everything unloaded, checked by find_leaks()
+        self._unloaded: List[Tuple[str, str, str, weakref.ref]] = []
+        # which plugin targets import which helper files below the plugin roots
+        self._deps = DependencyGraph()
+        self._reload_log: deque = deque(maxlen=256)
+        # reloads, plugins reloaded and seconds spent since the manager was created
+        self._reload_totals = [0, 0, 0.0]
+        # abspath -> content fingerprint of loaded targets and their helpers
+        self._fingerprints: Dict[str, Tuple[int, bytes]] = {}
+        self._subscriptions: List[Subscription] = []
+        self._async_watchers: List[DirectoryWatcher] = []  # driven by watch()
+        # watcher notifications are coalesced here and reloaded on a worker thread
+        self._reload_queue = ChangeQueue(self._apply_changes, quiet=reload_debounce)
 
     def _default_logger(self) -> logging.Logger:
         logger = logging.getLogger("plugflow")
@@ -51,149 +147,838 @@ class PluginManager:
     def load_all(self) -> None:
         for p in self.paths:
             self.load_from_path(p)
+        if self.entry_point_group:
+            self.load_entry_points(self.entry_point_group)
         if self.hot_reload:
             self._start_watchers()
 
     def _start_watchers(self) -> None:
+        # one process-wide thread watches the roots of every manager
+        service = shared_watch_service()
         for p in self.paths:
-            watcher = DirectoryWatcher(
-                root=p,
-                interval=self.poll_interval,
+            sub = service.subscribe(
+                p,
+                on_change=lambda t: self._reload_queue.put(t, "change"),
+                on_delete=lambda t: self._reload_queue.put(t, "delete"),
                 recursive=self.recursive,
-                on_change=self._on_fs_change,
-                on_delete=self._on_fs_delete,
+                rules=self.rules,
+                interval=self.poll_interval,
+                backend=self.watch_backend,
+                max_interval=self.max_poll_interval,
             )
-            watcher.start()
-            self._watchers.append(watcher)
-            self.log.info(f"Watching {p} for plugin changes...")
+            self._subscriptions.append(sub)
+            self.log.info(f"Watching {p} for plugin changes ({sub.backend})...")
+
+    async def watch(self) -> None:
+        """Hot reload from the running asyncio loop instead of the watcher thread.
+
+        Run it as a task after load_all() on a manager created without
+        hot_reload; cancel the task to stop watching. Changes from every root
+        are coalesced for reload_debounce seconds and reloaded on the loop, so
+        plugins are never swapped from another thread.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def pump(watcher: DirectoryWatcher) -> None:
+            try:
+                async for batch in watcher.changes():
+                    now = time.perf_counter()
+                    for change in batch:
+                        queue.put_nowait((change, now))
+            except Exception as e:
+                self.log.exception(f"Watching {watcher.root} failed: {e}")
+
+        watchers = [DirectoryWatcher(p, interval=self.poll_interval, recursive=self.recursive, rules=self.rules,
+                                     backend=self.watch_backend, max_interval=self.max_poll_interval)
+                    for p in self.paths]
+        tasks = [asyncio.ensure_future(pump(w)) for w in watchers]
+        self._async_watchers.extend(watchers)
+        try:
+            while True:
+                (path, kind), since = await queue.get()
+                pending = {path: kind}
+                while True:
+                    while not queue.empty():
+                        (path, kind), _ = queue.get_nowait()
+                        pending[path] = kind
+                    try:
+                        (path, kind), _ = await asyncio.wait_for(queue.get(), self.reload_debounce)
+                    except asyncio.TimeoutError:
+                        break
+                    pending[path] = kind
+                try:
+                    self._apply_changes(list(pending.items()), since)
+                except Exception as e:
+                    self.log.exception(f"Hot reload of {len(pending)} changed path(s) failed: {e}")
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for w in watchers:
+                self._async_watchers.remove(w)
+
+    def watch_stats(self) -> List[Dict[str, Any]]:
+        """Per watched root: backend, current polling interval, wall time of the
+        last and of all scans, and the number of scans."""
+        return [sub.metrics() for sub in self._subscriptions] + [w.metrics() for w in self._async_watchers]
+
+    def runtime_metrics(self) -> Dict[str, Any]:
+        """Gauges and counters for exporters: loaded and instantiated plugins, reload
+        totals, changes waiting in the reload queue and watch_stats().
+
+        Read without the manager lock, so a scrape neither waits for nor blocks dispatch.
+        """
+        records = list(self._records.values())  # one C-level copy, safe under the GIL
+        reloads, reloaded, reload_seconds = self._reload_totals
+        return {"plugins": len(records),
+                "instantiated": sum(1 for rec in records if rec.plugin is not None),
+                "reloads": reloads, "reloaded_plugins": reloaded, "reload_seconds": reload_seconds,
+                "reload_queue": self._reload_queue.depth(), "watch": self.watch_stats()}
 
     def stop(self) -> None:
-        for w in self._watchers:
-            w.stop()
-        self._watchers.clear()
+        for sub in self._subscriptions:
+            sub.close()
+        self._subscriptions.clear()
+        self._reload_queue.stop()
 
     def load_from_path(self, path: Path) -> None:
         if not path.exists():
             self.log.warning(f"Plugins path not found: {path}")
             return
-        loaded = 0
-        with self._lock:
-            for plugin, p, module in discover_and_load(path, self.context, recursive=self.recursive):
-                self._add_record(plugin, p, module)
-                loaded += 1
+        started = time.perf_counter()
+        profiles: List[LoadProfile] = []
+        with self._traced("load", "load_from_path", str(path)):
+            # import outside the lock; only registration and on_load block dispatch
+            found = discover_and_load(path, self.context, recursive=self.recursive, rules=self.rules,
+                                      profiles=profiles, lazy=self.lazy)
+            fingerprints = self._loaded_fingerprints(found)
+            with self._lock:
+                self._fingerprints.update(fingerprints)
+                loaded = self._add_records(found, profiles)
         if loaded:
-            self.log.debug(f"Loaded {loaded} plugin(s) from {path}")
+            self.log.debug(f"Loaded {loaded} plugin(s) from {path} in "
+                           f"{(time.perf_counter() - started) * 1000:.1f} ms")
 
-    def _add_record(self, plugin: BasePlugin, path: Path, module) -> None:
-        name = plugin.plugin_name
+    def load_entry_points(self, group: str) -> None:
+        """Load plugins registered by installed distributions under an entry-point group."""
+        started = time.perf_counter()
+        profiles: List[LoadProfile] = []
+        specs: Dict[str, Tuple[str, str]] = {}
+        with self._traced("load", "load_entry_points", group):
+            found = discover_entry_points(group, self.context, self.entry_point_cache, profiles=profiles,
+                                          lazy=self.lazy, specs=specs)
+            with self._lock:
+                loaded = self._add_records(found, profiles)
+                self._mark_entry_points(specs)
+        if loaded:
+            self.log.debug(f"Loaded {loaded} plugin(s) from entry points '{group}' in "
+                           f"{(time.perf_counter() - started) * 1000:.1f} ms")
+
+    def _mark_entry_points(self, specs: Dict[str, Tuple[str, str]]) -> None:
+        for name, spec in specs.items():
+            rec = self._records.get(name)
+            if rec is not None:
+                rec.entry_point = spec
+
+    def _reload_entry_point(self, spec: Tuple[str, str]) -> None:
+        """Re-imports an entry point's module and replaces the plugins it registered.
+
+        Plugins that the entry point no longer produces are unloaded; plugins
+        other entry points registered from the same module are left alone.
+        """
+        ep_name, value = spec
+        with self._reload_lock, self._traced("reload", "reload", f"entry point {ep_name}"):
+            found, profile = load_entry_point(ep_name, value, self.context, self.lazy, reload=True)
+            produced = {plugin_name(plg) for plg, _, _ in found}
+            with self._lock:
+                for k in [k for k, rec in self._records.items() if rec.entry_point == spec and k not in produced]:
+                    self._remove_record(k)
+                    self.log.debug(f"Plugin unloaded, no longer registered: {k} by entry point {ep_name}")
+                self._add_records(found, [profile])
+                self._mark_entry_points({k: spec for k in produced})
+
+    def _add_records(self, loaded: List[Tuple[PluginItem, Path, Any]], profiles: List[LoadProfile]) -> int:
+        by_module = {prof.module: prof for prof in profiles}
+        for plugin, p, module in loaded:
+            self._add_record(plugin, p, module, by_module.get(getattr(module, "__name__", "")))
+        for p, deps in self._dependencies(loaded).items():
+            self._deps.set_target(os.path.abspath(p), deps, p)
+            self._fingerprints.update(self._fingerprints_of(deps))
+        return len(loaded)
+
+    def _loaded_fingerprints(self, loaded: List[Tuple[PluginItem, Path, Any]]) -> Dict[str, Tuple[int, bytes]]:
+        # fingerprints of the versions actually imported, not of the files now on disk
+        out = {}
+        for _, p, module in loaded:
+            fp = loaded_fingerprint(module)
+            if fp is not None:
+                out[os.path.abspath(p)] = fp
+        return out
+
+    def _fingerprints_of(self, paths: Iterable[Any]) -> Dict[str, Tuple[int, bytes]]:
+        # helper files not fingerprinted yet
+        out = {}
+        for p in paths:
+            if not p:
+                continue
+            key = os.path.abspath(p)
+            if key in out or key in self._fingerprints:
+                continue
+            fp = content_fingerprint(Path(p))
+            if fp is not None:
+                out[key] = fp
+        return out
+
+    def _dependencies(self, loaded: List[Tuple[PluginItem, Path, Any]]) -> Dict[Path, Dict[str, Dict[str, set]]]:
+        roots = [str(p) for p in self.paths if p.is_dir()]
+        per_target: Dict[Path, Dict[str, Dict[str, set]]] = {}
+        if not roots:
+            return per_target
+        seen = set()
+        for _, p, module in loaded:
+            if id(module) in seen:
+                continue
+            seen.add(id(module))
+            merged = per_target.setdefault(p, {})
+            for file, entry in module_dependencies(module, module_imports(module), roots, str(p)).items():
+                into = merged.setdefault(file, {"modules": set(), "imports": set()})
+                into["modules"] |= entry["modules"]
+                into["imports"] |= entry["imports"]
+        return per_target
+
+    def _add_record(self, plugin: PluginItem, path: Path, module,
+                    profile: Optional[LoadProfile] = None) -> None:
+        name = plugin_name(plugin)
         # unload if duplicate
+        old = self._install(plugin, path, module, profile)
+        if old:
+            self._unload_old(name, old)
+        if not isinstance(plugin, type):
+            self._call_on_load(plugin, path, self._load_profiles[name])
+
+    def _install(self, plugin: PluginItem, path: Path, module,
+                 profile: Optional[LoadProfile] = None) -> Optional[PluginRecord]:
+        # registers a record and returns the one it replaced, already released
+        name = plugin_name(plugin)
         old = self._records.get(name)
         if old:
-            try:
-                old.plugin.on_unload(self)
-            except Exception as e:
-                self.log.exception(f"Error on_unload({name}): {e}")
-            # Remove old module from sys.modules to ensure fresh reload
-            old_module_name = getattr(old.module, '__name__', None)
-            if old_module_name and old_module_name in sys.modules:
-                del sys.modules[old_module_name]
-        self._records[name] = PluginRecord(plugin, path, module)
+            if old.path != path:
+                self._unindex(name, old.path)
+            self._release(name, old)
+        self._by_path.setdefault(os.path.abspath(path), set()).add(name)
+        if isinstance(plugin, type):
+            self._records[name] = PluginRecord(None, path, module, factory=plugin)
+        else:
+            self._records[name] = PluginRecord(plugin, path, module)
+        if module is not None:
+            self._module_users.setdefault(id(module), (module, set()))[1].add(name)
+        if profile is None:
+            profile = LoadProfile(path, getattr(module, "__name__", ""))
+        self._load_profiles[name] = profile
+        return old
+
+    def _unindex(self, name: str, path: Path) -> None:
+        key = os.path.abspath(path)
+        names = self._by_path.get(key)
+        if names is not None:
+            names.discard(name)
+            if not names:
+                del self._by_path[key]
+
+    def _names_at(self, path: Path) -> List[str]:
+        return sorted(self._by_path.get(os.path.abspath(path), ()))
+
+    def _unload_old(self, name: str, rec: PluginRecord) -> None:
+        if rec.plugin is None:
+            return  # never instantiated, never loaded
         try:
-            plugin.on_load(self)
+            rec.plugin.on_unload(self)
+        except Exception as e:
+            self.log.exception(f"Error on_unload({name}): {e}")
+
+    def _call_on_load(self, plugin: BasePlugin, path: Path, profile: LoadProfile) -> None:
+        name = plugin.plugin_name
+        try:
+            with profile.plugin_phase(name, "on_load", self._tracer):
+                plugin.on_load(self)
         except Exception as e:
             self.log.exception(f"Error on_load({name}): {e}")
         self.log.debug(f"Plugin ready: {name} ({getattr(plugin, 'version', 'n/a')}) from {path}")
 
-    def _on_fs_change(self, target: Path) -> None:
-        # On any change - try to load what's in the folder, but only if it still exists
-        self.log.debug(f"Change detected: {target}")
-        if not target.exists():
-            self.log.debug(f"Target no longer exists, skipping reload: {target}")
-            return
+    def _materialize(self, name: str, rec: PluginRecord) -> Optional[BasePlugin]:
+        """Instance of a record; a lazy plugin is constructed and its on_load run on first use.
+
+        Must be called with self._lock held, which makes the initialization
+        happen exactly once. A plugin whose constructor fails is unloaded.
+        """
+        if rec.plugin is not None or rec.factory is None:
+            return rec.plugin
+        profile = self._load_profiles.get(name) or LoadProfile(rec.path, getattr(rec.module, "__name__", ""))
         try:
-            self.load_from_path(target if target.is_dir() else target.parent)
+            with profile.plugin_phase(name, "instantiate", self._tracer):
+                plugin = rec.factory(self.context)
         except Exception as e:
-            self.log.exception(f"Hot reload failed for {target}: {e}")
+            self.log.exception(f"Error instantiating {name}: {e}")
+            rec.factory = None
+            if self._records.get(name) is rec:
+                self._remove_record(name)
+            return None
+        rec.plugin = plugin
+        rec.factory = None
+        self._call_on_load(plugin, rec.path, profile)
+        return plugin
 
-    def _on_fs_delete(self, target: Path) -> None:
-        # Unload plugins whose path == target
-        self.log.debug(f"Delete detected: {target}")
+    def _reload_target(self, target: Path) -> int:
+        """Re-imports one file, package or bundle and replaces only the plugins it produced.
+
+        Plugins previously loaded from target that it no longer defines are unloaded;
+        targets importing it (directly or through helper modules below the plugin
+        roots) are reloaded after it, dependencies first. Every other record is left
+        untouched. Returns the number of plugins loaded.
+
+        Modules are imported and the new plugins' on_load runs without the manager
+        lock; the records are then swapped in one short critical section, so
+        dispatch only waits for the swap itself.
+        """
+        started = time.perf_counter()
+        with self._reload_lock, self._traced("reload", "reload", str(target)):
+            with self._lock:
+                dependents, helpers = self._deps.dependents(os.path.abspath(target))
+            self._purge_helpers(helpers)
+            batches = [self._prepare(target)]
+            batches.extend(self._prepare_dependents(dependents))
+            count, stall = self._swap(batches)
+        self._record_reload([target], len(batches), count, len(helpers), started, stall)
+        return count
+
+    def _prepare(self, target: Path) -> Tuple[Path, List[Tuple[PluginItem, Path, Any]], List[LoadProfile]]:
+        profiles: List[LoadProfile] = []
+        loaded = load_target(target, self.context, recursive=self.recursive, rules=self.rules,
+                             profiles=profiles, lazy=self.lazy)
+        return target, loaded, profiles
+
+    def _prepare_dependents(self, dependents: List[Path]) -> List[Tuple[Path, List[Tuple[PluginItem, Path, Any]], List[LoadProfile]]]:
+        batches = []
+        for dep in dependents:
+            try:
+                batches.append(self._prepare(dep))
+            except Exception as e:
+                self.log.exception(f"Reload of dependent {dep} failed: {e}")
+        return batches
+
+    def _swap(self, batches: List[Tuple[Path, List[Tuple[PluginItem, Path, Any]], List[LoadProfile]]]) -> Tuple[int, float]:
+        """Replaces the records of each target with freshly loaded plugins.
+
+        on_load runs before the new plugins become visible and on_unload after the
+        old ones are gone, both outside the manager lock. Returns the number of
+        plugins swapped in and how long the lock was held.
+        """
+        staged = []
+        for target, loaded, profiles in batches:
+            by_module = {prof.module: prof for prof in profiles}
+            for plugin, p, module in loaded:
+                name = getattr(module, "__name__", "")
+                profile = by_module.get(name)
+                if profile is None:
+                    profile = by_module[name] = LoadProfile(p, name)
+                if not isinstance(plugin, type):
+                    self._call_on_load(plugin, p, profile)
+            deps = self._dependencies(loaded)
+            fingerprints = self._loaded_fingerprints(loaded)
+            for d in deps.values():
+                fingerprints.update(self._fingerprints_of(d))
+            staged.append((target, loaded, by_module, deps, fingerprints))
+
+        retired: List[Tuple[str, PluginRecord]] = []
+        count = 0
+        locked = time.perf_counter()
         with self._lock:
-            to_remove = [k for k, rec in self._records.items() if rec.path == target]
-            self.log.debug(f"Plugins to remove: {to_remove}")
-            for k in to_remove:
-                rec = self._records.pop(k)
+            for target, loaded, by_module, deps, fingerprints in staged:
+                produced = {plugin_name(plugin) for plugin, _, _ in loaded}
+                for k in [k for k in self._names_at(target) if k not in produced]:
+                    rec = self._records.pop(k)
+                    self._unindex(k, rec.path)
+                    self._load_profiles.pop(k, None)
+                    self._release(k, rec)
+                    retired.append((k, rec))
+                    self.log.debug(f"Plugin unloaded, no longer defined: {k} in {target}")
+                for plugin, p, module in loaded:
+                    old = self._install(plugin, p, module, by_module.get(getattr(module, "__name__", "")))
+                    if old:
+                        retired.append((plugin_name(plugin), old))
+                for p, d in deps.items():
+                    self._deps.set_target(os.path.abspath(p), d, p)
+                if not loaded:
+                    self._fingerprints.pop(os.path.abspath(target), None)
+                self._fingerprints.update(fingerprints)
+                count += len(loaded)
+        stall = time.perf_counter() - locked
+        for name, rec in retired:
+            self._unload_old(name, rec)
+        return count, stall
+
+    def _purge_helpers(self, names: List[str]) -> None:
+        # helper modules below the plugin roots are imported by plain name; drop
+        # them so dependents pick up the new version
+        for name in names:
+            if sys.modules.pop(name, None) is not None:
+                self.log.debug(f"Helper module invalidated: {name}")
+
+    def _record_reload(self, paths: List[Path], targets: int, plugins: int, helpers: int,
+                       started: float, stall: float, since: Optional[float] = None) -> None:
+        now = time.perf_counter()
+        duration = now - started
+        latency = now - (since if since is not None else started)
+        with self._lock:
+            self._reload_log.append({"trigger": str(paths[0]), "burst": len(paths), "targets": targets,
+                                     "plugins": plugins, "helpers": helpers, "duration": duration,
+                                     "stall": stall, "latency": latency})
+            totals = self._reload_totals
+            totals[0] += 1
+            totals[1] += plugins
+            totals[2] += duration
+        self.log.debug(f"Reloaded {plugins} plugin(s) from {targets} target(s) after {len(paths)} change(s) "
+                       f"starting with {paths[0]} in {duration * 1000:.1f} ms "
+                       f"(dispatch blocked {stall * 1000:.2f} ms, {latency * 1000:.1f} ms since first change)")
+
+    def reload_stats(self) -> List[Dict[str, Any]]:
+        """Recent hot reloads, oldest first: the first changed path, how many paths
+        the burst coalesced, how many targets and plugins were reloaded, how many
+        helper modules were invalidated, total duration, stall (the time dispatch
+        was blocked by the swap) and latency from the first change to the end of
+        the reload."""
+        with self._lock:
+            return list(self._reload_log)
+
+    def _remove_record(self, name: str) -> Optional[PluginRecord]:
+        rec = self._records.pop(name, None)
+        self._load_profiles.pop(name, None)
+        if rec:
+            self._unindex(name, rec.path)
+            self._unload_old(name, rec)
+            self._release(name, rec)
+        return rec
+
+    def _on_fs_change(self, target: Path) -> None:
+        self._apply_changes([(target, "change")])
+
+    def _on_fs_delete(self, target: Path) -> None:
+        self._apply_changes([(target, "delete")])
+
+    def _apply_changes(self, changes: List[Tuple[Path, str]], since: Optional[float] = None) -> None:
+        """Applies one burst of file system changes as a single batched reload.
+
+        changes holds (target, "change" | "delete" | "reload") pairs, one per target.
+        Plugins of deleted targets are unloaded; changed targets and every target
+        depending on any of them are re-imported once and swapped in together.
+        "reload" targets, queued by reload_plugin(), are re-imported even if their
+        content is unchanged. since is when the first change of the burst was
+        noticed (time.perf_counter()).
+        """
+        started = time.perf_counter()
+        deleted: List[Path] = []
+        changed: List[Path] = []
+        for target, kind in changes:
+            self.log.debug(f"{'Delete' if kind == 'delete' else 'Change'} detected: {target}")
+            if kind == "delete":
+                deleted.append(target)
+                continue
+            if not target.exists():
+                self.log.debug(f"Target no longer exists, skipping reload: {target}")
+                continue
+            if kind == "reload":
+                with self._lock:
+                    specs = {self._records[k].entry_point for k in self._names_at(target)} - {None}
+                for spec in specs:
+                    try:
+                        self._reload_entry_point(spec)
+                    except Exception as e:
+                        self.log.exception(f"Reload of entry point {spec[0]} failed: {e}")
+                if not specs:
+                    changed.append(target)
+                continue
+            # touch, git checkout and rsync rewrite files without changing them
+            fingerprint = content_fingerprint(target)
+            with self._lock:
+                unchanged = fingerprint is not None and self._fingerprints.get(os.path.abspath(target)) == fingerprint
+            if unchanged:
+                self.log.debug(f"Content unchanged, keeping loaded version: {target}")
+                continue
+            changed.append(target)
+        if not deleted and not changed:
+            return
+
+        with self._reload_lock, self._traced("reload", "reload", str(changes[0][0])):
+            with self._lock:
+                for target in deleted:
+                    self._fingerprints.pop(os.path.abspath(target), None)
+                    to_remove = self._names_at(target)
+                    self.log.debug(f"Plugins to remove: {to_remove}")
+                    for k in to_remove:
+                        self._remove_record(k)
+                        self.log.debug(f"Plugin unloaded due to deletion: {k} from {target}")
+                # plugins importing a deleted helper get a chance to fail loudly or adapt
+                dependents, helpers = self._deps.dependents(*(os.path.abspath(t) for t in deleted + changed))
+            if not changed and not dependents and not helpers:
+                return
+            self._purge_helpers(helpers)
+            batches = []
+            for target in changed:
                 try:
-                    rec.plugin.on_unload(self)
+                    batches.append(self._prepare(target))
                 except Exception as e:
-                    self.log.exception(f"Error on_unload({k}): {e}")
-                self.log.debug(f"Plugin unloaded due to deletion: {k} from {target}")
+                    self.log.exception(f"Hot reload failed for {target}: {e}")
+            batches.extend(self._prepare_dependents(dependents))
+            count, stall = self._swap(batches)
+        self._record_reload([t for t, _ in changes], len(batches), count, len(helpers), started, stall, since)
+
+    # --- Module lifecycle ---
+    def _release(self, name: str, rec: PluginRecord) -> None:
+        """Drops plugflow's references to a removed record.
+
+        Its module is purged from sys.modules once no loaded plugin came from it.
+        """
+        self._track_unloaded("plugin", name, str(rec.path), rec.plugin)
+        module = rec.module
+        rec.module = None
+        entry = self._module_users.get(id(module))
+        if entry is None or entry[0] is not module:
+            return
+        entry[1].discard(name)
+        if entry[1]:
+            return
+        del self._module_users[id(module)]
+        if os.path.abspath(rec.path) not in self._by_path:
+            self._deps.remove_target(os.path.abspath(rec.path))
+        if purge_module(module):
+            self._track_unloaded("module", module.__name__, str(rec.path), module)
+            self.log.debug(f"Module purged: {module.__name__} ({rec.path})")
+
+    def _track_unloaded(self, kind: str, name: str, detail: str, obj: Any) -> None:
+        try:
+            ref = weakref.ref(obj)
+        except TypeError:
+            return
+        if len(self._unloaded) >= 1024:
+            self._unloaded = [u for u in self._unloaded if u[3]() is not None]
+        self._unloaded.append((kind, name, detail, ref))
+
+    def find_leaks(self, collect: bool = True) -> List[Dict[str, Any]]:
+        """Modules and plugin instances still alive after they were unloaded.
+
+        Runs a full garbage collection first unless collect is False. Anything
+        reported is kept alive by a reference outside plugflow.
+        """
+        if collect:
+            gc.collect()
+        with self._lock:
+            self._unloaded = [u for u in self._unloaded if u[3]() is not None]
+            alive = list(self._unloaded)
+        out = []
+        for kind, name, detail, ref in alive:
+            obj = ref()
+            if obj is None:
+                continue
+            out.append({"kind": kind, "name": name, "path": detail, "type": type(obj).__name__})
+        return out
 
     # --- Introspection ---
+    def load_report(self) -> List[Dict[str, Any]]:
+        """Per-plugin load timings (read, compile, exec, instantiate, on_load), slowest first.
+
+        Wall/CPU times are seconds. Memory is reported only for plugins loaded
+        while tracemalloc was tracing.
+        """
+        with self._lock:
+            return build_report({k: v for k, v in self._load_profiles.items() if k in self._records})
+
+    def dump_load_report(self, target: Union[str, Path, IO[str]]) -> None:
+        """Write load_report() as JSON to a path or text stream."""
+        report = self.load_report()
+        if isinstance(target, (str, Path)):
+            with open(target, "w", encoding="utf-8") as fh:
+                json.dump(report, fh, indent=2)
+        else:
+            json.dump(report, target, indent=2)
+
     def list_plugins(self) -> List[str]:
         with self._lock:
             return sorted(self._records.keys())
 
+    def plugins_from(self, path: Union[str, Path]) -> List[str]:
+        """Names of the plugins loaded from a file, package directory or bundle."""
+        with self._lock:
+            return self._names_at(Path(path))
+
     def get(self, name: str) -> Optional[BasePlugin]:
         with self._lock:
             rec = self._records.get(name)
-            return rec.plugin if rec else None
+            return self._materialize(name, rec) if rec else None
 
     def unload_plugin(self, name: str) -> bool:
         """Unload a plugin by name"""
         with self._lock:
-            rec = self._records.pop(name, None)
-            if rec:
-                try:
-                    rec.plugin.on_unload(self)
-                except Exception as e:
-                    self.log.exception(f"Error on_unload({name}): {e}")
+            if self._remove_record(name):
                 self.log.debug(f"Plugin unloaded: {name}")
                 return True
             return False
 
     def reload_plugin(self, name: str) -> bool:
-        """Reload a plugin by name (unload then reload from same path)"""
+        """Reload a plugin by name by re-importing only the file, package or bundle it came from.
+
+        Called from a plugin hook, which runs under the manager lock or, for
+        on_load and on_unload during a reload, under the reload lock, the reload
+        is handed to the reload worker instead: taking the reload lock there
+        would deadlock. It then returns True once queued.
+        """
         with self._lock:
             rec = self._records.get(name)
-            if rec:
-                old_path = rec.path
-                self.unload_plugin(name)
-                try:
-                    self.load_from_path(old_path)
-                    return name in self._records
-                except Exception as e:
-                    self.log.exception(f"Error reloading plugin {name}: {e}")
-                    return False
+        if rec is None:
             return False
+        if self._lock.held() or self._reload_lock.held():
+            self._reload_queue.put(Path(rec.path), "reload")
+            return True
+        try:
+            if rec.entry_point is not None:
+                self._reload_entry_point(rec.entry_point)
+            elif getattr(rec.module, "__name__", "").startswith(MODULE_PREFIX):
+                self._reload_target(rec.path)
+            else:
+                self.log.warning(f"Plugin {name} was not loaded from a path or entry point, cannot reload it")
+                return False
+            with self._lock:
+                return name in self._records
+        except Exception as e:
+            self.log.exception(f"Error reloading plugin {name}: {e}")
+            return False
+
+    # --- Call statistics ---
+    def stats(self, plugin: Optional[str] = None) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Per plugin and hook: calls, errors, total/mean/max latency, p50/p90/p99
+        and the latency histogram, in seconds. Empty unless collect_stats=True.
+
+        calls and errors count every call. Latency comes from the timed calls,
+        counted in timed (one dispatch in stats_sample_every); the histogram
+        holds those, and total is their mean times calls.
+        """
+        return self._call_stats.stats(plugin) if self._call_stats is not None else {}
+
+    def reset_stats(self) -> None:
+        if self._call_stats is not None:
+            self._call_stats.reset()
+        if self._memory is not None:
+            self._memory.reset_peaks()
+
+    # --- Memory accounting ---
+    def memory_snapshot(self) -> MemorySnapshot:
+        """Live allocations per plugin source (empty unless track_memory=True).
+
+        An allocation is charged to the innermost frame of a loaded plugin's
+        file, package or bundle in its traceback.
+        """
+        if self._memory is None:
+            return MemorySnapshot(time.time())
+        return self._memory.snapshot(list(self._records.items()))  # copy without the lock
+
+    def memory_stats(self, plugin: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """Per plugin: current bytes and blocks allocated by its code and still alive,
+        and the peak seen by any snapshot since reset_stats(). Plugins loaded from
+        the same source share its numbers (shared_with). Empty unless track_memory=True."""
+        if self._memory is None:
+            return {}
+        snap = self.memory_snapshot()
+        usage = snap.usage()
+        out = {}
+        for source, names in snap.plugins.items():
+            peak = self._memory.peak(source)
+            for name in names:
+                if plugin is None or name == plugin:
+                    out[name] = dict(usage[name], peak=peak)
+        return out
+
+    def memory_diff(self, before: MemorySnapshot, after: Optional[MemorySnapshot] = None,
+                    lines: int = 5) -> List[Dict[str, Any]]:
+        """How each plugin source's allocations changed between two snapshots
+        (after defaults to now), largest growth first, with the plugin lines
+        responsible."""
+        return compare(before, after if after is not None else self.memory_snapshot(), lines)
+
+    # --- Tracing ---
+    @property
+    def tracer(self) -> Optional[Tracer]:
+        profiler = self._profiler
+        return profiler.inner if profiler is not None else self._tracer
+
+    def set_tracer(self, tracer: Optional[Tracer]) -> None:
+        """Install a Tracer (None removes it); takes effect from the next dispatch or load."""
+        profiler = self._profiler
+        if profiler is not None:
+            profiler.inner = tracer
+        else:
+            self._tracer = tracer
+
+    def profile(self, plugin: str, duration: float) -> PluginProfile:
+        """Profiles the hook calls of one plugin with cProfile for duration seconds.
+
+        Blocks while other threads dispatch, then returns a PluginProfile with
+        pstats and collapsed stacks. Only calls to that plugin are profiled,
+        by name, so a hot-reloaded version keeps being profiled; the profiler
+        is removed when the window ends. While it runs every hook call takes
+        the traced path. Concurrent profile() calls run one after another.
+        """
+        with self._profile_lock:
+            with self._lock:
+                if plugin not in self._records:
+                    self.log.warning(f"Profiling {plugin}, which is not loaded (yet)")
+            profiler = self._profiler = HookProfiler(plugin, self._tracer)
+            self._tracer = profiler
+            try:
+                time.sleep(duration)
+            finally:
+                self._tracer = profiler.inner
+                self._profiler = None
+            result = profiler.close()
+        self.log.debug(f"Profiled {result.calls} call(s) of {plugin} in {duration:.1f} s"
+                       f" ({result.missed} concurrent call(s) missed)")
+        return result
+
+    @contextmanager
+    def _traced(self, kind: str, name: str, detail: str) -> Iterator[None]:
+        # one span around a load or reload; module load phases inside it reach
+        # the same tracer through current_tracer
+        tracer = self._tracer
+        token = current_tracer.set(tracer)
+        span = None
+        if tracer is not None:
+            span = Span(kind, name, "", detail, time.perf_counter())
+            tracer.start(span)
+        try:
+            yield
+        except BaseException as e:
+            if span is not None:
+                span.error = e
+            raise
+        finally:
+            current_tracer.reset(token)
+            if span is not None:
+                span.duration = time.perf_counter() - span.start
+                tracer.end(span)
+
+    def _observe(self, samples: Optional[Dict[str, List[int]]], calls: Optional[Dict[str, int]],
+                 tracer: Optional[Tracer], name: str, hook: str, detail: str, fn: Callable[..., Any],
+                 args: tuple, kwargs: Optional[Dict[str, Any]] = None) -> Any:
+        """Calls one plugin hook with a span around it, also recording its stats sample.
+
+        The dispatch loops only come here while a tracer is installed, so without
+        one they make no extra call per plugin.
+        """
+        span = None
+        if tracer is not None:
+            span = Span("hook", hook, name, detail, time.perf_counter())
+            tracer.start(span)
+        if samples is None and calls is not None:
+            calls[name] += 1
+        started = time.perf_counter_ns()
+        try:
+            return fn(*args, **kwargs) if kwargs else fn(*args)
+        except BaseException as e:
+            if span is not None:
+                span.error = e
+            raise
+        finally:
+            elapsed = time.perf_counter_ns() - started
+            if samples is not None:
+                samples[name].append(elapsed)
+            if span is not None:
+                span.duration = elapsed / 1e9
+                tracer.end(span)
 
     # --- Dispatching ---
+    @staticmethod
+    def _overrides(rec: PluginRecord, method: str) -> bool:
+        # a lazy plugin keeping BasePlugin's no-op method needs no instance for it
+        if rec.plugin is not None:
+            return True
+        return getattr(rec.factory, method, None) is not getattr(BasePlugin, method, None)
+
+    def _by_priority(self) -> List[Tuple[str, PluginRecord]]:
+        return sorted(self._records.items(), reverse=True,
+                      key=lambda kv: getattr(kv[1].plugin if kv[1].plugin is not None else kv[1].factory,
+                                             'priority', 100))
+
     def dispatch_event(self, event: str, data: Any = None) -> List[Any]:
         results: List[Any] = []
+        stats = self._call_stats
+        samples, calls = stats.samples("on_event") if stats is not None else (None, None)
+        tracer = self._tracer
         with self._lock:
-            plugins = sorted(self._records.values(), key=lambda r: getattr(r.plugin, 'priority', 100), reverse=True)
-            for rec in plugins:
+            for name, rec in self._by_priority():
                 plg = rec.plugin
+                if plg is None:
+                    # lazy plugins are only built for hooks they override
+                    if not self._overrides(rec, "handles") and not self._overrides(rec, "on_event"):
+                        results.append(None)
+                        continue
+                    plg = self._materialize(name, rec)
+                    if plg is None:
+                        continue
                 if hasattr(plg, "handles") and not plg.handles(event):
                     continue
                 if hasattr(plg, "on_event") and callable(plg.on_event):
                     try:
-                        results.append(plg.on_event(event, data, self))
+                        if tracer is not None:
+                            results.append(self._observe(samples, calls, tracer, name, "on_event", event,
+                                                         plg.on_event, (event, data, self)))
+                        elif calls is None:
+                            results.append(plg.on_event(event, data, self))
+                        elif samples is None:
+                            calls[name] += 1
+                            results.append(plg.on_event(event, data, self))
+                        else:
+                            started = time.perf_counter_ns()
+                            try:
+                                results.append(plg.on_event(event, data, self))
+                            finally:
+                                samples[name].append(time.perf_counter_ns() - started)
                     except Exception as e:
+                        if stats is not None:
+                            stats.error(name, "on_event")
                         self.log.exception(f"Plugin {plg.plugin_name} on_event error: {e}")
         return results
 
     def broadcast(self, method: str, *args, **kwargs) -> List[Any]:
         results: List[Any] = []
+        stats = self._call_stats
+        samples, calls = stats.samples(method) if stats is not None else (None, None)
+        tracer = self._tracer
         with self._lock:
-            for rec in self._records.values():
+            for name, rec in list(self._records.items()):
                 plg = rec.plugin
-                if hasattr(plg, method):
+                if plg is None:
+                    if not hasattr(rec.factory, method):
+                        continue
+                    plg = self._materialize(name, rec)
+                if plg is not None and hasattr(plg, method):
                     fn = getattr(plg, method)
                     if callable(fn):
                         try:
-                            results.append(fn(*args, **kwargs))
+                            if tracer is not None:
+                                results.append(self._observe(samples, calls, tracer, name, method, method,
+                                                             fn, args, kwargs))
+                            elif calls is None:
+                                results.append(fn(*args, **kwargs))
+                            elif samples is None:
+                                calls[name] += 1
+                                results.append(fn(*args, **kwargs))
+                            else:
+                                started = time.perf_counter_ns()
+                                try:
+                                    results.append(fn(*args, **kwargs))
+                                finally:
+                                    samples[name].append(time.perf_counter_ns() - started)
                         except Exception as e:
+                            if stats is not None:
+                                stats.error(name, method)
                             self.log.exception(f"Plugin {plg.plugin_name} {method} error: {e}")
         return results
 
@@ -201,18 +986,40 @@ class PluginManager:
     def handle_message(self, text: str) -> List[str]:
         responses: List[str] = []
         current = text
+        stats = self._call_stats
+        tracer = self._tracer
 
         # 1) Filters
+        samples, calls = stats.samples("filter_message") if stats is not None else (None, None)
         with self._lock:
-            plugins = sorted(self._records.values(), key=lambda r: getattr(r.plugin, 'priority', 100), reverse=True)
-            for rec in plugins:
+            plugins = self._by_priority()
+            for name, rec in plugins:
                 plg = rec.plugin
-                if hasattr(plg, "filter_message") and callable(plg.filter_message):
+                if plg is None:
+                    if not self._overrides(rec, "filter_message"):
+                        continue
+                    plg = self._materialize(name, rec)
+                if plg is not None and hasattr(plg, "filter_message") and callable(plg.filter_message):
                     try:
-                        new_text = plg.filter_message(current)
+                        if tracer is not None:
+                            new_text = self._observe(samples, calls, tracer, name, "filter_message", "",
+                                                     plg.filter_message, (current,))
+                        elif calls is None:
+                            new_text = plg.filter_message(current)
+                        elif samples is None:
+                            calls[name] += 1
+                            new_text = plg.filter_message(current)
+                        else:
+                            started = time.perf_counter_ns()
+                            try:
+                                new_text = plg.filter_message(current)
+                            finally:
+                                samples[name].append(time.perf_counter_ns() - started)
                         if isinstance(new_text, str):
                             current = new_text
                     except Exception as e:
+                        if stats is not None:
+                            stats.error(name, "filter_message")
                         self.log.exception(f"Plugin {plg.plugin_name} filter_message error: {e}")
 
         # 2) Commands / text
@@ -224,26 +1031,64 @@ class PluginManager:
             cmd = parts[0].lstrip("/")
             args = parts[1] if len(parts) > 1 else ""
 
+        hook = "handle_command" if cmd else "on_message"
+        samples, calls = stats.samples(hook) if stats is not None else (None, None)
         with self._lock:
-            for rec in plugins:
+            for name, rec in plugins:
                 plg = rec.plugin
+                if plg is None:
+                    if not self._overrides(rec, hook):
+                        continue
+                    plg = self._materialize(name, rec)
+                    if plg is None:
+                        continue
                 if cmd and hasattr(plg, "handle_command") and callable(plg.handle_command):
                     try:
-                        res = plg.handle_command(cmd, args)
+                        if tracer is not None:
+                            res = self._observe(samples, calls, tracer, name, hook, cmd, plg.handle_command,
+                                                (cmd, args))
+                        elif calls is None:
+                            res = plg.handle_command(cmd, args)
+                        elif samples is None:
+                            calls[name] += 1
+                            res = plg.handle_command(cmd, args)
+                        else:
+                            started = time.perf_counter_ns()
+                            try:
+                                res = plg.handle_command(cmd, args)
+                            finally:
+                                samples[name].append(time.perf_counter_ns() - started)
                         if res is not None:
                             responses.append(str(res))
                     except Exception as e:
+                        if stats is not None:
+                            stats.error(name, hook)
                         self.log.exception(f"Plugin {plg.plugin_name} handle_command error: {e}")
                 elif not cmd and hasattr(plg, "on_message") and callable(getattr(plg, "on_message")):
                     # arbitrary text processing
                     try:
-                        res = plg.on_message(current, self)  # type: ignore[attr-defined]
+                        if tracer is not None:
+                            res = self._observe(samples, calls, tracer, name, hook, "",
+                                                plg.on_message, (current, self))  # type: ignore[attr-defined]
+                        elif calls is None:
+                            res = plg.on_message(current, self)  # type: ignore[attr-defined]
+                        elif samples is None:
+                            calls[name] += 1
+                            res = plg.on_message(current, self)  # type: ignore[attr-defined]
+                        else:
+                            started = time.perf_counter_ns()
+                            try:
+                                res = plg.on_message(current, self)  # type: ignore[attr-defined]
+                            finally:
+                                samples[name].append(time.perf_counter_ns() - started)
                         if res is not None:
                             if isinstance(res, list):
                                 responses.extend(map(str, res))
                             else:
                                 responses.append(str(res))
                     except Exception as e:
+                        if stats is not None:
+                            stats.error(name, hook)
                         self.log.exception(f"Plugin {plg.plugin_name} on_message error: {e}")
 
         return responses
@@ -0,0 +1,155 @@
+from __future__ import annotations
+import os
+import threading
+import time
+import tracemalloc
+from itertools import groupby
+from operator import itemgetter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Frames tracemalloc keeps per allocation when plugflow starts it. An allocation
+# is charged to the innermost plugin frame, so allocations made by libraries on
+# a plugin's behalf count as long as the plugin frame is within this depth.
+MEMORY_FRAMES = 16
+
+class MemorySnapshot:
+    """Allocations still alive at one point, per plugin source (the abspath of
+    the file, package directory or bundle plugins were loaded from).
+
+    Only the totals and the allocating plugin lines are kept, not the
+    tracemalloc snapshot itself.
+    """
+    __slots__ = ("taken", "plugins", "sizes", "lines")
+    def __init__(self, taken: float) -> None:
+        self.taken = taken
+        # source -> names of the plugins loaded from it
+        self.plugins: Dict[str, List[str]] = {}
+        # source -> (bytes, blocks)
+        self.sizes: Dict[str, Tuple[int, int]] = {}
+        # source -> "file:line" of the innermost plugin frame -> (bytes, blocks)
+        self.lines: Dict[str, Dict[str, Tuple[int, int]]] = {}
+
+    def usage(self) -> Dict[str, Dict[str, Any]]:
+        """{plugin: {"current", "blocks", "shared_with"}}; plugins loaded from the
+        same file, package or bundle share its numbers."""
+        out = {}
+        for source, names in self.plugins.items():
+            size, blocks = self.sizes.get(source, (0, 0))
+            for name in names:
+                out[name] = {"current": size, "blocks": blocks,
+                             "shared_with": [n for n in names if n != name]}
+        return out
+
+def _sources_of(records: Iterable[Tuple[str, Any]]) -> Tuple[Dict[str, str], List[Tuple[str, str]], Dict[str, List[str]]]:
+    # exact files and directory/bundle prefixes identifying each source
+    files: Dict[str, str] = {}
+    prefixes: List[Tuple[str, str]] = []
+    plugins: Dict[str, List[str]] = {}
+    for name, rec in records:
+        source = os.path.abspath(rec.path)
+        plugins.setdefault(source, []).append(name)
+        for where in {source, os.path.abspath(getattr(rec.module, "__file__", None) or source)}:
+            if os.path.basename(where) == "__init__.py":
+                where = os.path.dirname(where)
+            if os.path.isdir(where) or os.path.isfile(where) and not where.endswith(".py"):
+                prefixes.append((where + os.sep, source))  # package directory or bundle
+            else:
+                files[where] = source
+    prefixes.sort(key=lambda p: len(p[0]), reverse=True)
+    for names in plugins.values():
+        names.sort()
+    return files, prefixes, plugins
+
+def _raw_traces(snapshot: tracemalloc.Snapshot) -> List[Tuple[Any, int, Tuple[Tuple[str, int], ...]]]:
+    # (domain, size, ((filename, lineno), ...) innermost frame first) per trace;
+    # reading tracemalloc's own tuples avoids building a Trace object for each
+    raw = getattr(snapshot.traces, "_traces", None)
+    if raw is not None:
+        return list(raw)
+    return [(trace.domain, trace.size, tuple((f.filename, f.lineno) for f in reversed(trace.traceback)))
+            for trace in snapshot.traces]
+
+class MemoryAccounting:
+    """Charges live allocations traced by tracemalloc to the plugins whose code made them."""
+    def __init__(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(MEMORY_FRAMES)
+        self._lock = threading.Lock()
+        # source -> highest current size seen by any snapshot
+        self._peaks: Dict[str, int] = {}
+
+    def snapshot(self, records: Iterable[Tuple[str, Any]]) -> MemorySnapshot:
+        files, prefixes, plugins = _sources_of(records)
+        owners: Dict[str, Optional[str]] = {}
+
+        def owner(filename: str) -> Optional[str]:
+            try:
+                return owners[filename]
+            except KeyError:
+                pass
+            path = os.path.abspath(filename)
+            found = files.get(path)
+            if found is None:
+                found = next((source for prefix, source in prefixes if path.startswith(prefix)), None)
+            owners[filename] = found
+            return found
+
+        snap = MemorySnapshot(time.time())
+        snap.plugins = plugins
+        if not tracemalloc.is_tracing():
+            return snap
+        # attribute each distinct allocation site once. Sorting and grouping run
+        # in C: every object allocated per trace in Python would itself be traced
+        traces = _raw_traces(tracemalloc.take_snapshot())
+        traces.sort(key=itemgetter(2))
+        for frames, group in groupby(traces, key=itemgetter(2)):
+            members = list(group)
+            size = sum(map(itemgetter(1), members))
+            blocks = len(members)
+            for filename, lineno in frames:  # innermost frame first
+                source = owner(filename)
+                if source is not None:
+                    total, count = snap.sizes.get(source, (0, 0))
+                    snap.sizes[source] = (total + size, count + blocks)
+                    lines = snap.lines.setdefault(source, {})
+                    line = f"{filename}:{lineno}"
+                    total, count = lines.get(line, (0, 0))
+                    lines[line] = (total + size, count + blocks)
+                    break
+        with self._lock:
+            for source, (size, _) in snap.sizes.items():
+                if size > self._peaks.get(source, 0):
+                    self._peaks[source] = size
+        return snap
+
+    def peak(self, source: str) -> int:
+        with self._lock:
+            return self._peaks.get(source, 0)
+
+    def reset_peaks(self) -> None:
+        with self._lock:
+            self._peaks.clear()
+
+def compare(before: MemorySnapshot, after: MemorySnapshot, lines: int = 5) -> List[Dict[str, Any]]:
+    """Per plugin source, how allocations changed between two snapshots, largest growth first.
+
+    Each row has the plugins, size and size_diff (bytes), blocks and
+    blocks_diff, and the plugin lines whose allocations changed most.
+    """
+    rows = []
+    for source in set(before.sizes) | set(after.sizes) | set(after.plugins):
+        size, blocks = after.sizes.get(source, (0, 0))
+        old_size, old_blocks = before.sizes.get(source, (0, 0))
+        old_lines = before.lines.get(source, {})
+        new_lines = after.lines.get(source, {})
+        changed = []
+        for line in set(old_lines) | set(new_lines):
+            delta = new_lines.get(line, (0, 0))[0] - old_lines.get(line, (0, 0))[0]
+            if delta:
+                changed.append({"line": line, "size_diff": delta})
+        changed.sort(key=lambda c: abs(c["size_diff"]), reverse=True)
+        rows.append({"plugins": after.plugins.get(source) or before.plugins.get(source, []),
+                     "source": source, "size": size, "size_diff": size - old_size,
+                     "blocks": blocks, "blocks_diff": blocks - old_blocks, "top": changed[:lines]})
+    rows.sort(key=lambda r: r["size_diff"], reverse=True)
+    return rows
@@ -0,0 +1,245 @@
+from __future__ import annotations
+import random
+import threading
+import time
+import weakref
+from array import array
+from collections import Counter, defaultdict
+from typing import Any, DefaultDict, Dict, List, Optional, Tuple
+
+# Bucket i counts calls that took fewer than 2**i nanoseconds (bucket 0: 0 ns),
+# which covers every duration perf_counter_ns() can report
+BUCKETS = 64
+
+# Timed dispatches a thread runs before folding its raw samples into histograms
+FOLD_EVERY = 256
+
+# A thread times the first dispatch of each hook and then on average one in
+# SAMPLE_EVERY, at random so periodic traffic cannot alias with it. Calls and
+# errors are counted on every dispatch
+SAMPLE_EVERY = 16
+
+class HookStats:
+    """Call count, error count and latency histogram of one (plugin, hook) pair.
+
+    calls counts every call; timed, total_ns, max_ns and buckets cover the
+    timed ones.
+    """
+    __slots__ = ("calls", "timed", "errors", "total_ns", "max_ns", "buckets")
+    def __init__(self) -> None:
+        self.calls = 0
+        self.timed = 0
+        self.errors = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.buckets = array("Q", bytes(8 * BUCKETS))
+
+    def add(self, samples: List[int]) -> None:
+        """Counts a batch of timed calls, durations in nanoseconds."""
+        if not samples:
+            return
+        self.calls += len(samples)
+        self.timed += len(samples)
+        self.total_ns += sum(samples)
+        self.max_ns = max(self.max_ns, max(samples))
+        for bucket, n in Counter(map(int.bit_length, samples)).items():
+            self.buckets[bucket] += n
+
+    def merge(self, other: "HookStats") -> None:
+        self.calls += other.calls
+        self.timed += other.timed
+        self.errors += other.errors
+        self.total_ns += other.total_ns
+        self.max_ns = max(self.max_ns, other.max_ns)
+        for i, n in enumerate(other.buckets):
+            if n:
+                self.buckets[i] += n
+
+    def quantile(self, q: float) -> float:
+        """Upper bound in seconds of the bucket holding the q-quantile."""
+        if not self.timed:
+            return 0.0
+        rank = q * self.timed
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if n and seen >= rank:
+                return min(2 ** i, self.max_ns) / 1e9
+        return self.max_ns / 1e9
+
+    def as_dict(self) -> Dict[str, Any]:
+        mean = self.total_ns / self.timed / 1e9 if self.timed else 0.0
+        return {
+            "calls": self.calls,
+            "timed": self.timed,
+            "errors": self.errors,
+            # estimated from the timed calls, like the percentiles
+            "total": mean * self.calls,
+            "mean": mean,
+            "max": self.max_ns / 1e9,
+            "p50": self.quantile(0.5),
+            "p90": self.quantile(0.9),
+            "p99": self.quantile(0.99),
+            # (upper bound in seconds, timed calls) of every non-empty bucket
+            "histogram": [(2 ** i / 1e9, n) for i, n in enumerate(self.buckets) if n],
+        }
+
+class _HookSlot:
+    """One thread's dispatches of one hook."""
+    __slots__ = ("countdown", "counts", "durations")
+    def __init__(self) -> None:
+        # dispatches left until the next timed one
+        self.countdown = 0
+        # plugin -> calls made by untimed dispatches; only ever grows
+        self.counts: DefaultDict[str, int] = defaultdict(int)
+        # plugin -> durations in ns not yet folded into stats
+        self.durations: DefaultDict[str, List[int]] = defaultdict(list)
+
+class _ThreadTable:
+    """What one thread recorded; only that thread writes to it."""
+    __slots__ = ("thread", "generation", "dispatches", "folds", "hooks", "stats")
+    def __init__(self, thread: threading.Thread, generation: int) -> None:
+        self.thread = weakref.ref(thread)
+        self.generation = generation
+        self.dispatches = 0
+        # odd while fold() moves durations into stats, see snapshot()
+        self.folds = 0
+        self.hooks: Dict[str, _HookSlot] = {}
+        self.stats: Dict[Tuple[str, str], HookStats] = {}
+
+    def entry(self, plugin: str, hook: str) -> HookStats:
+        entry = self.stats.get((plugin, hook))
+        if entry is None:
+            entry = self.stats[(plugin, hook)] = HookStats()
+        return entry
+
+    def fold(self) -> None:
+        self.folds += 1
+        for hook, slot in self.hooks.items():
+            for plugin, durations in slot.durations.items():
+                self.entry(plugin, hook).add(durations)
+            slot.durations = defaultdict(list)
+        self.folds += 1
+        self.dispatches = 0
+
+    def snapshot(self, plugin: Optional[str]) -> Dict[Tuple[str, str], HookStats]:
+        # a read overlapping fold() would count a batch of durations twice or
+        # not at all, and exported counters must never go down: read again
+        while True:
+            folds = self.folds
+            if not folds % 2:
+                out = self.read(plugin)
+                if self.folds == folds:
+                    return out
+            time.sleep(0)
+
+    def read(self, plugin: Optional[str]) -> Dict[Tuple[str, str], HookStats]:
+        out: Dict[Tuple[str, str], HookStats] = {}
+        # list() copies containers the owning thread may be appending to
+        for key, entry in list(self.stats.items()):
+            if plugin is None or key[0] == plugin:
+                out.setdefault(key, HookStats()).merge(entry)
+        for hook, slot in list(self.hooks.items()):
+            for name, durations in list(slot.durations.items()):
+                if plugin is None or name == plugin:
+                    out.setdefault((name, hook), HookStats()).add(list(durations))
+            for name, n in list(slot.counts.items()):
+                if plugin is None or name == plugin:
+                    out.setdefault((name, hook), HookStats()).calls += n
+        return out
+
+class CallStats:
+    """Per-(plugin, hook) call statistics, recorded without locking.
+
+    A dispatch loop asks samples(hook) once. On a timed dispatch it appends
+    each plugin call's duration in nanoseconds to durations[plugin], otherwise
+    it adds 1 to counts[plugin]. Every thread records into its own table and
+    folds its raw durations into array-backed histograms every FOLD_EVERY
+    timed dispatches; stats() merges all tables. sample_every=1 times every
+    call.
+    """
+    def __init__(self, sample_every: int = SAMPLE_EVERY) -> None:
+        if sample_every < 1:
+            raise ValueError(f"sample_every must be at least 1, got {sample_every}")
+        self.sample_every = sample_every
+        # private, so collecting stats leaves the application's random.seed() sequence alone
+        self._random = random.Random()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._tables: List[_ThreadTable] = []
+        self._retired: Dict[Tuple[str, str], HookStats] = {}
+        self._generation = 0
+
+    def _table(self) -> _ThreadTable:
+        try:
+            table = self._local.table
+        except AttributeError:
+            table = self._local.table = _ThreadTable(threading.current_thread(), self._generation)
+            with self._lock:
+                self._tables.append(table)
+        if table.generation != self._generation:
+            # reset() ran: drop what was recorded before it
+            table.hooks = {}
+            table.stats = {}
+            table.dispatches = 0
+            table.generation = self._generation
+        return table
+
+    def samples(self, hook: str) -> Tuple[Optional[DefaultDict[str, List[int]]], DefaultDict[str, int]]:
+        """(durations, counts) of this thread for one dispatch of hook, by plugin
+        name; durations is None unless the dispatch is timed."""
+        # runs once per dispatch, so the common path avoids calling _table()
+        table = getattr(self._local, "table", None)
+        if table is None or table.generation != self._generation:
+            table = self._table()
+        slot = table.hooks.get(hook)
+        if slot is None:
+            slot = table.hooks[hook] = _HookSlot()
+        if slot.countdown:
+            slot.countdown -= 1
+            return None, slot.counts
+        slot.countdown = int(self._random.random() * (2 * self.sample_every - 1))
+        # only timed dispatches leave raw samples to fold
+        table.dispatches += 1
+        if table.dispatches >= FOLD_EVERY:
+            table.fold()
+        return slot.durations, slot.counts
+
+    def error(self, plugin: str, hook: str) -> None:
+        self._table().entry(plugin, hook).errors += 1
+
+    def merged(self, plugin: Optional[str] = None) -> Dict[Tuple[str, str], HookStats]:
+        out: Dict[Tuple[str, str], HookStats] = {}
+        with self._lock:
+            live = []
+            for table in self._tables:
+                thread = table.thread()
+                alive = thread is not None and thread.is_alive()
+                if alive:
+                    live.append(table)
+                if table.generation != self._generation:
+                    continue  # recorded before reset()
+                if alive:
+                    for key, entry in table.snapshot(plugin).items():
+                        out.setdefault(key, HookStats()).merge(entry)
+                else:
+                    # finished thread: fold its table into one that outlives it
+                    for key, entry in table.read(None).items():
+                        self._retired.setdefault(key, HookStats()).merge(entry)
+            self._tables = live
+            for key, entry in self._retired.items():
+                if plugin is None or key[0] == plugin:
+                    out.setdefault(key, HookStats()).merge(entry)
+        return out
+
+    def stats(self, plugin: Optional[str] = None) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """{plugin: {hook: HookStats.as_dict()}}, optionally for one plugin."""
+        out: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for (name, hook), entry in sorted(self.merged(plugin).items()):
+            out.setdefault(name, {})[hook] = entry.as_dict()
+        return out
+
+    def reset(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._retired.clear()
@@ -0,0 +1,269 @@
+from __future__ import annotations
+import cProfile
+import io
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .tracing import Span, Tracer, current_tracer
+
+# Load phases in the order they happen
+PHASES = ("read", "compile", "exec", "instantiate", "on_load")
+
+class PhaseTiming:
+    __slots__ = ("wall", "cpu", "memory")
+    def __init__(self, wall: float = 0.0, cpu: float = 0.0, memory: Optional[int] = None) -> None:
+        self.wall = wall
+        self.cpu = cpu
+        self.memory = memory
+
+    def as_dict(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {"wall": self.wall, "cpu": self.cpu}
+        if self.memory is not None:
+            out["memory"] = self.memory
+        return out
+
+class _Phase:
+    __slots__ = ("_timings", "_name", "_wall", "_cpu", "_mem", "_tracer", "_span")
+    def __init__(self, timings: Dict[str, PhaseTiming], name: str,
+                 tracer: Optional[Tracer] = None, span: Optional[Span] = None) -> None:
+        self._timings = timings
+        self._name = name
+        self._tracer = tracer
+        self._span = span
+
+    def __enter__(self) -> "_Phase":
+        self._mem = tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else None
+        self._cpu = time.thread_time()
+        self._wall = time.perf_counter()
+        if self._tracer is not None:
+            self._span.start = self._wall
+            self._tracer.start(self._span)
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        wall = time.perf_counter() - self._wall
+        cpu = time.thread_time() - self._cpu
+        memory = None
+        if self._mem is not None and tracemalloc.is_tracing():
+            memory = tracemalloc.get_traced_memory()[0] - self._mem
+        t = self._timings.setdefault(self._name, PhaseTiming())
+        t.wall += wall
+        t.cpu += cpu
+        if memory is not None:
+            t.memory = (t.memory or 0) + memory
+        if self._tracer is not None:
+            self._span.duration = wall
+            self._span.error = exc[1]
+            self._tracer.end(self._span)
+
+class LoadProfile:
+    """Timings of loading one plugin module, similar to `python -X importtime`.
+
+    Module phases (read, compile, exec, instantiate) are shared by every plugin
+    the module produced; on_load is recorded per plugin. Wall and CPU times are
+    in seconds; memory (bytes retained) is only recorded while tracemalloc traces.
+    Module phases are also reported to the tracer of the manager loading the
+    module (tracing.current_tracer when the profile is created).
+    """
+    __slots__ = ("path", "module", "phases", "plugin_phases", "tracer")
+    def __init__(self, path: Path, module: str = "") -> None:
+        self.path = path
+        self.module = module
+        self.phases: Dict[str, PhaseTiming] = {}
+        self.plugin_phases: Dict[str, Dict[str, PhaseTiming]] = {}
+        self.tracer = current_tracer.get()
+
+    def phase(self, name: str) -> _Phase:
+        tracer = self.tracer
+        if tracer is None:
+            return _Phase(self.phases, name)
+        return _Phase(self.phases, name, tracer, Span("phase", name, "", str(self.path)))
+
+    def plugin_phase(self, plugin: str, name: str, tracer: Optional[Tracer] = None) -> _Phase:
+        timings = self.plugin_phases.setdefault(plugin, {})
+        if tracer is None:
+            return _Phase(timings, name)
+        return _Phase(timings, name, tracer, Span("phase", name, plugin, str(self.path)))
+
+    def report(self, plugin: str) -> Dict[str, Any]:
+        phases = dict(self.phases)
+        phases.update(self.plugin_phases.get(plugin, {}))
+        ordered = {k: phases[k].as_dict() for k in PHASES if k in phases}
+        return {
+            "plugin": plugin,
+            "path": str(self.path),
+            "module": self.module,
+            "wall": sum(t.wall for t in phases.values()),
+            "cpu": sum(t.cpu for t in phases.values()),
+            "phases": ordered,
+        }
+
+def build_report(profiles: Dict[str, LoadProfile]) -> List[Dict[str, Any]]:
+    """One row per plugin, slowest first."""
+    rows = [prof.report(name) for name, prof in profiles.items()]
+    rows.sort(key=lambda r: r["wall"], reverse=True)
+    return rows
+
+class _OwnThreadProfile(cProfile.Profile):
+    # Python 3.12+ runs cProfile on sys.monitoring, which reports the events of
+    # every thread; enable() registers these methods, so only the events of the
+    # profiled call's thread get through (older versions never call them)
+    owner: Optional[int] = None
+
+    def _pystart_callback(self, *args: Any) -> Any:
+        if threading.get_ident() == self.owner:
+            return super()._pystart_callback(*args)  # type: ignore[misc]
+        return None
+
+    def _pyreturn_callback(self, *args: Any) -> Any:
+        if threading.get_ident() == self.owner:
+            return super()._pyreturn_callback(*args)  # type: ignore[misc]
+        return None
+
+    def _ccall_callback(self, *args: Any) -> Any:
+        if threading.get_ident() == self.owner:
+            return super()._ccall_callback(*args)  # type: ignore[misc]
+        return None
+
+    def _creturn_callback(self, *args: Any) -> Any:
+        if threading.get_ident() == self.owner:
+            return super()._creturn_callback(*args)  # type: ignore[misc]
+        return None
+
+class HookProfiler(Tracer):
+    """Tracer running cProfile around the hook calls of one plugin, by name.
+
+    Other spans go to inner. One call is profiled at a time (cProfile cannot
+    run on several threads at once everywhere); calls overlapping it on other
+    threads are counted as missed, and on Python 3.12+ whatever else other
+    threads run meanwhile is left out.
+    """
+    def __init__(self, plugin: str, inner: Optional[Tracer] = None) -> None:
+        self.plugin = plugin
+        self.inner = inner
+        self.calls = 0
+        self.missed = 0
+        self._profile = _OwnThreadProfile()
+        self._lock = threading.Lock()
+        self._span: Optional[Span] = None
+        self._closed = False
+
+    def start(self, span: Span) -> None:
+        inner = self.inner
+        if inner is not None:
+            inner.start(span)
+        if span.kind != "hook" or span.plugin != self.plugin or self._closed:
+            return
+        if not self._lock.acquire(blocking=False):
+            self.missed += 1  # racy count, good enough for a diagnostic
+            return
+        self._profile.owner = threading.get_ident()
+        try:
+            self._profile.enable()
+        except ValueError:  # another profiler is active (Python 3.12+)
+            self._lock.release()
+            self.missed += 1
+            return
+        self._span = span
+
+    def end(self, span: Span) -> None:
+        if span is self._span:
+            self._profile.disable()
+            self._span = None
+            self.calls += 1
+            self._lock.release()
+        inner = self.inner
+        if inner is not None:
+            inner.end(span)
+
+    def close(self, timeout: float = 5.0) -> "PluginProfile":
+        """Stops profiling, waiting up to timeout for a call in progress."""
+        acquired = self._lock.acquire(timeout=timeout)
+        self._closed = True
+        if acquired:
+            self._lock.release()
+        stats = pstats.Stats(self._profile) if self.calls else None
+        if stats is not None:
+            _drop_overhead(stats)
+        return PluginProfile(self.plugin, self.calls, self.missed, stats)
+
+def _drop_overhead(stats: pstats.Stats) -> None:
+    # the profile is enabled in HookProfiler.start, so what follows it in the
+    # manager (timer reads, HookProfiler.end and disable) shows up as roots
+    overhead = {"<built-in method time.perf_counter_ns>", "<built-in method time.perf_counter>",
+                "<method 'disable' of '_lsprof.Profiler' objects>"}
+    dropped: set = set()
+    while True:
+        found = [func for func, (_, _, _, _, callers) in stats.stats.items()
+                 if (callers and callers.keys() <= dropped)
+                 or (not callers and (func[2] in overhead or func[0] == __file__))]
+        if not found:
+            break
+        for func in found:
+            cc, nc, tt, _, _ = stats.stats.pop(func)
+            stats.total_tt -= tt
+            stats.total_calls -= nc
+            stats.prim_calls -= cc
+            dropped.add(func)
+
+class PluginProfile:
+    """Result of PluginManager.profile(): the profiled calls as pstats and collapsed stacks."""
+    __slots__ = ("plugin", "calls", "missed", "stats")
+    def __init__(self, plugin: str, calls: int, missed: int, stats: Optional[pstats.Stats]) -> None:
+        self.plugin = plugin
+        self.calls = calls
+        self.missed = missed
+        # None when no call was profiled
+        self.stats = stats
+
+    def report(self, sort: str = "cumulative", limit: int = 30) -> str:
+        """The pstats listing as text."""
+        if self.stats is None:
+            return f"No calls of {self.plugin} were profiled\n"
+        out = io.StringIO()
+        self.stats.stream = out
+        self.stats.sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+    def collapsed(self) -> str:
+        """Collapsed stacks ("root;caller;callee microseconds" per line) for flamegraph.pl
+        or speedscope. cProfile records caller/callee pairs only, so time below a
+        function called from several places is split by each caller's share."""
+        if self.stats is None:
+            return ""
+        entries = self.stats.stats
+        children: Dict[Any, List[Tuple[Any, float]]] = {}
+        for func, (_, _, _, _, callers) in entries.items():
+            for caller, edge in callers.items():
+                children.setdefault(caller, []).append((func, edge[3]))
+        totals: Dict[str, float] = {}
+
+        def walk(func: Any, stack: List[str], on_stack: set, share: float) -> None:
+            _, _, tt, ct, _ = entries[func]
+            stack.append(_label(func))
+            key = ";".join(stack)
+            totals[key] = totals.get(key, 0.0) + tt * share
+            on_stack.add(func)
+            for child, edge_ct in children.get(func, ()):
+                child_ct = entries[child][3]
+                if child not in on_stack and child_ct:
+                    walk(child, stack, on_stack, share * edge_ct / child_ct)
+            on_stack.discard(func)
+            stack.pop()
+
+        for func, (_, _, _, _, callers) in entries.items():
+            if not callers:
+                walk(func, [], set(), 1.0)
+        lines = [f"{key} {round(t * 1e6)}" for key, t in sorted(totals.items()) if round(t * 1e6) > 0]
+        return "\n".join(lines) + ("\n" if lines else "")
+
+def _label(func: Tuple[str, int, str]) -> str:
+    file, line, name = func
+    if file == "~":
+        return name  # built-in
+    return f"{name} ({os.path.basename(file)}:{line})"
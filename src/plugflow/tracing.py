@@ -0,0 +1,70 @@
+from __future__ import annotations
+import threading
+from contextvars import ContextVar
+from typing import List, Optional
+
+class Span:
+    """One traced operation.
+
+    kind is "hook" (a plugin hook call such as on_event or handle_command),
+    "phase" (a load phase: read, compile, exec, instantiate, on_load), "load"
+    (loading a plugins path or entry-point group) or "reload" (one hot reload).
+    name is the hook, phase or operation; detail is the event name, command,
+    broadcast method or path involved. start is time.perf_counter(); duration
+    (seconds) and error are set before Tracer.end() is called.
+    """
+    __slots__ = ("kind", "name", "plugin", "detail", "start", "duration", "error")
+    def __init__(self, kind: str, name: str, plugin: str = "", detail: str = "",
+                 start: float = 0.0) -> None:
+        self.kind = kind
+        self.name = name
+        self.plugin = plugin
+        self.detail = detail
+        self.start = start
+        self.duration = 0.0
+        self.error: Optional[BaseException] = None
+
+    def __repr__(self) -> str:
+        return (f"Span({self.kind}:{self.name} plugin={self.plugin!r} detail={self.detail!r} "
+                f"duration={self.duration * 1000:.3f}ms error={self.error!r})")
+
+class Tracer:
+    """Receives spans from a PluginManager; every method is a no-op.
+
+    Subclass to bridge into a tracing system. start() and end() are called on
+    the thread doing the work and must not raise.
+    """
+    def start(self, span: Span) -> None:
+        pass
+
+    def end(self, span: Span) -> None:
+        pass
+
+class InMemoryTracer(Tracer):
+    """Keeps finished spans in a list, for tests and debugging."""
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.started = 0
+        self.spans: List[Span] = []
+
+    def start(self, span: Span) -> None:
+        with self._lock:
+            self.started += 1
+
+    def end(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def find(self, kind: Optional[str] = None, name: Optional[str] = None,
+             plugin: Optional[str] = None) -> List[Span]:
+        with self._lock:
+            return [s for s in self.spans if (kind is None or s.kind == kind)
+                    and (name is None or s.name == name) and (plugin is None or s.plugin == plugin)]
+
+    def clear(self) -> None:
+        with self._lock:
+            self.started = 0
+            self.spans.clear()
+
+# Tracer of the manager loading plugins in this context, picked up by LoadProfile
+current_tracer: ContextVar[Optional[Tracer]] = ContextVar("plugflow_tracer", default=None)
@@ -1,87 +1,930 @@
-
 from __future__ import annotations
+import asyncio
+import logging
+import os
+import select
+import stat
 import threading
 import time
 from pathlib import Path
-from typing import Callable, Dict, Optional
+from typing import Any, AsyncIterator, Callable, Dict, Generator, Iterable, Iterator, List, Optional, Set, Tuple, TypeVar
+
+from . import inotify
+from .loader import BUNDLE_SUFFIXES, DEFAULT_RULES, DiscoveryRules, _scan_entries
+
+log = logging.getLogger("plugflow")
+
+# Watch backends: "auto" picks inotify where available, polling elsewhere
+BACKENDS = ("auto", "inotify", "poll")
+
+_WATCH_MASK = (inotify.IN_CLOSE_WRITE | inotify.IN_ATTRIB | inotify.IN_CREATE | inotify.IN_DELETE
+               | inotify.IN_MOVED_FROM | inotify.IN_MOVED_TO | inotify.IN_DELETE_SELF
+               | inotify.IN_MOVE_SELF | inotify.IN_ONLYDIR | inotify.IN_DONT_FOLLOW
+               | inotify.IN_EXCL_UNLINK)
+_STRUCTURAL = inotify.IN_CREATE | inotify.IN_DELETE | inotify.IN_MOVED_FROM | inotify.IN_MOVED_TO
+
+# Change-detection stamp: (st_mtime_ns, st_size) for files and bundles; for a
+# package, a digest of its files' stamps and their total size
+Stamp = Tuple[int, int]
+
+# How long to let a burst of inotify events (an editor save, a checkout) settle
+_SETTLE = 0.01
+
+# A directory modified this recently may change again within its mtime
+# granularity without its mtime moving, so its listing is not cached yet
+_RACY_NS = 2_000_000_000
+
+# Targets changes() scans on the event loop before giving other tasks a turn
+_SLICE = 256
+
+_T = TypeVar("_T")
+
+def _finish(steps: Generator[None, None, _T]) -> _T:
+    # runs a sliced scan to completion
+    while True:
+        try:
+            next(steps)
+        except StopIteration as done:
+            return done.value
+
+async def _finish_async(steps: Generator[None, None, _T]) -> _T:
+    # runs a sliced scan, letting other tasks run between slices
+    while True:
+        try:
+            next(steps)
+        except StopIteration as done:
+            return done.value
+        await asyncio.sleep(0)
+
+class _CachedEntry:
+    """DirEntry stand-in kept between polls; stat() always asks the filesystem."""
+    __slots__ = ("name", "path", "_is_dir", "_is_symlink")
+    def __init__(self, entry: os.DirEntry) -> None:
+        self.name = entry.name
+        self.path = entry.path
+        self._is_dir = entry.is_dir()
+        self._is_symlink = entry.is_symlink()
+
+    def is_dir(self, follow_symlinks: bool = True) -> bool:
+        return self._is_dir if follow_symlinks else self._is_dir and not self._is_symlink
+
+    def is_symlink(self) -> bool:
+        return self._is_symlink
+
+    def stat(self, follow_symlinks: bool = True) -> os.stat_result:
+        return os.stat(self.path, follow_symlinks=follow_symlinks)
 
 class DirectoryWatcher:
-    """Simple file polling for hot-reload without external dependencies.
+    """File watching for hot-reload without external dependencies.
 
     on_change: callback(path: Path) called on modification/creation of .py or __init__.py package.
     on_delete: callback(path: Path) called on plugin deletion.
+    backend: "inotify" reacts to kernel events within milliseconds and sleeps
+             while nothing changes; "poll" rescans every interval seconds;
+             "auto" uses inotify on Linux and polling elsewhere.
+    max_interval: when set, polling is adaptive: every poll that finds nothing
+             doubles the interval up to max_interval, and a change drops it back
+             to interval.
     """
     def __init__(self, root: Path, interval: float = 1.0, recursive: bool = True,
                  on_change: Optional[Callable[[Path], None]] = None,
-                 on_delete: Optional[Callable[[Path], None]] = None) -> None:
+                 on_delete: Optional[Callable[[Path], None]] = None,
+                 rules: Optional[DiscoveryRules] = None,
+                 backend: str = "auto",
+                 max_interval: Optional[float] = None) -> None:
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown watch backend {backend!r}, expected one of {BACKENDS}")
         self.root = root
         self.interval = interval
         self.recursive = recursive
+        self.rules = rules
         self.on_change = on_change
         self.on_delete = on_delete
+        self.backend = backend
+        self.max_interval = max_interval
+        self.current_interval = interval  # wait before the next poll
+        self.settle = _SETTLE
+        self.polls = 0
+        self.scan_cost = 0.0   # wall time of the last poll
+        self.scan_total = 0.0
         self._stop = threading.Event()
         self._thread: Optional[threading.Thread] = None
-        self._mtimes: Dict[Path, float] = {}
-
-    def _iter_targets(self):
-        if self.recursive:
-            for p in self.root.rglob("*.py"):
-                # For recursive mode, consider all .py files and packages
-                if p.name == "__init__.py":
-                    yield p.parent  # yield the package directory
-                else:
-                    yield p  # yield the .py file
+        # os path of each target -> its last stamp; str keys hash faster than Path
+        self._stamps: Dict[str, Stamp] = {}
+        # directory -> (st_mtime_ns, entries) of its last listing
+        self._listings: Dict[str, Tuple[int, List[_CachedEntry]]] = {}
+        self.relisted = 0  # directories listed by the last poll
+        # targets of the last full scan by os path; None until one ran
+        self._known: Optional[Dict[str, Path]] = None
+        # package -> (own stamp, file stamps, package stamp) of its last check
+        self._packages: Dict[str, Tuple[Stamp, Dict[str, Stamp], Stamp]] = {}
+        self._visited: Set[str] = set()
+        self._racy = False
+        self._inotify: Optional[inotify.Inotify] = None
+        self._watches: Dict[int, str] = {}   # wd -> directory
+        self._watched: Dict[str, int] = {}   # directory -> wd
+        self._wake: Optional[Tuple[int, int]] = None
+        self._owns_inotify = False  # False when a WatchService shares its descriptor
+        self._sink: Optional[Dict[Path, str]] = None  # batch collected by changes()
+
+    def _is_bundle(self) -> bool:
+        return self.root.suffix.lower() in BUNDLE_SUFFIXES
+
+    def _iter_targets(self) -> Iterator[Tuple[str, Path, os.stat_result]]:
+        if self._is_bundle():
+            # a bundle is a single target: one stat per tick, whatever it contains
+            try:
+                yield os.fspath(self.root), self.root, self.root.stat()
+            except OSError:
+                pass
+            return
+        if self._known is not None and not self._structure_changed():
+            # nothing was added, removed or renamed: only re-stat known targets
+            yield from self._restat_known()
+            return
+        # Same discovery rules as the loader, so pruned entries never trigger reloads
+        self._visited = set()
+        self._racy = False
+        known: Dict[str, Path] = {}
+        for t, st in _scan_entries(self.root, recursive=self.recursive, rules=self.rules, listdir=self._list):
+            path = os.fspath(t)
+            known[path] = t
+            yield path, t, st
+        # forget directories that are no longer part of the tree
+        self._listings = {d: v for d, v in self._listings.items() if d in self._visited}
+        self._known = known
+        self._packages = {p: v for p, v in self._packages.items() if p in known}
+
+    def _structure_changed(self) -> bool:
+        """Whether any listed directory changed since the last full scan."""
+        if self._racy:
+            return True
+        for dir_path, (mtime_ns, _) in self._listings.items():
+            try:
+                if os.stat(dir_path).st_mtime_ns != mtime_ns:
+                    return True
+            except OSError:
+                return True
+        return False
+
+    def _restat_known(self) -> Iterator[Tuple[str, Path, os.stat_result]]:
+        for path, target in list((self._known or {}).items()):
+            try:
+                yield path, target, os.stat(path)
+            except OSError:
+                continue  # reported as deleted
+
+    def _list(self, dir_path: str) -> List[_CachedEntry]:
+        """Entries of a directory, listed again only when its mtime changed."""
+        self._visited.add(dir_path)
+        try:
+            mtime_ns = os.stat(dir_path).st_mtime_ns
+        except OSError:
+            self._listings.pop(dir_path, None)
+            raise
+        cached = self._listings.get(dir_path)
+        if cached is not None and cached[0] == mtime_ns:
+            return cached[1]
+        with os.scandir(dir_path) as it:
+            entries = [_CachedEntry(e) for e in it]
+        self.relisted += 1
+        if time.time_ns() - mtime_ns > _RACY_NS:
+            self._listings[dir_path] = (mtime_ns, entries)
         else:
-            for p in self.root.glob("*.py"):
-                yield p
-            for p in self.root.iterdir():
-                if p.is_dir() and (p / "__init__.py").exists():
-                    yield p
+            self._listings.pop(dir_path, None)
+            self._racy = True
+        return entries
+
+    def _package_stamp(self, pkg: Path, st: os.stat_result) -> Stamp:
+        """Stamp covering a package directory and every .py file below it.
+
+        Listings come from the directory cache and the file stamps of the last
+        call are kept, so an unchanged package costs one stat per source file.
+        """
+        files: Dict[str, Stamp] = {}
+        stack = [os.fspath(pkg)]
+        while stack:
+            dir_path = stack.pop()
+            try:
+                entries = self._list(dir_path)
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.is_dir():
+                    if entry.name != "__pycache__" and not entry.is_symlink():
+                        stack.append(entry.path)
+                elif entry.name.endswith(".py"):
+                    try:
+                        fst = entry.stat()
+                    except OSError:
+                        continue
+                    files[entry.path] = (fst.st_mtime_ns, fst.st_size)
+        own = (st.st_mtime_ns, st.st_size)
+        key = os.fspath(pkg)
+        cached = self._packages.get(key)
+        if cached is not None and cached[0] == own and cached[1] == files:
+            return cached[2]
+        stamp = (hash((own, tuple(sorted(files.items())))), st.st_size + sum(s for _, s in files.values()))
+        self._packages[key] = (own, files, stamp)
+        return stamp
+
+    def _stamp(self, target: Path, st: os.stat_result) -> Stamp:
+        if stat.S_ISDIR(st.st_mode):
+            # package submodules are not separate targets: watch them through the
+            # package; its own mtime does not move when a file inside is edited
+            return self._package_stamp(target, st)
+        return st.st_mtime_ns, st.st_size
+
+    def prime(self) -> None:
+        """Initial scan: records the current state without reporting it."""
+        _finish(self._prime_steps())
+
+    def _prime_steps(self) -> Generator[None, None, None]:
+        for i, (path, target, st) in enumerate(self._iter_targets(), 1):
+            self._stamps[path] = self._stamp(target, st)
+            if i % _SLICE == 0:
+                yield
 
     def start(self):
         if self._thread and self._thread.is_alive():
             return
         self._stop.clear()
-        
-        # Initial scan to populate _mtimes
-        for target in self._iter_targets():
-            try:
-                mtime = target.stat().st_mtime
-                self._mtimes[target] = mtime
-            except FileNotFoundError:
-                continue
-                
-        self._thread = threading.Thread(target=self._run, daemon=True, name=f"DirectoryWatcher({self.root})")
+        run = self._run
+        if self.backend != "poll" and self._start_inotify():
+            run = self._run_inotify
+        # prime once the watches exist: a file changed in between shows up as an event
+        self.prime()
+        self._thread = threading.Thread(target=run, daemon=True, name=f"DirectoryWatcher({self.root})")
         self._thread.start()
 
     def stop(self):
         self._stop.set()
+        if self._wake is not None:
+            try:
+                os.write(self._wake[1], b"\0")
+            except OSError:
+                pass
         if self._thread:
             self._thread.join(timeout=2)
 
+    def _poll_once(self) -> bool:
+        """Rescans the tree and reports what changed; True if anything did."""
+        return _finish(self._poll_steps())
+
+    def _poll_steps(self) -> Generator[None, None, bool]:
+        # _poll_once() in slices of _SLICE targets; scan_cost leaves out the pauses
+        started = time.perf_counter()
+        cost = 0.0
+        self.relisted = 0
+        current = set()
+        stamps = self._stamps
+        changed = []
+        for i, (path, target, st) in enumerate(self._iter_targets(), 1):
+            stamp = self._stamp(target, st)
+            current.add(path)
+            if stamps.get(path) != stamp:
+                stamps[path] = stamp
+                changed.append(target)
+            if i % _SLICE == 0:
+                cost += time.perf_counter() - started
+                yield
+                started = time.perf_counter()
+
+        # removed files
+        removed = set(stamps.keys()) - current
+        for r in removed:
+            stamps.pop(r, None)
+        self.polls += 1
+        self.scan_cost = cost + time.perf_counter() - started
+        self.scan_total += self.scan_cost
+        self._adapt(bool(changed or removed))
+
+        for target in changed:
+            self._emit(target, "change")
+        for r in removed:
+            self._emit(Path(r), "delete")
+        return bool(changed or removed)
+
+    def _emit(self, target: Path, kind: str) -> None:
+        if self._sink is not None:
+            self._sink[target] = kind
+        callback = self.on_change if kind == "change" else self.on_delete
+        if callback:
+            callback(target)
+
+    def _adapt(self, changed: bool) -> None:
+        if self.max_interval is None or changed:
+            self.current_interval = self.interval
+        else:
+            # idle tree: back off exponentially
+            self.current_interval = min(max(self.current_interval, self.interval) * 2,
+                                        max(self.max_interval, self.interval))
+
+    def metrics(self) -> Dict[str, Any]:
+        """Backend, current polling interval (seconds), wall time of the last poll
+        and of all polls, and the number of polls so far."""
+        return {"root": os.fspath(self.root), "backend": self.backend,
+                "interval": self.current_interval, "scan_cost": self.scan_cost,
+                "scan_total": self.scan_total, "polls": self.polls}
+
     def _run(self):
         while not self._stop.is_set():
-            current = set()
-            for target in self._iter_targets():
+            self._poll_once()
+            self._stop.wait(self.current_interval)
+
+    async def changes(self, quiet: float = 0.0) -> AsyncIterator[List[Tuple[Path, str]]]:
+        """Yields batches of (target, "change" | "delete") on the running event loop.
+
+        No thread is started: inotify readiness is awaited through
+        loop.add_reader(), and the poll backend scans on the loop between
+        asyncio.sleep() calls, giving other tasks a turn every 256 plugin
+        targets it stats. Listing a changed directory is not split, and an
+        inotify queue overflow rescans the tree in one go. A batch is yielded once `quiet` seconds pass
+        without further events; each target appears once with its latest kind.
+        Callbacks passed to the constructor are still called.
+        """
+        loop = asyncio.get_running_loop()
+        sink: Dict[Path, str] = {}
+        self._sink = sink
+        try:
+            watching = self.backend != "poll" and self._start_inotify()
+            await _finish_async(self._prime_steps())
+            if watching:
+                assert self._inotify is not None
+                fd = self._inotify.fileno()
+                ready = asyncio.Event()
+
+                def readable() -> None:
+                    # level-triggered: stop listening until the queue is drained
+                    loop.remove_reader(fd)
+                    ready.set()
+
+                async def drain(timeout: Optional[float]) -> bool:
+                    loop.add_reader(fd, readable)
+                    try:
+                        await asyncio.wait_for(ready.wait(), timeout)
+                    except asyncio.TimeoutError:
+                        loop.remove_reader(fd)
+                        return False
+                    ready.clear()
+                    await asyncio.sleep(self.settle)
+                    assert self._inotify is not None
+                    self._handle_events(self._inotify.read())
+                    return True
+
+                try:
+                    while True:
+                        await drain(None)
+                        while sink and quiet > 0 and await drain(quiet):
+                            pass
+                        if sink:
+                            batch = list(sink.items())
+                            sink.clear()
+                            yield batch
+                except OSError as e:
+                    log.warning(f"inotify watch on {self.root} failed ({e}), polling instead")
+                    self.backend = "poll"
+                finally:
+                    loop.remove_reader(fd)
+                    self._close_inotify()
+            while True:
+                await _finish_async(self._poll_steps())
+                while sink and quiet > 0:
+                    await asyncio.sleep(quiet)
+                    if not await _finish_async(self._poll_steps()):
+                        break
+                if sink:
+                    batch = list(sink.items())
+                    sink.clear()
+                    yield batch
+                await asyncio.sleep(self.current_interval)
+        finally:
+            self._sink = None
+
+    # --- inotify backend ---
+    def _start_inotify(self) -> bool:
+        if not inotify.available():
+            if self.backend == "inotify":
+                log.warning(f"inotify is not available, polling {self.root} instead")
+            self.backend = "poll"
+            return False
+        try:
+            self._inotify = inotify.Inotify()
+            self._owns_inotify = True
+            self._sync_watches()
+        except OSError as e:
+            # typically ENOSPC: fs.inotify.max_user_watches is too low for this tree
+            log.warning(f"Cannot watch {self.root} with inotify ({e}), polling instead")
+            self._close_inotify()
+            self.backend = "poll"
+            return False
+        self._wake = os.pipe()
+        self.backend = "inotify"
+        return True
+
+    def _close_inotify(self) -> None:
+        if self._inotify is not None and self._owns_inotify:
+            self._inotify.close()
+        self._inotify = None
+        self._watches.clear()
+        self._watched.clear()
+        if self._wake is not None:
+            for fd in self._wake:
+                os.close(fd)
+            self._wake = None
+
+    def _watch_dirs(self) -> Iterator[str]:
+        """Directories whose entries can affect a target, pruned like discovery."""
+        if self._is_bundle():
+            # the archive is replaced through its directory
+            yield os.path.dirname(os.path.abspath(self.root))
+            return
+        rules = self.rules or DEFAULT_RULES
+        max_depth = rules.max_depth if self.recursive else 0
+        # (directory, root-relative prefix, depth, inside a package)
+        stack: List[Tuple[str, str, int, bool]] = [(os.fspath(self.root), "", 0, False)]
+        while stack:
+            dir_path, prefix, depth, in_pkg = stack.pop()
+            yield dir_path
+            try:
+                with os.scandir(dir_path) as it:
+                    entries = [e for e in it if e.is_dir(follow_symlinks=False)]
+            except OSError:
+                continue
+            for entry in entries:
+                rel = prefix + entry.name
+                if rules.excluded(entry.name, rel):
+                    continue
+                if in_pkg:
+                    stack.append((entry.path, rel + "/", depth + 1, True))
+                    continue
+                is_pkg = os.path.isfile(os.path.join(entry.path, "__init__.py"))
+                if is_pkg:
+                    # packages are watched as a whole, like _package_stamp
+                    stack.append((entry.path, rel + "/", depth + 1, True))
+                elif self.recursive and (max_depth is None or depth < max_depth):
+                    stack.append((entry.path, rel + "/", depth + 1, False))
+
+    def _sync_watches(self) -> None:
+        assert self._inotify is not None
+        for dir_path in self._watch_dirs():
+            if dir_path in self._watched:
+                continue
+            try:
+                wd = self._inotify.add_watch(dir_path, _WATCH_MASK)
+            except FileNotFoundError:
+                continue
+            except NotADirectoryError:
+                continue
+            moved = self._watches.get(wd)
+            if moved is not None:
+                # same inode under a new path: the directory was renamed
+                self._watched.pop(moved, None)
+            self._watches[wd] = dir_path
+            self._watched[dir_path] = wd
+
+    def _run_inotify(self):
+        assert self._inotify is not None and self._wake is not None
+        fd = self._inotify.fileno()
+        try:
+            while not self._stop.is_set():
+                select.select([fd, self._wake[0]], [], [])
+                if self._stop.is_set():
+                    break
+                self._stop.wait(self.settle)
+                self._handle_events(self._inotify.read())
+        except OSError as e:
+            log.warning(f"inotify watch on {self.root} failed ({e}), polling instead")
+            self._close_inotify()
+            self.backend = "poll"
+            self._run()
+            return
+        self._close_inotify()
+
+    def _handle_events(self, events: Iterable[inotify.Event]) -> None:
+        rescan = False
+        changed: Set[str] = set()
+        for wd, mask, _, name in events:
+            if mask & inotify.IN_Q_OVERFLOW:
+                rescan = True
+                continue
+            if mask & inotify.IN_IGNORED:
+                dir_path = self._watches.pop(wd, None)
+                if dir_path is not None:
+                    self._watched.pop(dir_path, None)
+                continue
+            dir_path = self._watches.get(wd)
+            if dir_path is None:
+                continue
+            if mask & (inotify.IN_DELETE_SELF | inotify.IN_MOVE_SELF):
+                if mask & inotify.IN_MOVE_SELF:
+                    # the watch follows the directory to a path we no longer know;
+                    # the rescan maps it again if it is still below the root
+                    self._watches.pop(wd, None)
+                    self._watched.pop(dir_path, None)
+                rescan = True
+                continue
+            if mask & inotify.IN_ISDIR:
+                if mask & _STRUCTURAL:
+                    rescan = True
+                continue
+            if name == "__init__.py" and mask & _STRUCTURAL:
+                # a directory became or stopped being a package
+                rescan = True
+                continue
+            if mask == inotify.IN_CREATE:
+                continue  # the content arrives with IN_CLOSE_WRITE
+            changed.add(os.path.join(dir_path, name))
+
+        if self._is_bundle():
+            root = os.path.abspath(self.root)
+            if rescan or any(os.path.abspath(p) == root for p in changed):
+                self._poll_once()
+            return
+        if rescan or (self.recursive and os.path.isfile(os.path.join(self.root, "__init__.py"))):
+            # structure changed (or the root is itself a package): resync everything.
+            # Watch new directories first, so files created in them after the
+            # rescan still raise events
+            if self._inotify is not None:
+                self._sync_watches()
+            self._poll_once()
+            return
+        for target in {t for t in map(self._target_for, changed) if t is not None}:
+            self._check_target(target)
+
+    def _target_for(self, path: str) -> Optional[Path]:
+        """The discovery candidate a changed file belongs to, if any."""
+        root = os.fspath(self.root)
+        parts = os.path.relpath(path, root).split(os.sep)
+        if parts[0] == os.pardir:
+            return None
+        rules = self.rules or DEFAULT_RULES
+        current = root
+        for i, part in enumerate(parts[:-1]):
+            current = os.path.join(current, part)
+            if os.path.isfile(os.path.join(current, "__init__.py")):
+                # submodules belong to the outermost package below the root
+                if rules.included(part, "/".join(parts[:i + 1])):
+                    return Path(current)
+                return None
+            if not self.recursive:
+                return None
+        name = parts[-1]
+        if not name.endswith(".py") or (self.recursive and name == "__init__.py"):
+            return None
+        if not self.recursive and len(parts) > 1:
+            return None
+        rel = "/".join(parts)
+        if rules.excluded(name, rel) or not rules.included(name, rel):
+            return None
+        return Path(path)
+
+    def _check_target(self, target: Path) -> None:
+        try:
+            st = os.stat(target)
+        except OSError:
+            if self._stamps.pop(os.fspath(target), None) is not None:
+                self._emit(target, "delete")
+            return
+        stamp = self._stamp(target, st)
+        if self._stamps.get(os.fspath(target)) != stamp:
+            self._stamps[os.fspath(target)] = stamp
+            self._emit(target, "change")
+
+class Subscription:
+    """A subscriber's interest in one root of a WatchService; close() ends it."""
+    __slots__ = ("service", "key", "on_change", "on_delete", "interval", "max_interval")
+    def __init__(self, service: "WatchService", key: Tuple, on_change: Optional[Callable[[Path], None]],
+                 on_delete: Optional[Callable[[Path], None]], interval: float,
+                 max_interval: Optional[float] = None) -> None:
+        self.service = service
+        self.key = key
+        self.on_change = on_change
+        self.on_delete = on_delete
+        self.interval = interval
+        self.max_interval = max_interval
+
+    @property
+    def backend(self) -> str:
+        watcher = self.service._watchers.get(self.key)
+        return watcher.backend if watcher is not None else "closed"
+
+    def metrics(self) -> Dict[str, Any]:
+        """DirectoryWatcher.metrics() of the watcher serving this subscription."""
+        with self.service._lock:
+            watcher = self.service._watchers.get(self.key)
+            return watcher.metrics() if watcher is not None else {"backend": "closed"}
+
+    def close(self) -> None:
+        self.service.unsubscribe(self)
+
+class WatchService:
+    """Watches every subscribed root on a single thread.
+
+    Subscriptions to the same root with the same options share one
+    DirectoryWatcher, so overlapping managers stat each file once per tick;
+    inotify watchers share one descriptor. Callbacks run on the service thread.
+    """
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._watchers: Dict[Tuple, DirectoryWatcher] = {}
+        self._subs: Dict[Tuple, List[Subscription]] = {}
+        self._due: Dict[Tuple, float] = {}   # next poll of polling watchers
+        self._inotify: Optional[inotify.Inotify] = None
+        self._thread: Optional[threading.Thread] = None
+        self._wake: Optional[Tuple[int, int]] = None   # self-pipe that interrupts select()
+        self._stop = threading.Event()
+
+    @staticmethod
+    def _key(root: Path, recursive: bool, rules: Optional[DiscoveryRules], backend: str) -> Tuple:
+        rules_key = (rules.include, rules.exclude, rules.max_depth) if rules is not None else None
+        return (os.path.abspath(root), recursive, rules_key, backend)
+
+    def subscribe(self, root: Path, on_change: Optional[Callable[[Path], None]] = None,
+                  on_delete: Optional[Callable[[Path], None]] = None, recursive: bool = True,
+                  rules: Optional[DiscoveryRules] = None, interval: float = 1.0,
+                  backend: str = "auto", max_interval: Optional[float] = None) -> Subscription:
+        key = self._key(root, recursive, rules, backend)
+        with self._lock:
+            sub = Subscription(self, key, on_change, on_delete, interval, max_interval)
+            watcher = self._watchers.get(key)
+            if watcher is None:
+                watcher = DirectoryWatcher(root, interval=interval, recursive=recursive,
+                                           on_change=lambda p, k=key: self._fan_out(k, p, "on_change"),
+                                           on_delete=lambda p, k=key: self._fan_out(k, p, "on_delete"),
+                                           rules=rules, backend=backend)
+                self._attach(watcher)
+                watcher.prime()
+                self._watchers[key] = watcher
+                self._subs[key] = []
+            self._subs[key].append(sub)
+            self._tune(watcher, self._subs[key])
+            if watcher.backend == "poll":
+                self._due[key] = min(self._due.get(key, float("inf")), time.monotonic() + watcher.interval)
+            self._ensure_thread()
+            self._wakeup()
+            return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            subs = self._subs.get(sub.key)
+            if not subs or sub not in subs:
+                return
+            subs.remove(sub)
+            if subs:
+                self._tune(self._watchers[sub.key], subs)
+                return
+            del self._subs[sub.key]
+            self._due.pop(sub.key, None)
+            watcher = self._watchers.pop(sub.key)
+            if watcher._inotify is not None:
+                # drop kernel watches no other root still uses
+                shared = {wd for w in self._watchers.values() for wd in w._watches}
+                for wd in set(watcher._watches) - shared:
+                    watcher._inotify.rm_watch(wd)
+                watcher._inotify = None
+            if self._watchers:
+                return
+            # last root gone: stop the thread outside the lock, its callbacks take it
+            thread, stop, ino, wake = self._thread, self._stop, self._inotify, self._wake
+            self._thread = self._inotify = self._wake = None
+            stop.set()
+            if wake is not None:
+                os.write(wake[1], b"\0")
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=2)
+        if ino is not None:
+            ino.close()
+        if wake is not None:
+            for fd in wake:
+                os.close(fd)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "threads": int(self._thread is not None and self._thread.is_alive()),
+                "roots": len(self._watchers),
+                "subscriptions": sum(len(v) for v in self._subs.values()),
+                "inotify_watches": len({wd for w in self._watchers.values() for wd in w._watches}),
+            }
+
+    @staticmethod
+    def _tune(watcher: DirectoryWatcher, subs: List[Subscription]) -> None:
+        # the most demanding subscriber wins; one fixed interval disables backoff
+        watcher.interval = min(s.interval for s in subs)
+        maxes = [s.max_interval for s in subs]
+        watcher.max_interval = None if None in maxes else min(m for m in maxes if m is not None)
+        watcher.current_interval = min(watcher.current_interval, watcher.interval)
+        if watcher.max_interval is None:
+            watcher.current_interval = watcher.interval
+
+    def _attach(self, watcher: DirectoryWatcher) -> None:
+        if watcher.backend == "poll":
+            return
+        if self._inotify is None and inotify.available():
+            try:
+                self._inotify = inotify.Inotify()
+            except OSError as e:
+                log.warning(f"Cannot start inotify ({e}), polling instead")
+        if self._inotify is None:
+            if watcher.backend == "inotify":
+                log.warning(f"inotify is not available, polling {watcher.root} instead")
+            watcher.backend = "poll"
+            return
+        watcher._inotify = self._inotify
+        try:
+            watcher._sync_watches()
+        except OSError as e:
+            log.warning(f"Cannot watch {watcher.root} with inotify ({e}), polling instead")
+            watcher._inotify = None
+            watcher._watches.clear()
+            watcher._watched.clear()
+            watcher.backend = "poll"
+            return
+        watcher.backend = "inotify"
+
+    def _fan_out(self, key: Tuple, path: Path, callback: str) -> None:
+        with self._lock:
+            subs = list(self._subs.get(key, ()))
+        for sub in subs:
+            fn = getattr(sub, callback)
+            if fn is None:
+                continue
+            try:
+                fn(path)
+            except Exception as e:
+                log.exception(f"Watch callback {callback} for {path} failed: {e}")
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop = threading.Event()
+        self._wake = os.pipe()
+        self._thread = threading.Thread(target=self._run, args=(self._stop, self._wake),
+                                        daemon=True, name="plugflow-watch")
+        self._thread.start()
+
+    def _wakeup(self) -> None:
+        if self._wake is not None:
+            try:
+                os.write(self._wake[1], b"\0")
+            except OSError:
+                pass
+
+    def _run(self, stop: threading.Event, wake: Tuple[int, int]) -> None:
+        while not stop.is_set():
+            with self._lock:
+                ino = self._inotify
+                timeout = None
+                if self._due:
+                    timeout = max(0.0, min(self._due.values()) - time.monotonic())
+            fds = [wake[0]] + ([ino.fileno()] if ino is not None else [])
+            try:
+                ready, _, _ = select.select(fds, [], [], timeout)
+            except (OSError, ValueError):
+                return  # descriptors closed while stopping
+            if stop.is_set():
+                return
+            if wake[0] in ready:
+                os.read(wake[0], 4096)
+            if ino is not None and ino.fileno() in ready:
+                stop.wait(_SETTLE)
                 try:
-                    mtime = target.stat().st_mtime
-                except FileNotFoundError:
+                    events = ino.read()
+                except OSError:
+                    continue  # closed by unsubscribe() meanwhile
+                self._dispatch(events)
+            self._poll_due()
+
+    def _dispatch(self, events: List[inotify.Event]) -> None:
+        with self._lock:
+            for key, watcher in list(self._watchers.items()):
+                if watcher.backend != "inotify":
                     continue
-                current.add(target)
-                prev = self._mtimes.get(target)
-                if prev is None:
-                    self._mtimes[target] = mtime
-                    if self.on_change:
-                        self.on_change(target)
-                elif mtime > prev + 1e-6:
-                    self._mtimes[target] = mtime
-                    if self.on_change:
-                        self.on_change(target)
-
-            # removed files
-            removed = set(self._mtimes.keys()) - current
-            for r in removed:
-                self._mtimes.pop(r, None)
-                if self.on_delete:
-                    self.on_delete(r)
-            time.sleep(self.interval)
+                mine = [e for e in events if e[0] in watcher._watches or e[1] & inotify.IN_Q_OVERFLOW]
+                if not mine:
+                    continue
+                try:
+                    watcher._handle_events(mine)
+                except OSError as e:
+                    log.warning(f"inotify watch on {watcher.root} failed ({e}), polling instead")
+                    watcher._inotify = None
+                    watcher._watches.clear()
+                    watcher._watched.clear()
+                    watcher.backend = "poll"
+                    watcher.current_interval = watcher.interval
+                    self._due[key] = time.monotonic() + watcher.interval
+
+    def _poll_due(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            for key, due in list(self._due.items()):
+                if due > now:
+                    continue
+                watcher = self._watchers.get(key)
+                if watcher is None:
+                    continue
+                watcher._poll_once()
+                self._due[key] = time.monotonic() + watcher.current_interval
+
+_shared: Optional[WatchService] = None
+_shared_lock = threading.Lock()
+
+def shared_watch_service() -> WatchService:
+    """The process-wide WatchService used by every PluginManager."""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = WatchService()
+        return _shared
+
+class ChangeQueue:
+    """Coalesces change notifications and hands them to a worker thread in bursts.
+
+    A burst is handed over once no notification arrived for `quiet` seconds, or
+    `max_wait` seconds after its first one so constant churn cannot starve
+    reloads. Each path appears once per burst with its latest kind ("change" or
+    "delete"). handler(changes, since) gets the burst and the perf_counter()
+    time of its first notification.
+    """
+    def __init__(self, handler: Callable[[List[Tuple[Path, str]], float], None],
+                 quiet: float = 0.1, max_wait: float = 2.0, name: str = "plugflow-reload") -> None:
+        self.handler = handler
+        self.quiet = quiet
+        self.max_wait = max_wait
+        self.name = name
+        self._cond = threading.Condition()
+        self._pending: Dict[Path, str] = {}
+        self._first = 0.0
+        self._last = 0.0
+        self._busy = False
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+
+    def put(self, path: Path, kind: str) -> None:
+        with self._cond:
+            now = time.perf_counter()
+            if not self._pending:
+                self._first = now
+            self._pending[path] = kind
+            self._last = now
+            if self._thread is None or not self._thread.is_alive():
+                self._closed = False
+                self._thread = threading.Thread(target=self._run, daemon=True, name=self.name)
+                self._thread.start()
+            self._cond.notify_all()
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until every queued change has been handled; False on timeout."""
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        with self._cond:
+            while self._pending or self._busy:
+                remaining = None if deadline is None else deadline - time.perf_counter()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+    def depth(self) -> int:
+        """Number of changed paths waiting for the next burst."""
+        return len(self._pending)
+
+    def stop(self) -> None:
+        """Drops pending changes and stops the worker after its current burst."""
+        with self._cond:
+            self._closed = True
+            self._pending.clear()
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=5)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    self._cond.notify_all()
+                    return
+                # wait for the burst to go quiet
+                while not self._closed:
+                    now = time.perf_counter()
+                    deadline = min(self._last + self.quiet, self._first + self.max_wait)
+                    if now >= deadline:
+                        break
+                    self._cond.wait(deadline - now)
+                if self._closed:
+                    continue
+                batch = list(self._pending.items())
+                since = self._first
+                self._pending.clear()
+                self._busy = True
+            try:
+                self.handler(batch, since)
+            except Exception as e:
+                log.exception(f"Reload of {len(batch)} changed path(s) failed: {e}")
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
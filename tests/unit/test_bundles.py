@@ -0,0 +1,93 @@
+"""
+Tests for loading plugins from zip/wheel bundles
+"""
+import os
+import time
+import zipfile
+import textwrap
+from pathlib import Path
+from plugflow import PluginManager
+
+
+def write_bundle(path: Path, files: dict) -> Path:
+    with zipfile.ZipFile(path, "w") as zf:
+        for name, body in files.items():
+            zf.writestr(name, textwrap.dedent(body))
+    return path
+
+
+def plugin_source(name: str, reply: str) -> str:
+    return f"""
+from plugflow import BasePlugin
+class Plugin(BasePlugin):
+    name = "{name}"
+    def handle_command(self, command, args):
+        if command == "{name}":
+            return "{reply}"
+"""
+
+
+def test_load_from_zip_bundle(tmp_path: Path):
+    """Test loading file and package plugins from a zip archive"""
+    bundle = write_bundle(tmp_path / "plugins.zip", {
+        "single.py": plugin_source("single", "from file"),
+        "pkg/__init__.py": """
+from plugflow import BasePlugin
+from .impl import reply
+class PkgPlugin(BasePlugin):
+    name = "pkg"
+    def handle_command(self, command, args):
+        if command == "pkg":
+            return reply()
+""",
+        "pkg/impl.py": "def reply():\n    return 'from package'\n",
+        "__main__.py": "raise SystemExit('must not run')\n",
+    })
+
+    mgr = PluginManager([str(bundle)])
+    mgr.load_all()
+
+    assert mgr.list_plugins() == ["pkg", "single"]
+    assert mgr.handle_message("/single") == ["from file"]
+    assert mgr.handle_message("/pkg") == ["from package"]
+    assert mgr.get("pkg") is not None
+
+
+def test_wheel_bundle_respects_discovery_rules(tmp_path: Path):
+    """Test that wheel bundles use the same discovery rules as directories"""
+    bundle = write_bundle(tmp_path / "plugins-1.0-py3-none-any.whl", {
+        "wanted.py": plugin_source("wanted", "ok"),
+        "tests/test_wanted.py": plugin_source("excluded", "no"),
+        "plugins-1.0.dist-info/METADATA": "Name: plugins\n",
+    })
+
+    mgr = PluginManager([str(bundle)], exclude=["tests"])
+    mgr.load_all()
+    assert mgr.list_plugins() == ["wanted"]
+
+
+def test_hot_reload_bundle(tmp_path: Path):
+    """Test that replacing a bundle reloads its plugins"""
+    bundle = write_bundle(tmp_path / "plugins.pyz", {
+        "pkg/__init__.py": "from .impl import Plugin\nPLUGINS = [Plugin]\n",
+        "pkg/impl.py": plugin_source("bundled", "v1"),
+    })
+
+    mgr = PluginManager([str(bundle)], hot_reload=True, poll_interval=0.1)
+    mgr.load_all()
+    assert mgr.handle_message("/bundled") == ["v1"]
+
+    write_bundle(bundle, {
+        "pkg/__init__.py": "from .impl import Plugin\nPLUGINS = [Plugin]\n",
+        "pkg/impl.py": plugin_source("bundled", "v2 with a longer reply"),
+    })
+    later = time.time() + 10
+    os.utime(bundle, (later, later))
+
+    for _ in range(30):
+        time.sleep(0.1)
+        if mgr.handle_message("/bundled") == ["v2 with a longer reply"]:
+            break
+    assert mgr.handle_message("/bundled") == ["v2 with a longer reply"]
+
+    mgr.stop()
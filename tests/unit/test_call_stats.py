@@ -0,0 +1,133 @@
+"""
+Tests for per-plugin call statistics
+"""
+import random
+import threading
+from pathlib import Path
+from plugflow import PluginManager
+from plugflow.metrics import FOLD_EVERY, CallStats
+
+PICKY_PLUGIN = """
+class Picky(BasePlugin):
+    name = "picky"
+    def handles(self, event):
+        return event.endswith("0")
+    def on_event(self, event, data, manager):
+        return "picked"
+"""
+
+STATS_PLUGINS = """
+import time
+from plugflow import BasePlugin
+
+class Slow(BasePlugin):
+    name = "slow"
+    def on_event(self, event, data, manager):
+        if event == "fail":
+            raise RuntimeError("boom")
+        time.sleep(0.002)
+        return "slow"
+    def handle_command(self, command, args):
+        return "done"
+
+class Fast(BasePlugin):
+    name = "fast"
+    def on_event(self, event, data, manager):
+        return "fast"
+    def ping(self):
+        return "pong"
+"""
+
+
+def test_stats_count_calls_errors_and_latency(tmp_path: Path, plugin_writer):
+    """Test that each (plugin, hook) pair gets counts and a latency histogram"""
+    plugin_writer(tmp_path, "timed", STATS_PLUGINS)
+    mgr = PluginManager([str(tmp_path)], collect_stats=True, stats_sample_every=1)
+    mgr.load_all()
+    for _ in range(5):
+        mgr.dispatch_event("tick")
+    mgr.dispatch_event("fail")
+    mgr.handle_message("/go")
+    mgr.broadcast("ping")
+
+    stats = mgr.stats()
+    slow = stats["slow"]["on_event"]
+    assert slow["calls"] == 6 and slow["errors"] == 1
+    assert slow["p50"] >= 0.002 > stats["fast"]["on_event"]["p99"]
+    assert sum(n for _, n in slow["histogram"]) == 6
+    assert slow["max"] >= slow["mean"] > 0
+    assert stats["fast"]["on_event"]["errors"] == 0
+    assert stats["slow"]["handle_command"]["calls"] == 1
+    assert stats["fast"]["ping"]["calls"] == 1
+    assert set(mgr.stats("fast")) == {"fast"}
+
+    mgr.reset_stats()
+    assert mgr.stats() == {}
+    mgr.dispatch_event("tick")
+    assert mgr.stats()["fast"]["on_event"]["calls"] == 1
+
+
+def test_stats_disabled_by_default(tmp_path: Path, plugin_writer):
+    plugin_writer(tmp_path, "timed", STATS_PLUGINS)
+    mgr = PluginManager([str(tmp_path)])
+    mgr.load_all()
+    mgr.dispatch_event("tick")
+    assert mgr.stats() == {}
+
+
+def test_call_stats_merge_threads():
+    """Test that samples from several threads, folded or not, are merged on read"""
+    stats = CallStats(sample_every=1)
+
+    def work(count):
+        for _ in range(count):
+            durations, counts = stats.samples("on_event")
+            if durations is None:
+                counts["p"] += 1
+            else:
+                durations["p"].append(1000)
+
+    threads = [threading.Thread(target=work, args=(FOLD_EVERY + 10,)) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    work(7)  # this thread stays alive and unfolded
+    stats.error("p", "on_event")
+
+    merged = stats.stats()["p"]["on_event"]
+    assert merged["calls"] == 3 * (FOLD_EVERY + 10) + 7
+    assert merged["timed"] == merged["calls"]
+    assert merged["errors"] == 1
+    assert merged["histogram"] == [(1024 / 1e9, merged["calls"])]
+
+
+def test_stats_sample_latency_and_count_every_call(tmp_path: Path, plugin_writer):
+    """Test that sampling leaves call counts exact, also for plugins only some dispatches reach"""
+    plugin_writer(tmp_path, "timed", STATS_PLUGINS.replace("time.sleep(0.002)", "pass") + PICKY_PLUGIN)
+    mgr = PluginManager([str(tmp_path)], collect_stats=True, stats_sample_every=8)
+    mgr.load_all()
+    seen = []
+    for i in range(3000):
+        mgr.dispatch_event("fail" if i == 1 else f"tick{i}", i)
+        if i % 100 == 99:
+            seen.append(mgr.stats("picky")["picky"]["on_event"]["calls"])
+
+    stats = mgr.stats()
+    picky = stats["picky"]["on_event"]
+    assert picky["calls"] == 300
+    assert seen == [10 * (n + 1) for n in range(30)]
+    assert 5 < picky["timed"] < 150
+    assert sum(n for _, n in picky["histogram"]) == picky["timed"]
+    assert stats["fast"]["on_event"]["calls"] == 3000
+    assert stats["slow"]["on_event"]["errors"] == 1
+
+    # sampling leaves the application's random sequence alone
+    random.seed(7)
+    expected = [random.random() for _ in range(3)]
+    random.seed(7)
+    drawn = []
+    for _ in range(3):
+        mgr.dispatch_event("tick")
+        drawn.append(random.random())
+    assert drawn == expected
@@ -0,0 +1,75 @@
+"""
+Tests for dependency-aware hot reload
+"""
+import builtins
+from pathlib import Path
+import pytest
+from plugflow import PluginManager
+
+
+USER_PLUGIN = """
+import builtins
+from plugflow import BasePlugin
+from {helper} import VALUE
+
+class User(BasePlugin):
+    name = "{name}"
+    def on_load(self, manager):
+        builtins._plugflow_loads.append(self.name)
+    def handle_command(self, command, args):
+        if command == "{name}":
+            return VALUE
+"""
+
+
+@pytest.fixture
+def load_log():
+    builtins._plugflow_loads = []
+    yield builtins._plugflow_loads
+    del builtins._plugflow_loads
+
+
+def test_helper_change_reloads_importers(tmp_path: Path, plugin_writer, monkeypatch, load_log):
+    """Test that editing a shared helper reloads exactly the plugins importing it"""
+    monkeypatch.syspath_prepend(str(tmp_path))
+    helper = plugin_writer(tmp_path, "pf_shared_helper", "VALUE = 'v1'\n")
+    for name in ("alpha", "beta"):
+        plugin_writer(tmp_path, name, USER_PLUGIN.format(helper="pf_shared_helper", name=name))
+    plugin_writer(tmp_path, "gamma", """
+from plugflow import BasePlugin
+class Gamma(BasePlugin):
+    name = "gamma"
+""")
+    mgr = PluginManager([str(tmp_path)])
+    mgr.load_all()
+    untouched = mgr.get("gamma")
+    load_log.clear()
+
+    helper.write_text("VALUE = 'v2'\n")
+    mgr._on_fs_change(helper)
+
+    assert sorted(load_log) == ["alpha", "beta"]
+    assert mgr.handle_message("/alpha") == ["v2"]
+    assert mgr.handle_message("/beta") == ["v2"]
+    assert mgr.get("gamma") is untouched
+    stats = mgr.reload_stats()[-1]
+    assert stats["trigger"] == str(helper)
+    assert stats["plugins"] == 2
+    assert stats["helpers"] == 1
+
+
+def test_dependents_reload_in_dependency_order(tmp_path: Path, plugin_writer, monkeypatch, load_log):
+    """Test that a plugin importing another plugin is reloaded after it"""
+    monkeypatch.syspath_prepend(str(tmp_path))
+    plugin_writer(tmp_path, "pf_base_helper", "VALUE = 'v1'\n")
+    plugin_writer(tmp_path, "pf_provider", USER_PLUGIN.format(helper="pf_base_helper", name="provider"))
+    plugin_writer(tmp_path, "pf_consumer", USER_PLUGIN.format(helper="pf_provider", name="consumer"))
+    mgr = PluginManager([str(tmp_path)])
+    mgr.load_all()
+    load_log.clear()
+
+    helper = plugin_writer(tmp_path, "pf_base_helper", "VALUE = 'v2'\n")
+    mgr._on_fs_change(helper)
+
+    assert load_log == ["provider", "consumer"]
+    assert mgr.handle_message("/consumer") == ["v2"]
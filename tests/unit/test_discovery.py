@@ -0,0 +1,154 @@
+"""
+Tests for plugin discovery rules
+"""
+import pytest
+from pathlib import Path
+from plugflow import PluginManager
+from plugflow.loader import DiscoveryRules, _iter_python_entries
+
+
+PLUGIN_BODY = """
+from plugflow import BasePlugin
+class P(BasePlugin):
+    name = "{name}"
+"""
+
+
+def _names(root: Path, **kwargs):
+    return sorted(p.relative_to(root).as_posix() for p in _iter_python_entries(root, **kwargs))
+
+
+def test_default_prune_rules(tmp_path: Path):
+    """Test that caches, hidden folders and virtualenvs are never scanned"""
+    (tmp_path / "a.py").write_text("")
+    for d in ("__pycache__", ".git", "venv/lib/site-packages", "node_modules/x", "pkg.egg-info"):
+        (tmp_path / d).mkdir(parents=True)
+        (tmp_path / d / "junk.py").write_text("")
+    (tmp_path / ".#a.py").write_text("")
+
+    assert _names(tmp_path) == ["a.py"]
+
+
+def test_exclude_patterns(tmp_path: Path):
+    """Test that exclude patterns prune directories and skip files"""
+    (tmp_path / "tests").mkdir()
+    (tmp_path / "tests" / "t.py").write_text("")
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "keep.py").write_text("")
+    (tmp_path / "sub" / "skip_me.py").write_text("")
+
+    rules = DiscoveryRules(exclude=["tests", "sub/skip_*.py"])
+    assert _names(tmp_path, rules=rules) == ["sub/keep.py"]
+
+
+def test_include_patterns(tmp_path: Path):
+    """Test that include patterns select candidates by name or relative path"""
+    (tmp_path / "plugin_a.py").write_text("")
+    (tmp_path / "helper.py").write_text("")
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / "__init__.py").write_text("")
+
+    rules = DiscoveryRules(include=["plugin_*.py", "pkg"])
+    assert _names(tmp_path, rules=rules) == ["pkg", "plugin_a.py"]
+    assert _names(tmp_path, recursive=False, rules=rules) == ["pkg", "plugin_a.py"]
+
+
+def test_max_depth(tmp_path: Path):
+    """Test that max_depth limits how far below the root discovery descends"""
+    deep = tmp_path / "a" / "b"
+    deep.mkdir(parents=True)
+    (tmp_path / "top.py").write_text("")
+    (tmp_path / "a" / "mid.py").write_text("")
+    (deep / "low.py").write_text("")
+
+    assert _names(tmp_path, rules=DiscoveryRules(max_depth=0)) == ["top.py"]
+    assert _names(tmp_path, rules=DiscoveryRules(max_depth=1)) == ["a/mid.py", "top.py"]
+    assert _names(tmp_path) == ["a/b/low.py", "a/mid.py", "top.py"]
+
+
+def test_manager_discovery_options(tmp_path: Path, plugin_writer):
+    """Test that PluginManager passes discovery options to the loader"""
+    plugin_writer(tmp_path, "kept", PLUGIN_BODY.format(name="kept"))
+    vendor = tmp_path / "vendor"
+    vendor.mkdir()
+    plugin_writer(vendor, "vendored", PLUGIN_BODY.format(name="vendored"))
+
+    mgr = PluginManager([str(tmp_path)], exclude=["vendor"])
+    mgr.load_all()
+    assert mgr.list_plugins() == ["kept"]
+
+
+def test_package_is_single_candidate(tmp_path: Path):
+    """Test that package submodules are not yielded as separate candidates"""
+    pkg = tmp_path / "pkg"
+    (pkg / "sub").mkdir(parents=True)
+    (pkg / "__init__.py").write_text("")
+    (pkg / "helpers.py").write_text("")
+    (pkg / "sub" / "deep.py").write_text("")
+    (tmp_path / "plain.py").write_text("")
+
+    assert _names(tmp_path) == ["pkg", "plain.py"]
+
+
+def test_package_submodules_imported_once(tmp_path: Path, plugin_writer):
+    """Test that package submodules execute once, through relative imports"""
+    pkg = plugin_writer(tmp_path, "counted_pkg", """
+from plugflow import BasePlugin
+from .helpers import greet
+
+class CountedPlugin(BasePlugin):
+    name = "counted"
+    def handle_command(self, command, args):
+        if command == "greet":
+            return greet(args)
+""", as_pkg=True)
+    (pkg / "helpers.py").write_text(
+        "import builtins\n"
+        "builtins._plugflow_helper_execs = getattr(builtins, '_plugflow_helper_execs', 0) + 1\n"
+        "from plugflow import BasePlugin\n"
+        "class HelperBase(BasePlugin):\n"
+        "    name = 'helper_base'\n"
+        "def greet(who):\n"
+        "    return f'hi {who}'\n"
+    )
+
+    import builtins
+    builtins._plugflow_helper_execs = 0
+    try:
+        mgr = PluginManager([str(tmp_path)])
+        mgr.load_all()
+        assert mgr.list_plugins() == ["counted"]
+        assert mgr.handle_message("/greet bob") == ["hi bob"]
+        assert builtins._plugflow_helper_execs == 1
+    finally:
+        del builtins._plugflow_helper_execs
+
+
+def test_root_package_is_single_candidate(tmp_path: Path):
+    """Test that a root with __init__.py loads as one package, not also module by module"""
+    root = tmp_path / "plugins"
+    root.mkdir()
+    (root / "__init__.py").write_text(
+        "from plugflow import BasePlugin\n"
+        "from . import shouty\n"
+        "class Root(BasePlugin):\n"
+        "    name = 'root'\n"
+    )
+    (root / "shouty.py").write_text(
+        "import builtins\n"
+        "builtins._plugflow_shouty_execs = getattr(builtins, '_plugflow_shouty_execs', 0) + 1\n"
+        "from plugflow import BasePlugin\n"
+        "class Shouty(BasePlugin):\n"
+        "    name = 'shouty'\n"
+    )
+
+    assert _names(root) == ["."]
+    import builtins
+    builtins._plugflow_shouty_execs = 0
+    try:
+        mgr = PluginManager([str(root)])
+        mgr.load_all()
+        assert mgr.list_plugins() == ["root"]
+        assert builtins._plugflow_shouty_execs == 1
+    finally:
+        del builtins._plugflow_shouty_execs
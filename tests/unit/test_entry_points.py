@@ -0,0 +1,111 @@
+"""
+Tests for entry-point plugin discovery
+"""
+import os
+import textwrap
+from pathlib import Path
+import pytest
+from plugflow import PluginManager
+from plugflow import entrypoints
+
+
+GROUP = "plugflow_test.plugins"
+
+
+def make_distribution(site: Path, dist: str, module: str, entry_points: dict, body: str) -> None:
+    info = site / f"{dist}-1.0.dist-info"
+    info.mkdir(parents=True)
+    (info / "METADATA").write_text(f"Metadata-Version: 2.1\nName: {dist}\nVersion: 1.0\n")
+    lines = [f"[{GROUP}]"] + [f"{name} = {value}" for name, value in entry_points.items()]
+    (info / "entry_points.txt").write_text("\n".join(lines) + "\n")
+    (site / f"{module}.py").write_text(textwrap.dedent(body))
+
+
+@pytest.fixture
+def site(tmp_path: Path, monkeypatch):
+    site = tmp_path / "site"
+    site.mkdir()
+    monkeypatch.syspath_prepend(str(site))
+    return site
+
+
+def test_entry_point_plugins(tmp_path: Path, site: Path):
+    """Test loading module and class entry points with the usual rules"""
+    make_distribution(site, "ep_dist", "ep_plugins", {
+        "module": "ep_plugins",
+        "single": "ep_plugins:Explicit",
+    }, """
+from plugflow import BasePlugin
+
+class Implicit(BasePlugin):
+    name = "implicit"
+    def handle_command(self, command, args):
+        if command == "who":
+            return self.name
+
+class Explicit(BasePlugin):
+    name = "explicit"
+""")
+
+    mgr = PluginManager(entry_point_group=GROUP, entry_point_cache=tmp_path / "cache.json",
+                        context={"app": "test"})
+    mgr.load_all()
+
+    assert set(mgr.list_plugins()) == {"implicit", "explicit"}
+    assert mgr.get("explicit").context == {"app": "test"}
+    assert mgr.handle_message("/who") == ["implicit"]
+
+
+def test_entry_point_scan_is_cached(tmp_path: Path, site: Path, monkeypatch):
+    """Test that the metadata scan is reused until sys.path changes"""
+    cache = tmp_path / "cache.json"
+    make_distribution(site, "first_dist", "first_plugin", {"first": "first_plugin"}, """
+from plugflow import BasePlugin
+class First(BasePlugin):
+    name = "first"
+""")
+    assert entrypoints.entry_point_specs(GROUP, cache) == [("first", "first_plugin")]
+    assert cache.exists()
+
+    def no_scan(group):
+        raise AssertionError("metadata scanned despite a valid cache")
+    scan = entrypoints._scan_metadata
+    monkeypatch.setattr(entrypoints, "_scan_metadata", no_scan)
+    assert entrypoints.entry_point_specs(GROUP, cache) == [("first", "first_plugin")]
+    monkeypatch.setattr(entrypoints, "_scan_metadata", scan)
+
+    # installing another distribution changes the site directory
+    make_distribution(site, "second_dist", "second_plugin", {"second": "second_plugin"}, """
+from plugflow import BasePlugin
+class Second(BasePlugin):
+    name = "second"
+""")
+    st = site.stat()
+    os.utime(site, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert sorted(entrypoints.entry_point_specs(GROUP, cache)) == [
+        ("first", "first_plugin"), ("second", "second_plugin")]
+
+
+def test_reload_entry_point_plugin(tmp_path: Path, site: Path):
+    """Test that reloading re-resolves the entry point instead of loading its module file"""
+    make_distribution(site, "reload_dist", "reload_plugins", {
+        "main": "reload_plugins:Main",
+    }, """
+from plugflow import BasePlugin
+
+class Main(BasePlugin):
+    name = "main"
+    version = "1"
+
+class Other(BasePlugin):
+    name = "other"
+""")
+    mgr = PluginManager(entry_point_group=GROUP, entry_point_cache=tmp_path / "cache.json")
+    mgr.load_all()
+    assert mgr.list_plugins() == ["main"]
+
+    module = site / "reload_plugins.py"
+    module.write_text(module.read_text().replace('version = "1"', 'version = "1.1"'))
+    assert mgr.reload_plugin("main")
+    assert mgr.list_plugins() == ["main"]
+    assert mgr.get("main").version == "1.1"
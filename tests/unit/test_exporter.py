@@ -0,0 +1,107 @@
+"""
+Tests for the Prometheus metrics exporter
+"""
+import threading
+import urllib.request
+from pathlib import Path
+from plugflow import PluginManager
+from plugflow.exporter import CONTENT_TYPE, render, start_http_server
+
+EXPORTED_PLUGIN = """
+import threading
+from plugflow import BasePlugin
+
+class Exported(BasePlugin):
+    name = "exported"
+    entered = threading.Event()
+    release = threading.Event()
+    def on_event(self, event, data, manager):
+        if event == "fail":
+            raise RuntimeError("boom")
+        if event == "block":
+            self.entered.set()
+            self.release.wait(5)
+        return data
+"""
+
+
+def _samples(text):
+    return {line.rsplit(" ", 1)[0]: float(line.rsplit(" ", 1)[1])
+            for line in text.splitlines() if line and not line.startswith("#")}
+
+
+def test_render_exposition_format(tmp_path: Path, plugin_writer):
+    """Test that gauges, reload counters and hook histograms are exported"""
+    path = plugin_writer(tmp_path, "exported", EXPORTED_PLUGIN)
+    mgr = PluginManager([str(tmp_path)], collect_stats=True)
+    mgr.load_all()
+    for _ in range(3):
+        mgr.dispatch_event("tick")
+    mgr.dispatch_event("fail")
+    path.write_text(path.read_text() + "\n# edited\n")
+    mgr._on_fs_change(path)
+
+    text = render(mgr)
+    assert "# TYPE plugflow_hook_duration_seconds histogram" in text
+    samples = _samples(text)
+    assert samples["plugflow_plugins"] == 1
+    assert samples["plugflow_reloads_total"] == 1
+    assert samples["plugflow_reloaded_plugins_total"] == 1
+    assert samples["plugflow_reload_queue_depth"] == 0
+    labels = '{plugin="exported",hook="on_event"'
+    assert samples[f"plugflow_hook_calls_total{labels}}}"] == 4
+    assert samples[f"plugflow_hook_errors_total{labels}}}"] == 1
+    # the histogram holds the timed calls, the first one at least
+    timed = mgr.stats()["exported"]["on_event"]["timed"]
+    assert 1 <= timed <= 4
+    assert samples[f'plugflow_hook_duration_seconds_bucket{labels},le="+Inf"}}'] == timed
+    buckets = [v for k, v in samples.items() if k.startswith(f"plugflow_hook_duration_seconds_bucket{labels}")]
+    assert buckets == sorted(buckets)
+    assert samples[f"plugflow_hook_duration_seconds_count{labels}}}"] == timed
+
+
+def test_render_counters_never_decrease(tmp_path: Path, plugin_writer):
+    """Test that call counts and histogram series only grow between scrapes"""
+    plugin_writer(tmp_path, "exported", EXPORTED_PLUGIN)
+    mgr = PluginManager([str(tmp_path)], collect_stats=True, stats_sample_every=4)
+    mgr.load_all()
+    previous = {}
+    for i in range(3000):
+        mgr.dispatch_event("tick" if i % 7 else "fail")
+        if i % 50 == 0:
+            samples = {k: v for k, v in _samples(render(mgr)).items() if k.startswith("plugflow_hook_")}
+            assert all(v >= previous.get(k, 0) for k, v in samples.items())
+            previous = samples
+    assert previous['plugflow_hook_calls_total{plugin="exported",hook="on_event"}'] == 2951
+
+
+def test_render_does_not_wait_for_dispatch(tmp_path: Path, plugin_writer):
+    plugin_writer(tmp_path, "exported", EXPORTED_PLUGIN)
+    mgr = PluginManager([str(tmp_path)], collect_stats=True)
+    mgr.load_all()
+    plg = mgr.get("exported")
+    worker = threading.Thread(target=mgr.dispatch_event, args=("block",))
+    worker.start()
+    try:
+        assert plg.entered.wait(5)
+        rendered = []
+        scrape = threading.Thread(target=lambda: rendered.append(render(mgr)))
+        scrape.start()
+        scrape.join(2)
+        assert rendered and "plugflow_plugins 1" in rendered[0]
+    finally:
+        plg.release.set()
+        worker.join(5)
+
+
+def test_http_server_serves_metrics(tmp_path: Path, plugin_writer):
+    plugin_writer(tmp_path, "exported", EXPORTED_PLUGIN)
+    mgr = PluginManager([str(tmp_path)])
+    mgr.load_all()
+    server = start_http_server(mgr, port=0)
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.port}/metrics", timeout=5) as resp:
+            assert resp.headers["Content-Type"] == CONTENT_TYPE
+            assert "plugflow_plugins 1" in resp.read().decode()
+    finally:
+        server.close()
@@ -0,0 +1,125 @@
+"""
+Tests for on-demand per-plugin profiling
+"""
+import threading
+import time
+from pathlib import Path
+from plugflow import PluginManager
+from plugflow.tracing import InMemoryTracer
+
+HOT_PLUGIN = """
+from plugflow import BasePlugin
+
+def {helper}(n):
+    return sum(i * i for i in range(n))
+
+class Hot(BasePlugin):
+    name = "hot"
+    def on_event(self, event, data, manager):
+        return {helper}(2000)
+"""
+
+BYSTANDER_PLUGIN = """
+from plugflow import BasePlugin
+
+def idle(n):
+    return n
+
+class Bystander(BasePlugin):
+    name = "bystander"
+    def on_event(self, event, data, manager):
+        return idle(1)
+"""
+
+
+def _names(result):
+    return {func[2] for func in result.stats.stats}
+
+
+def test_profile_captures_one_plugin_across_reload(tmp_path: Path, plugin_writer):
+    """Test that only the plugin's calls are profiled, also after a hot reload, and the wrapper goes away"""
+    hot = plugin_writer(tmp_path, "hot", HOT_PLUGIN.format(helper="crunch"))
+    plugin_writer(tmp_path, "bystander", BYSTANDER_PLUGIN)
+    tracer = InMemoryTracer()
+    mgr = PluginManager([str(tmp_path)], tracer=tracer)
+    mgr.load_all()
+    stop = threading.Event()
+
+    def traffic():
+        while mgr._profiler is None and not stop.is_set():
+            time.sleep(0.001)  # wait for the profiling window
+        reloaded = False
+        count = 0
+        while not stop.is_set():
+            mgr.dispatch_event("tick")
+            count += 1
+            if count == 20 and not reloaded:
+                hot.write_text(HOT_PLUGIN.format(helper="crunch_v2"))
+                mgr._on_fs_change(hot)
+                reloaded = True
+
+    worker = threading.Thread(target=traffic)
+    worker.start()
+    try:
+        result = mgr.profile("hot", 0.5)
+    finally:
+        stop.set()
+        worker.join(5)
+
+    assert result.calls > 20
+    names = _names(result)
+    assert {"on_event", "crunch", "crunch_v2"} <= names
+    assert "idle" not in names
+    collapsed = result.collapsed()
+    assert any(line.split(";")[-1].startswith("<genexpr>") for line in collapsed.splitlines())
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in collapsed.splitlines())
+    assert "crunch" in result.report()
+    # the profiler forwarded spans to the installed tracer and is gone now
+    assert mgr.tracer is tracer
+    assert tracer.find(plugin="bystander")
+    before = len(tracer.spans)
+    mgr.dispatch_event("tick")
+    assert len(tracer.spans) == before + 2
+
+
+def test_profile_without_calls(tmp_path: Path, plugin_writer):
+    plugin_writer(tmp_path, "bystander", BYSTANDER_PLUGIN)
+    mgr = PluginManager([str(tmp_path)])
+    mgr.load_all()
+    result = mgr.profile("bystander", 0.01)
+    assert result.calls == 0 and result.stats is None
+    assert result.collapsed() == ""
+    assert mgr.tracer is None
+
+
+def test_profile_leaves_out_other_threads(tmp_path: Path, plugin_writer):
+    """Test that what other threads run during a profiled call is not charged to the plugin"""
+    plugin_writer(tmp_path, "hot", HOT_PLUGIN.format(helper="crunch"))
+    mgr = PluginManager([str(tmp_path)])
+    mgr.load_all()
+    stop = threading.Event()
+
+    def unrelated_background_work():
+        while not stop.is_set():
+            sum(range(1000))
+
+    def traffic():
+        while mgr._profiler is None and not stop.is_set():
+            time.sleep(0.001)
+        while not stop.is_set():
+            mgr.dispatch_event("tick")
+
+    threads = [threading.Thread(target=unrelated_background_work), threading.Thread(target=traffic)]
+    for t in threads:
+        t.start()
+    try:
+        result = mgr.profile("hot", 0.3)
+    finally:
+        stop.set()
+        for t in threads:
+            t.join(5)
+
+    assert result.calls > 0
+    names = _names(result)
+    assert "crunch" in names
+    assert "unrelated_background_work" not in names and "is_set" not in names
@@ -228,3 +228,321 @@ class SlowReloadPlugin(BasePlugin):
     
     # Cleanup
     mgr.stop()
+
+
+def test_hot_reload_package_submodule(tmp_path: Path, plugin_writer):
+    """Test that editing a package submodule reloads the package plugin"""
+    pkg = plugin_writer(tmp_path, "pkg_plugin", """
+from plugflow import BasePlugin
+from .text import GREETING
+
+class PkgPlugin(BasePlugin):
+    name = "pkg"
+    def handle_command(self, command, args):
+        if command == "greet":
+            return GREETING
+""", as_pkg=True)
+    text = pkg / "text.py"
+    text.write_text("GREETING = 'v1'\n")
+
+    mgr = PluginManager([str(tmp_path)], hot_reload=True, poll_interval=0.1)
+    mgr.load_all()
+    assert mgr.handle_message("/greet") == ["v1"]
+
+    text.write_text("GREETING = 'v2'\n")
+    later = time.time() + 10
+    os.utime(text, (later, later))
+
+    for _ in range(30):
+        time.sleep(0.1)
+        if mgr.handle_message("/greet") == ["v2"]:
+            break
+    assert mgr.handle_message("/greet") == ["v2"]
+    assert mgr.list_plugins() == ["pkg"]
+
+    mgr.stop()
+
+
+COUNTED_PLUGIN = """
+import builtins
+from plugflow import BasePlugin
+
+class Counted(BasePlugin):
+    name = "{name}"
+    version = "{version}"
+    def on_load(self, manager):
+        builtins._plugflow_loads.append(self.name)
+    def on_unload(self, manager):
+        builtins._plugflow_unloads.append(self.name)
+"""
+
+
+def test_change_reloads_only_changed_file(tmp_path: Path, plugin_writer):
+    """Test that a change re-imports only the changed file, not its whole directory"""
+    import builtins
+    builtins._plugflow_loads, builtins._plugflow_unloads = [], []
+    try:
+        for name in ("one", "two", "three"):
+            plugin_writer(tmp_path, name, COUNTED_PLUGIN.format(name=name, version="1"))
+        mgr = PluginManager([str(tmp_path)])
+        mgr.load_all()
+        assert sorted(builtins._plugflow_loads) == ["one", "three", "two"]
+        builtins._plugflow_loads.clear()
+        untouched = mgr.get("one")
+
+        changed = plugin_writer(tmp_path, "two", COUNTED_PLUGIN.format(name="two", version="2"))
+        mgr._on_fs_change(changed)
+
+        assert builtins._plugflow_loads == ["two"]
+        assert builtins._plugflow_unloads == ["two"]
+        assert mgr.get("two").version == "2"
+        assert mgr.get("one") is untouched
+    finally:
+        del builtins._plugflow_loads, builtins._plugflow_unloads
+
+
+def test_reload_drops_plugins_removed_from_file(tmp_path: Path, plugin_writer):
+    """Test that plugins no longer defined by a reloaded file are unloaded"""
+    plugin_file = plugin_writer(tmp_path, "pair", """
+from plugflow import BasePlugin
+class Kept(BasePlugin):
+    name = "kept"
+class Dropped(BasePlugin):
+    name = "dropped"
+""")
+    mgr = PluginManager([str(tmp_path)])
+    mgr.load_all()
+    assert mgr.list_plugins() == ["dropped", "kept"]
+
+    plugin_writer(tmp_path, "pair", """
+from plugflow import BasePlugin
+class Kept(BasePlugin):
+    name = "kept"
+""")
+    assert mgr.reload_plugin("kept")
+    assert mgr.list_plugins() == ["kept"]
+
+
+def test_reload_failure_keeps_working_version(tmp_path: Path, plugin_writer):
+    """Test that a broken edit leaves the previously loaded plugin in place"""
+    plugin_file = plugin_writer(tmp_path, "fragile", """
+from plugflow import BasePlugin
+class Fragile(BasePlugin):
+    name = "fragile"
+""")
+    mgr = PluginManager([str(tmp_path)])
+    mgr.load_all()
+    loaded = mgr.get("fragile")
+
+    plugin_file.write_text("this is not python")
+    assert not mgr.reload_plugin("fragile")
+    assert mgr.get("fragile") is loaded
+
+
+def test_reload_does_not_block_dispatch(tmp_path: Path, plugin_writer):
+    """Test that importing and on_load of a reloaded plugin run without the manager lock"""
+    import threading
+    slow = """
+import time
+from plugflow import BasePlugin
+time.sleep(0.3)
+class Slow(BasePlugin):
+    name = "slow"
+    def on_load(self, manager):
+        time.sleep(0.3)
+    def handle_command(self, command, args):
+        if command == "which":
+            return "{version}"
+"""
+    plugin_writer(tmp_path, "slow", slow.format(version="v1"))
+    mgr = PluginManager([str(tmp_path)])
+    mgr.load_all()
+
+    plugin_writer(tmp_path, "slow", slow.format(version="v2"))
+    reloader = threading.Thread(target=mgr.reload_plugin, args=("slow",))
+    reloader.start()
+    time.sleep(0.1)
+    started = time.perf_counter()
+    assert mgr.handle_message("/which") == ["v1"]
+    assert time.perf_counter() - started < 0.2
+    reloader.join()
+
+    assert mgr.handle_message("/which") == ["v2"]
+    stats = mgr.reload_stats()[-1]
+    assert stats["duration"] >= 0.6
+    assert stats["stall"] < 0.1
+
+
+def test_touch_without_change_keeps_plugin(tmp_path: Path, plugin_writer):
+    """Test that a byte-identical rewrite does not re-import the plugin"""
+    import builtins
+    builtins._plugflow_loads, builtins._plugflow_unloads = [], []
+    try:
+        plugin_file = plugin_writer(tmp_path, "steady", COUNTED_PLUGIN.format(name="steady", version="1"))
+        mgr = PluginManager([str(tmp_path)])
+        mgr.load_all()
+        loaded = mgr.get("steady")
+
+        plugin_file.write_bytes(plugin_file.read_bytes())
+        later = time.time() + 10
+        os.utime(plugin_file, (later, later))
+        mgr._on_fs_change(plugin_file)
+        assert mgr.get("steady") is loaded
+        assert builtins._plugflow_unloads == []
+
+        plugin_writer(tmp_path, "steady", COUNTED_PLUGIN.format(name="steady", version="2"))
+        mgr._on_fs_change(plugin_file)
+        assert mgr.get("steady").version == "2"
+    finally:
+        del builtins._plugflow_loads, builtins._plugflow_unloads
+
+
+def test_edit_during_load_is_not_mistaken_for_loaded_version(tmp_path: Path, plugin_writer):
+    """Test that the fingerprint describes the imported source, not the file after on_load"""
+    body = """
+from plugflow import BasePlugin
+class Racy(BasePlugin):
+    name = "racy"
+    version = "{version}"
+    def on_load(self, manager):
+        edit = self.context.pop("edit", None)
+        if edit:
+            edit()
+"""
+    path = plugin_writer(tmp_path, "racy", body.format(version="1"))
+    context = {}
+    mgr = PluginManager([str(tmp_path)], context=context)
+    mgr.load_all()
+
+    # version 3 is saved while version 2 is being reloaded
+    context["edit"] = lambda: plugin_writer(tmp_path, "racy", body.format(version="3"))
+    plugin_writer(tmp_path, "racy", body.format(version="2"))
+    mgr._on_fs_change(path)
+    assert mgr.get("racy").version == "2"
+
+    mgr._on_fs_change(path)
+    assert mgr.get("racy").version == "3"
+
+
+def test_burst_of_changes_reloads_once(tmp_path: Path, plugin_writer):
+    """Test that files written together are reloaded in one batch"""
+    body = """
+from plugflow import BasePlugin
+class P(BasePlugin):
+    name = "{name}"
+    version = "{version}"
+"""
+    names = [f"burst_{i}" for i in range(8)]
+    for n in names:
+        plugin_writer(tmp_path, n, body.format(name=n, version="1"))
+    mgr = PluginManager([str(tmp_path)], hot_reload=True, poll_interval=0.05,
+                        watch_backend="poll", reload_debounce=0.3)
+    mgr.load_all()
+    try:
+        time.sleep(0.1)
+        for n in names:
+            plugin_writer(tmp_path, n, body.format(name=n, version="2"))
+            later = time.time() + 10
+            os.utime(tmp_path / f"{n}.py", (later, later))
+        time.sleep(0.2)
+        assert mgr._reload_queue.wait_idle(timeout=5)
+
+        assert [mgr.get(n).version for n in names] == ["2"] * len(names)
+        stats = mgr.reload_stats()
+        assert len(stats) == 1
+        assert stats[0]["burst"] == len(names)
+        assert stats[0]["targets"] == len(names)
+        assert stats[0]["latency"] >= stats[0]["duration"]
+    finally:
+        mgr.stop()
+
+
+def test_reload_plugin_from_hook_during_hot_reload(tmp_path: Path, plugin_writer):
+    """Test that a hook calling reload_plugin() while a hot reload waits for the lock does not deadlock"""
+    import threading
+    gated = """
+from plugflow import BasePlugin
+class Gated(BasePlugin):
+    name = "gated"
+    version = "{version}"
+    def on_load(self, manager):
+        gate = self.context
+        if gate["armed"]:
+            gate["entered"].set()
+            gate["release"].wait(5)
+"""
+    reloader = """
+from plugflow import BasePlugin
+class Reloader(BasePlugin):
+    name = "reloader"
+    version = "{version}"
+    def on_event(self, event, data, manager):
+        if event == "reload-me":
+            return manager.reload_plugin(self.name)
+"""
+    gate = {"armed": False, "entered": threading.Event(), "release": threading.Event()}
+    gated_path = plugin_writer(tmp_path, "gated", gated.format(version="1"))
+    plugin_writer(tmp_path, "reloader", reloader.format(version="1"))
+    mgr = PluginManager([str(tmp_path)], context=gate, reload_debounce=0.01)
+    mgr.load_all()
+
+    # the hot reload holds the reload lock while the new version's on_load runs
+    gate["armed"] = True
+    plugin_writer(tmp_path, "gated", gated.format(version="2"))
+    hot = threading.Thread(target=mgr._on_fs_change, args=(gated_path,), daemon=True)
+    hot.start()
+    try:
+        assert gate["entered"].wait(5)
+        plugin_writer(tmp_path, "reloader", reloader.format(version="2"))
+        results = []
+        dispatch = threading.Thread(target=lambda: results.append(mgr.dispatch_event("reload-me")), daemon=True)
+        dispatch.start()
+        dispatch.join(5)
+        assert not dispatch.is_alive()
+        assert True in results[0]
+    finally:
+        gate["release"].set()
+        hot.join(5)
+    assert not hot.is_alive()
+    assert mgr._reload_queue.wait_idle(timeout=5)
+    assert mgr.get("gated").version == "2"
+    assert mgr.get("reloader").version == "2"
+    mgr.stop()
+
+
+def test_reload_plugin_from_on_load_during_hot_reload(tmp_path: Path, plugin_writer):
+    """Test that on_load calling reload_plugin() while the reload lock is held is queued, not deadlocked"""
+    import threading
+    chained = """
+from plugflow import BasePlugin
+class Chained(BasePlugin):
+    name = "chained"
+    version = "{version}"
+    def on_load(self, manager):
+        if self.version == "2":
+            self.context["queued"] = manager.reload_plugin("other")
+"""
+    other = """
+from plugflow import BasePlugin
+class Other(BasePlugin):
+    name = "other"
+    def on_load(self, manager):
+        self.context["other_loads"] = self.context.get("other_loads", 0) + 1
+"""
+    context = {}
+    chained_path = plugin_writer(tmp_path, "chained", chained.format(version="1"))
+    plugin_writer(tmp_path, "other", other)
+    mgr = PluginManager([str(tmp_path)], context=context, reload_debounce=0.01)
+    mgr.load_all()
+    assert context["other_loads"] == 1
+
+    plugin_writer(tmp_path, "chained", chained.format(version="2"))
+    hot = threading.Thread(target=mgr._on_fs_change, args=(chained_path,), daemon=True)
+    hot.start()
+    hot.join(5)
+    assert not hot.is_alive()
+    assert context["queued"] is True
+    assert mgr._reload_queue.wait_idle(timeout=5)
+    assert mgr.get("chained").version == "2"
+    assert context["other_loads"] == 2
+    mgr.stop()
@@ -0,0 +1,93 @@
+"""
+Tests for per-plugin load profiling
+"""
+import io
+import json
+import os
+import sys
+import tracemalloc
+from pathlib import Path
+from plugflow import PluginManager
+
+
+SLOW_BODY = """
+import time
+from plugflow import BasePlugin
+
+BIG = [0] * 100000
+time.sleep(0.05)
+
+class Slow(BasePlugin):
+    name = "slow"
+    def on_load(self, manager):
+        time.sleep(0.05)
+"""
+
+FAST_BODY = """
+from plugflow import BasePlugin
+class Fast(BasePlugin):
+    name = "fast"
+"""
+
+
+def test_load_report_phases(tmp_path: Path, plugin_writer):
+    """Test that every load phase is timed per plugin, slowest first"""
+    plugin_writer(tmp_path, "slow", SLOW_BODY)
+    plugin_writer(tmp_path, "fast", FAST_BODY)
+
+    mgr = PluginManager([str(tmp_path)])
+    mgr.load_all()
+    report = mgr.load_report()
+
+    assert [row["plugin"] for row in report] == ["slow", "fast"]
+    slow = report[0]
+    # a source modified in the current second is read and compiled without the bytecode cache
+    assert list(slow["phases"]) in (["read", "compile", "exec", "instantiate", "on_load"],
+                                    ["compile", "exec", "instantiate", "on_load"])
+    assert slow["phases"]["exec"]["wall"] >= 0.05
+    assert slow["phases"]["on_load"]["wall"] >= 0.05
+    assert slow["wall"] >= 0.1
+    assert slow["path"].endswith("slow.py")
+    assert "memory" not in slow["phases"]["exec"]
+
+    mgr.unload_plugin("slow")
+    assert [row["plugin"] for row in mgr.load_report()] == ["fast"]
+
+
+def test_load_report_memory_and_json(tmp_path: Path, plugin_writer):
+    """Test memory accounting under tracemalloc and JSON output"""
+    plugin_writer(tmp_path, "slow", SLOW_BODY)
+
+    tracemalloc.start()
+    try:
+        mgr = PluginManager([str(tmp_path)])
+        mgr.load_all()
+    finally:
+        tracemalloc.stop()
+
+    buf = io.StringIO()
+    mgr.dump_load_report(buf)
+    report = json.loads(buf.getvalue())
+    assert report[0]["phases"]["exec"]["memory"] >= 100000 * 8
+
+    out = tmp_path / "report.json"
+    mgr.dump_load_report(out)
+    assert json.loads(out.read_text()) == report
+
+
+def test_load_uses_bytecode_cache(tmp_path: Path, plugin_writer, monkeypatch):
+    """Test that settled sources are loaded through __pycache__ and fresh edits are not"""
+    monkeypatch.setattr(sys, "dont_write_bytecode", False)
+    path = plugin_writer(tmp_path, "fast", FAST_BODY)
+    os.utime(path, (path.stat().st_atime - 10, path.stat().st_mtime - 10))
+
+    mgr = PluginManager([str(tmp_path)])
+    mgr.load_all()
+    assert list(mgr.load_report()[0]["phases"]) == ["compile", "exec", "instantiate", "on_load"]
+    cached = list((tmp_path / "__pycache__").glob("fast.*.pyc"))
+    assert len(cached) == 1
+
+    path.write_text(FAST_BODY.replace('"fast"', '"faster"'))
+    mgr._on_fs_change(path)
+    assert mgr.list_plugins() == ["faster"]
+    assert list(mgr.load_report()[0]["phases"])[0] == "read"
@@ -167,3 +167,118 @@ def register(context):
     assert set(mgr.list_plugins()) == {"A", "B"}
     res = mgr.dispatch_event("ping")
     assert "pong" in res
+
+
+LAZY_PLUGINS = """
+import builtins
+import time
+from plugflow import BasePlugin
+
+class Commander(BasePlugin):
+    name = "commander"
+    def __init__(self, context=None, **kwargs):
+        super().__init__(context, **kwargs)
+        time.sleep(0.05)
+        builtins._plugflow_built.append(self.name)
+    def on_load(self, manager):
+        builtins._plugflow_loaded.append(self.name)
+    def handle_command(self, command, args):
+        if command == "ping":
+            return "pong"
+
+class Listener(BasePlugin):
+    name = "listener"
+    def __init__(self, context=None, **kwargs):
+        super().__init__(context, **kwargs)
+        builtins._plugflow_built.append(self.name)
+    def on_load(self, manager):
+        builtins._plugflow_loaded.append(self.name)
+    def on_event(self, event, data, manager):
+        return "heard"
+"""
+
+
+def test_lazy_plugins_are_built_on_first_use(tmp_path: Path, plugin_writer):
+    """Test that lazy plugins are constructed and loaded only when dispatch or get() needs them"""
+    import builtins
+    builtins._plugflow_built, builtins._plugflow_loaded = [], []
+    try:
+        plugin_writer(tmp_path, "lazy", LAZY_PLUGINS)
+        mgr = PluginManager([str(tmp_path)], lazy=True)
+        mgr.load_all()
+        assert mgr.list_plugins() == ["commander", "listener"]
+        assert builtins._plugflow_built == []
+
+        assert mgr.handle_message("/ping") == ["pong"]
+        assert builtins._plugflow_built == ["commander"]
+        assert builtins._plugflow_loaded == ["commander"]
+
+        assert mgr.get("listener").on_event("x", None, mgr) == "heard"
+        assert mgr.handle_message("/ping") == ["pong"]
+        assert builtins._plugflow_built == ["commander", "listener"]
+        assert builtins._plugflow_loaded == ["commander", "listener"]
+    finally:
+        del builtins._plugflow_built, builtins._plugflow_loaded
+
+
+def test_lazy_initialization_happens_once_across_threads(tmp_path: Path, plugin_writer):
+    """Test that concurrent first uses construct a lazy plugin exactly once"""
+    import builtins
+    import threading
+    builtins._plugflow_built, builtins._plugflow_loaded = [], []
+    try:
+        plugin_writer(tmp_path, "lazy", LAZY_PLUGINS)
+        mgr = PluginManager([str(tmp_path)], lazy=True)
+        mgr.load_all()
+
+        seen = []
+        threads = [threading.Thread(target=lambda: seen.append(mgr.get("commander"))) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert builtins._plugflow_built == ["commander"]
+        assert builtins._plugflow_loaded == ["commander"]
+        assert all(p is seen[0] for p in seen)
+    finally:
+        del builtins._plugflow_built, builtins._plugflow_loaded
+
+
+def test_path_index_tracks_records(tmp_path: Path, plugin_writer):
+    """Test that plugins are found by the file or package they came from"""
+    multi = plugin_writer(tmp_path, "multi", """
+from plugflow import BasePlugin
+class A(BasePlugin):
+    name = "multi_a"
+class B(BasePlugin):
+    name = "multi_b"
+""")
+    pkg = plugin_writer(tmp_path, "pkg_index", """
+from plugflow import BasePlugin
+class P(BasePlugin):
+    name = "from_pkg"
+""", as_pkg=True)
+    singles = [plugin_writer(tmp_path, f"single_{i}", f"""
+from plugflow import BasePlugin
+class P(BasePlugin):
+    name = "single_{i}"
+""") for i in range(50)]
+    mgr = PluginManager([str(tmp_path)])
+    mgr.load_all()
+
+    assert mgr.plugins_from(multi) == ["multi_a", "multi_b"]
+    assert mgr.plugins_from(str(pkg)) == ["from_pkg"]
+    assert mgr.plugins_from(tmp_path / "missing.py") == []
+
+    # a bulk delete resolves every path through the index
+    for f in singles:
+        f.unlink()
+    mgr._apply_changes([(f, "delete") for f in singles])
+    assert mgr.list_plugins() == ["from_pkg", "multi_a", "multi_b"]
+    assert mgr.plugins_from(singles[0]) == []
+
+    mgr.unload_plugin("multi_a")
+    assert mgr.plugins_from(multi) == ["multi_b"]
+    mgr.unload_plugin("multi_b")
+    assert mgr.plugins_from(multi) == []
@@ -0,0 +1,81 @@
+"""
+Tests for per-plugin memory accounting
+"""
+import tracemalloc
+from pathlib import Path
+import pytest
+from plugflow import PluginManager
+from plugflow.exporter import render
+
+LEAKY_PLUGIN = """
+from plugflow import BasePlugin
+
+KEPT = []
+
+class Leaky(BasePlugin):
+    name = "leaky"
+    def on_event(self, event, data, manager):
+        KEPT.append(bytearray(10000))
+
+class Tidy(BasePlugin):
+    name = "tidy"
+    def on_event(self, event, data, manager):
+        return len(bytearray(10000))
+"""
+
+PACKAGE_PLUGIN = """
+from plugflow import BasePlugin
+
+DATA = [bytearray(1000) for _ in range(100)]
+
+class Packaged(BasePlugin):
+    name = "packaged"
+"""
+
+
+@pytest.fixture
+def tracing():
+    was_tracing = tracemalloc.is_tracing()
+    yield
+    if not was_tracing:
+        tracemalloc.stop()
+
+
+def test_memory_diff_finds_leaking_plugin(tmp_path: Path, plugin_writer, tracing):
+    """Test that growth between two snapshots is charged to the plugin line that allocated it"""
+    leaky = plugin_writer(tmp_path, "leaky", LEAKY_PLUGIN)
+    plugin_writer(tmp_path, "packaged", PACKAGE_PLUGIN, as_pkg=True)
+    mgr = PluginManager([str(tmp_path)], track_memory=True)
+    mgr.load_all()
+
+    before = mgr.memory_snapshot()
+    for _ in range(50):
+        mgr.dispatch_event("tick")
+    rows = mgr.memory_diff(before)
+
+    assert rows[0]["plugins"] == ["leaky", "tidy"]
+    assert rows[0]["source"] == str(leaky.resolve())
+    assert rows[0]["size_diff"] >= 50 * 10000
+    assert rows[0]["top"][0]["line"].endswith("leaky.py:9")
+
+    usage = mgr.memory_stats()
+    assert usage["leaky"]["current"] >= 50 * 10000
+    assert usage["leaky"]["shared_with"] == ["tidy"]
+    assert usage["packaged"]["current"] >= 100 * 1000
+    assert usage["packaged"]["peak"] >= usage["packaged"]["current"]
+    assert set(mgr.memory_stats("packaged")) == {"packaged"}
+
+    mgr.reset_stats()
+    packaged = mgr.memory_stats("packaged")["packaged"]
+    assert packaged["peak"] == packaged["current"]
+    assert 'plugflow_plugin_memory_bytes{plugin="leaky"}' in render(mgr)
+
+
+def test_memory_accounting_off_by_default(tmp_path: Path, plugin_writer):
+    plugin_writer(tmp_path, "leaky", LEAKY_PLUGIN)
+    mgr = PluginManager([str(tmp_path)])
+    mgr.load_all()
+    before = mgr.memory_snapshot()
+    mgr.dispatch_event("tick")
+    assert mgr.memory_stats() == {}
+    assert mgr.memory_diff(before) == []
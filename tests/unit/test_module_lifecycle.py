@@ -0,0 +1,91 @@
+"""
+Tests for plugin module lifecycle and leak detection
+"""
+import os
+import sys
+import time
+from pathlib import Path
+from plugflow import PluginManager
+
+
+TWO_PLUGINS = """
+from plugflow import BasePlugin
+class First(BasePlugin):
+    name = "first"
+class Second(BasePlugin):
+    name = "second"
+"""
+
+
+def plugflow_modules():
+    return {name for name in sys.modules if name.startswith("plugflow_ext_")}
+
+
+def test_module_purged_after_last_plugin_unloads(tmp_path: Path, plugin_writer):
+    """Test that a module leaves sys.modules once none of its plugins is loaded"""
+    before = plugflow_modules()
+    plugin_writer(tmp_path, "pair", TWO_PLUGINS)
+    mgr = PluginManager([str(tmp_path)])
+    mgr.load_all()
+
+    loaded = plugflow_modules() - before
+    assert len(loaded) == 1
+
+    mgr.unload_plugin("first")
+    assert loaded <= plugflow_modules()
+    mgr.unload_plugin("second")
+    assert not (loaded & plugflow_modules())
+    assert mgr.find_leaks() == []
+
+
+def test_replaced_module_is_purged(tmp_path: Path, plugin_writer):
+    """Test that reloading a changed file keeps a single module version alive"""
+    before = plugflow_modules()
+    plugin_file = plugin_writer(tmp_path, "pair", TWO_PLUGINS)
+    mgr = PluginManager([str(tmp_path)])
+    mgr.load_all()
+    first = plugflow_modules() - before
+
+    plugin_file.write_text(TWO_PLUGINS + "\nVERSION = 2\n")
+    later = time.time() + 10
+    os.utime(plugin_file, (later, later))
+    mgr.load_from_path(tmp_path)
+
+    current = plugflow_modules() - before
+    assert len(current) == 1
+    assert current != first
+    assert mgr.find_leaks() == []
+
+
+def test_helper_modules_and_deleted_plugins_are_purged(tmp_path: Path, plugin_writer):
+    """Test that modules without plugins and deleted plugins leave no modules behind"""
+    before = plugflow_modules()
+    plugin_writer(tmp_path, "helper", "VALUE = 1\n")
+    plugin_file = plugin_writer(tmp_path, "pair", TWO_PLUGINS)
+    mgr = PluginManager([str(tmp_path)])
+    mgr.load_all()
+    assert len(plugflow_modules() - before) == 1
+
+    plugin_file.unlink()
+    mgr._on_fs_delete(plugin_file)
+    assert mgr.list_plugins() == []
+    assert plugflow_modules() == before
+
+
+def test_find_leaks_reports_live_references(tmp_path: Path, plugin_writer):
+    """Test that instances kept alive after unload are reported"""
+    plugin_writer(tmp_path, "pair", TWO_PLUGINS)
+    mgr = PluginManager([str(tmp_path)])
+    mgr.load_all()
+
+    kept = mgr.get("first")
+    kept_module = sys.modules[type(kept).__module__]
+    mgr.unload_plugin("first")
+    mgr.unload_plugin("second")
+
+    leaks = mgr.find_leaks()
+    kinds = {(leak["kind"], leak["name"]) for leak in leaks}
+    assert kinds == {("plugin", "first"), ("module", kept_module.__name__)}
+
+    del kept, kept_module
+    assert mgr.find_leaks() == []
@@ -178,3 +178,43 @@ class BadPlugin(BasePlugin):
     # Command handling should continue despite error
     result = mgr.handle_message("/crash")
     assert result == []  # No successful responses
+
+
+def test_only_module_level_plugin_classes_are_instantiated(tmp_path: Path, plugin_writer):
+    """Test that plugin classes are found through the subclass registry, not nested or imported ones"""
+    plugin_writer(tmp_path, "registry", """
+from plugflow import BasePlugin
+from plugflow.base import BasePlugin as Imported
+
+class Outer(BasePlugin):
+    name = "outer"
+    class Nested(BasePlugin):
+        name = "nested"
+
+def factory():
+    class Local(BasePlugin):
+        name = "local"
+    return Local
+
+made = factory()
+""")
+    mgr = PluginManager([str(tmp_path)])
+    mgr.load_all()
+    assert mgr.list_plugins() == ["outer"]
+
+
+def test_subclass_registry_drops_collected_classes():
+    """Test that the registry does not keep plugin classes alive"""
+    import gc
+    from plugflow.base import plugin_classes
+
+    def define():
+        class Temporary(BasePlugin):
+            pass
+        return Temporary
+
+    cls = define()
+    assert cls in plugin_classes(__name__)
+    del cls
+    gc.collect()
+    assert [c.__name__ for c in plugin_classes(__name__)].count("Temporary") == 0
@@ -0,0 +1,86 @@
+"""
+Tests for the pluggable tracer interface
+"""
+from pathlib import Path
+from plugflow import PluginManager
+from plugflow.tracing import InMemoryTracer, Tracer
+
+TRACED_PLUGIN = """
+from plugflow import BasePlugin
+
+class Traced(BasePlugin):
+    name = "traced"
+    def on_event(self, event, data, manager):
+        if event == "fail":
+            raise RuntimeError("boom")
+        return data
+    def handle_command(self, command, args):
+        return "ok"
+    def filter_message(self, text):
+        return text
+"""
+
+
+def test_tracer_receives_hook_spans(tmp_path: Path, plugin_writer):
+    """Test that every hook call gets a span with plugin, detail, duration and error"""
+    plugin_writer(tmp_path, "traced", TRACED_PLUGIN)
+    tracer = InMemoryTracer()
+    mgr = PluginManager([str(tmp_path)], tracer=tracer, collect_stats=True)
+    mgr.load_all()
+    tracer.clear()
+
+    assert mgr.dispatch_event("tick", 3) == [3]
+    mgr.dispatch_event("fail")
+    assert mgr.handle_message("/go now") == ["ok"]
+
+    events = tracer.find(kind="hook", name="on_event")
+    assert [s.detail for s in events] == ["tick", "fail"]
+    assert events[0].plugin == "traced" and events[0].error is None
+    assert isinstance(events[1].error, RuntimeError)
+    assert all(s.duration >= 0 for s in tracer.spans)
+    assert tracer.find(name="handle_command")[0].detail == "go"
+    assert len(tracer.find(name="filter_message")) == 1
+    assert tracer.started == len(tracer.spans) == 4
+    # stats are still recorded alongside the tracer
+    assert mgr.stats("traced")["traced"]["on_event"]["errors"] == 1
+
+
+def test_tracer_receives_load_and_reload_phases(tmp_path: Path, plugin_writer):
+    path = plugin_writer(tmp_path, "traced", TRACED_PLUGIN)
+    tracer = InMemoryTracer()
+    mgr = PluginManager([str(tmp_path)], tracer=tracer)
+    mgr.load_all()
+
+    load = tracer.find(kind="load")
+    assert [s.detail for s in load] == [str(tmp_path)]
+    phases = {s.name for s in tracer.find(kind="phase")}
+    assert {"compile", "exec", "instantiate", "on_load"} <= phases
+    assert tracer.find(kind="phase", name="on_load")[0].plugin == "traced"
+    # phases end before the load that contains them
+    assert tracer.spans[-1] is load[0]
+
+    tracer.clear()
+    path.write_text(path.read_text() + "\n# edited\n")
+    mgr._on_fs_change(path)
+    assert [s.detail for s in tracer.find(kind="reload")] == [str(path)]
+    assert tracer.find(kind="phase", name="exec")
+
+
+def test_set_tracer_and_no_tracer(tmp_path: Path, plugin_writer):
+    plugin_writer(tmp_path, "traced", TRACED_PLUGIN)
+    mgr = PluginManager([str(tmp_path)])
+    mgr.load_all()
+    assert mgr.tracer is None
+    assert mgr.dispatch_event("tick", 1) == [1]
+
+    tracer = InMemoryTracer()
+    mgr.set_tracer(tracer)
+    mgr.broadcast("on_event", "tick", 2, mgr)
+    assert [(s.name, s.detail) for s in tracer.spans] == [("on_event", "on_event")]
+
+    mgr.set_tracer(None)
+    mgr.dispatch_event("tick")
+    assert len(tracer.spans) == 1
+    # the base class is a usable no-op
+    mgr.set_tracer(Tracer())
+    assert mgr.dispatch_event("tick", 5) == [5]
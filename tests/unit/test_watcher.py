@@ -0,0 +1,432 @@
+"""
+Tests for DirectoryWatcher backends
+"""
+import os
+import threading
+import time
+from pathlib import Path
+import pytest
+from plugflow import inotify
+from plugflow.watcher import ChangeQueue, DirectoryWatcher
+
+needs_inotify = pytest.mark.skipif(not inotify.available(), reason="inotify is Linux-only")
+
+
+class Recorder:
+    def __init__(self):
+        self.changed = []
+        self.deleted = []
+        self.event = threading.Event()
+
+    def on_change(self, path):
+        self.changed.append(path)
+        self.event.set()
+
+    def on_delete(self, path):
+        self.deleted.append(path)
+        self.event.set()
+
+    def wait(self, timeout=2.0):
+        assert self.event.wait(timeout), "watcher did not report the change"
+        self.event.clear()
+
+
+def build_tree(root: Path, dirs: int, per_dir: int):
+    for i in range(dirs):
+        d = root / f"group_{i:03d}"
+        d.mkdir()
+        for j in range(per_dir):
+            (d / f"plugin_{j}.py").write_text("X = 1\n")
+
+
+@needs_inotify
+def test_inotify_reports_changes_in_large_tree(tmp_path: Path):
+    """Test that the inotify backend reacts within milliseconds on a tree with thousands of files"""
+    build_tree(tmp_path, 40, 100)
+    rec = Recorder()
+    watcher = DirectoryWatcher(tmp_path, interval=60, on_change=rec.on_change, on_delete=rec.on_delete)
+    watcher.start()
+    try:
+        assert watcher.backend == "inotify"
+        target = tmp_path / "group_017" / "plugin_42.py"
+        started = time.perf_counter()
+        target.write_text("X = 2\n")
+        rec.wait()
+        assert time.perf_counter() - started < 0.5
+        assert rec.changed == [target]
+
+        target.unlink()
+        rec.wait()
+        assert rec.deleted == [target]
+
+        new_dir = tmp_path / "late" / "nested"
+        new_dir.mkdir(parents=True)
+        time.sleep(0.1)
+        (new_dir / "fresh.py").write_text("X = 3\n")
+        rec.wait()
+        time.sleep(0.1)
+        assert rec.changed[-1] == new_dir / "fresh.py"
+    finally:
+        watcher.stop()
+
+
+@needs_inotify
+def test_inotify_watches_new_directory_before_rescan(tmp_path: Path):
+    """Test that a file written into a new directory right after the rescan is still reported"""
+    rec = Recorder()
+    watcher = DirectoryWatcher(tmp_path, interval=60, on_change=rec.on_change)
+    new_dir = tmp_path / "late"
+    fresh = new_dir / "fresh.py"
+    poll_once = watcher._poll_once
+
+    def racing_poll():
+        changed = poll_once()
+        if not fresh.exists():
+            fresh.write_text("X = 1\n")  # lands after the scan of new_dir
+        return changed
+    watcher._poll_once = racing_poll
+    watcher.start()
+    try:
+        new_dir.mkdir()
+        rec.wait()
+        assert rec.changed == [fresh]
+    finally:
+        watcher.stop()
+
+
+@needs_inotify
+def test_inotify_reports_package_as_one_target(tmp_path: Path):
+    """Test that a change inside a package is reported for the package directory"""
+    pkg = tmp_path / "pkg"
+    (pkg / "sub").mkdir(parents=True)
+    (pkg / "__init__.py").write_text("")
+    (pkg / "sub" / "impl.py").write_text("X = 1\n")
+    (tmp_path / "__pycache__").mkdir()
+    rec = Recorder()
+    watcher = DirectoryWatcher(tmp_path, interval=60, on_change=rec.on_change, on_delete=rec.on_delete)
+    watcher.start()
+    try:
+        (tmp_path / "__pycache__" / "ignored.py").write_text("")
+        later = time.time() + 10
+        impl = pkg / "sub" / "impl.py"
+        tmp = impl.with_name("impl.py.tmp")
+        tmp.write_text("X = 2\n")
+        os.utime(tmp, (later, later))
+        os.replace(tmp, impl)
+        rec.wait()
+        assert rec.changed == [pkg]
+    finally:
+        watcher.stop()
+
+
+@pytest.mark.parametrize("backend", [pytest.param("inotify", marks=needs_inotify), "poll"])
+def test_non_recursive_package_edits_are_detected(tmp_path: Path, backend):
+    """Test that editing a package submodule is reported in non-recursive mode"""
+    pkg = tmp_path / "pkg_uppercase"
+    (pkg / "impl").mkdir(parents=True)
+    (pkg / "__init__.py").write_text("from .impl.core import X\n")
+    (pkg / "impl" / "__init__.py").write_text("")
+    (pkg / "impl" / "core.py").write_text("X = 1\n")
+    (tmp_path / "nested").mkdir()
+    (tmp_path / "nested" / "ignored.py").write_text("X = 1\n")
+    rec = Recorder()
+    watcher = DirectoryWatcher(tmp_path, interval=0.05, recursive=False, on_change=rec.on_change,
+                               backend=backend)
+    watcher.start()
+    try:
+        assert watcher.backend == backend
+        later = time.time() + 10
+        for path in (pkg / "impl" / "core.py", pkg / "__init__.py"):
+            # content and mtime land in one step, or a poll in between reports the edit
+            # twice; the file is staged outside the package, whose own mtime counts
+            tmp = tmp_path / (path.name + ".tmp")
+            tmp.write_text(path.read_text() + "# edited\n")
+            os.utime(tmp, (later, later))
+            os.replace(tmp, path)
+            rec.wait()
+            time.sleep(0.1)
+        (tmp_path / "nested" / "ignored.py").write_text("X = 2\n")
+        time.sleep(0.2)
+        assert rec.changed == [pkg, pkg]
+    finally:
+        watcher.stop()
+
+
+def test_poll_backend_is_selectable(tmp_path: Path):
+    """Test that polling can be forced and stops promptly"""
+    rec = Recorder()
+    watcher = DirectoryWatcher(tmp_path, interval=0.05, on_change=rec.on_change, backend="poll")
+    watcher.start()
+    try:
+        assert watcher.backend == "poll"
+        (tmp_path / "polled.py").write_text("X = 1\n")
+        rec.wait()
+        assert rec.changed == [tmp_path / "polled.py"]
+    finally:
+        started = time.perf_counter()
+        watcher.stop()
+        assert time.perf_counter() - started < 1
+
+
+def test_unknown_backend_rejected(tmp_path: Path):
+    with pytest.raises(ValueError):
+        DirectoryWatcher(tmp_path, backend="fsevents")
+
+
+def test_poll_relists_only_changed_directories(tmp_path: Path):
+    """Test that polling re-lists a directory only after its mtime changed"""
+    build_tree(tmp_path, 5, 20)
+    past = time.time() - 60
+    for d in [tmp_path, *tmp_path.iterdir()]:
+        os.utime(d, (past, past))
+    rec = Recorder()
+    watcher = DirectoryWatcher(tmp_path, on_change=rec.on_change, on_delete=rec.on_delete, backend="poll")
+    watcher.start()
+    watcher.stop()
+
+    watcher._poll_once()
+    assert watcher.relisted == 0
+    assert rec.changed == [] and rec.deleted == []
+
+    added = tmp_path / "group_002" / "added.py"
+    added.write_text("X = 1\n")
+    watcher._poll_once()
+    assert watcher.relisted == 1
+    assert rec.changed == [added]
+
+    # an older mtime (restored backup, checkout) is a change too
+    target = tmp_path / "group_004" / "plugin_3.py"
+    os.utime(target, (past - 3600, past - 3600))
+    watcher._poll_once()
+    assert rec.changed == [added, target]
+
+    target.unlink()
+    watcher._poll_once()
+    assert rec.deleted == [target]
+
+
+def test_adaptive_poll_backs_off_while_idle(tmp_path: Path):
+    """Test that adaptive polling doubles its interval while idle and resets on change"""
+    build_tree(tmp_path, 2, 3)
+    rec = Recorder()
+    watcher = DirectoryWatcher(tmp_path, interval=0.1, max_interval=0.5, on_change=rec.on_change,
+                               backend="poll")
+    watcher.prime()
+    intervals = []
+    for _ in range(4):
+        assert not watcher._poll_once()
+        intervals.append(watcher.current_interval)
+    assert intervals == [0.2, 0.4, 0.5, 0.5]
+
+    target = tmp_path / "group_001" / "plugin_2.py"
+    target.write_text("X = 2\n# longer\n")
+    assert watcher._poll_once()
+    assert rec.changed == [target]
+    metrics = watcher.metrics()
+    assert metrics["interval"] == 0.1
+    assert metrics["polls"] == 5
+    assert 0 < metrics["scan_cost"] <= metrics["scan_total"]
+
+    fixed = DirectoryWatcher(tmp_path, interval=0.1, backend="poll")
+    fixed.prime()
+    fixed._poll_once()
+    assert fixed.current_interval == 0.1
+
+
+@pytest.mark.parametrize("backend", ["auto", "poll"])
+def test_watch_service_shares_roots_and_thread(tmp_path: Path, backend):
+    """Test that one service thread serves every root and overlapping subscribers share a watcher"""
+    from plugflow.watcher import WatchService
+    first, second = tmp_path / "first", tmp_path / "second"
+    first.mkdir()
+    second.mkdir()
+    service = WatchService()
+    a, b, c = Recorder(), Recorder(), Recorder()
+    subs = [
+        service.subscribe(first, on_change=a.on_change, interval=0.05, backend=backend),
+        service.subscribe(first, on_change=b.on_change, interval=0.05, backend=backend),
+        service.subscribe(second, on_change=c.on_change, interval=0.05, backend=backend),
+    ]
+    try:
+        stats = service.stats()
+        assert stats["threads"] == 1
+        assert stats["roots"] == 2
+        assert stats["subscriptions"] == 3
+
+        (first / "shared.py").write_text("X = 1\n")
+        a.wait()
+        b.wait()
+        assert a.changed == b.changed == [first / "shared.py"]
+        (second / "own.py").write_text("X = 1\n")
+        c.wait()
+        assert c.changed == [second / "own.py"]
+        assert len(a.changed) == 1
+    finally:
+        for sub in subs:
+            sub.close()
+    assert service.stats() == {"threads": 0, "roots": 0, "subscriptions": 0, "inotify_watches": 0}
+
+
+def test_managers_share_one_watch_thread(tmp_path: Path):
+    """Test that several hot-reloading managers do not start a thread per root"""
+    from plugflow import PluginManager
+    roots = [tmp_path / f"root_{i}" for i in range(4)]
+    for r in roots:
+        r.mkdir()
+    before = {t.name for t in threading.enumerate()}
+    managers = [PluginManager([str(r) for r in roots], hot_reload=True, poll_interval=0.05) for _ in range(3)]
+    try:
+        for m in managers:
+            m.load_all()
+        started = [t.name for t in threading.enumerate() if t.name not in before]
+        assert started in ([], ["plugflow-watch"])
+        assert not any(name.startswith("DirectoryWatcher") for name in started)
+    finally:
+        for m in managers:
+            m.stop()
+
+
+def test_change_queue_coalesces_bursts(tmp_path: Path):
+    """Test that a burst is handed over once, deduplicated, after the quiet period"""
+    batches = []
+    queue = ChangeQueue(lambda changes, since: batches.append((changes, since)), quiet=0.1)
+    a, b = tmp_path / "a.py", tmp_path / "b.py"
+    try:
+        for _ in range(5):
+            queue.put(a, "change")
+            queue.put(b, "delete")
+            queue.put(b, "change")
+        time.sleep(0.05)
+        assert batches == []
+        assert queue.wait_idle(timeout=2)
+        assert len(batches) == 1
+        changes, since = batches[0]
+        assert changes == [(a, "change"), (b, "change")]
+        assert since <= time.perf_counter()
+
+        queue.put(a, "delete")
+        assert queue.wait_idle(timeout=2)
+        assert batches[-1][0] == [(a, "delete")]
+    finally:
+        queue.stop()
+
+
+def test_manager_reports_adaptive_poll_interval(tmp_path: Path):
+    """Test that a manager exposes its roots' current polling interval"""
+    from plugflow import PluginManager
+    mgr = PluginManager([str(tmp_path)], hot_reload=True, poll_interval=0.02, max_poll_interval=0.16,
+                        watch_backend="poll")
+    mgr.load_all()
+    try:
+        time.sleep(0.5)
+        [stats] = mgr.watch_stats()
+        assert stats["backend"] == "poll"
+        assert stats["root"] == os.fspath(tmp_path)
+        assert stats["interval"] == 0.16
+        assert stats["polls"] < 0.5 / 0.02
+    finally:
+        mgr.stop()
+
+
+@pytest.mark.parametrize("backend", [pytest.param("inotify", marks=needs_inotify), "poll"])
+def test_async_changes_yield_batches(tmp_path: Path, backend):
+    """Test that changes() yields deduplicated batches without starting a thread"""
+    import asyncio
+    build_tree(tmp_path, 2, 3)
+
+    async def main():
+        watcher = DirectoryWatcher(tmp_path, interval=0.05, backend=backend)
+        changes = watcher.changes(quiet=0.2)
+        threads = threading.active_count()
+        first = asyncio.ensure_future(changes.__anext__())
+        await asyncio.sleep(0.1)
+        later = time.time() + 10
+        for path in (tmp_path / "group_000" / "plugin_1.py", tmp_path / "group_001" / "plugin_2.py"):
+            for i in range(3):
+                path.write_text(f"X = {i + 10}\n")
+                os.utime(path, (later + i, later + i))
+                await asyncio.sleep(0.01)
+        (tmp_path / "group_001" / "plugin_0.py").unlink()
+        batch = await asyncio.wait_for(first, 5)
+        assert threading.active_count() == threads
+        assert watcher.backend == backend
+        await changes.aclose()
+        return batch
+
+    batch = asyncio.run(main())
+    assert sorted(batch) == [(tmp_path / "group_000" / "plugin_1.py", "change"),
+                             (tmp_path / "group_001" / "plugin_0.py", "delete"),
+                             (tmp_path / "group_001" / "plugin_2.py", "change")]
+
+
+def test_async_poll_scan_yields_to_other_tasks(tmp_path: Path, monkeypatch):
+    """Test that the poll backend of changes() does not scan the whole tree in one loop turn"""
+    import asyncio
+    from plugflow import watcher as watcher_module
+    monkeypatch.setattr(watcher_module, "_SLICE", 10)
+    build_tree(tmp_path, 5, 20)
+
+    async def main():
+        watcher = DirectoryWatcher(tmp_path, interval=0.05, backend="poll")
+        ticks = [0]
+        seen = []
+        stamp = watcher._stamp
+
+        def stamp_and_record(target, st):
+            seen.append(ticks[0])
+            return stamp(target, st)
+        watcher._stamp = stamp_and_record
+
+        async def ticker():
+            while True:
+                ticks[0] += 1
+                await asyncio.sleep(0)
+        task = asyncio.ensure_future(ticker())
+        changes = watcher.changes()
+        pending = asyncio.ensure_future(changes.__anext__())
+        await asyncio.sleep(0.2)
+        pending.cancel()
+        task.cancel()
+        await asyncio.gather(pending, task, return_exceptions=True)
+        await changes.aclose()
+        return seen
+
+    seen = asyncio.run(main())
+    # priming and every poll stat 100 targets, in slices of 10 between other tasks
+    assert len(seen) >= 200
+    assert len(set(seen[:100])) == 10
+
+
+def test_manager_watch_reloads_on_event_loop(tmp_path: Path):
+    """Test that PluginManager.watch() hot reloads plugins from the running loop"""
+    import asyncio
+    from plugflow import PluginManager
+    body = ("import threading\nfrom plugflow import BasePlugin\nclass P(BasePlugin):\n"
+            "    name = \"looped\"\n    version = \"{}\"\n"
+            "    def on_load(self, manager):\n        self.thread = threading.current_thread()\n")
+    plugin = tmp_path / "looped.py"
+    plugin.write_text(body.format("1"))
+    mgr = PluginManager([str(tmp_path)], poll_interval=0.05, reload_debounce=0.05)
+    mgr.load_all()
+    reloaded_on = []
+
+    async def main():
+        task = asyncio.ensure_future(mgr.watch())
+        await asyncio.sleep(0.1)
+        assert [s["root"] for s in mgr.watch_stats()] == [os.fspath(tmp_path)]
+        plugin.write_text(body.format("2"))
+        later = time.time() + 10
+        os.utime(plugin, (later, later))
+        for _ in range(100):
+            await asyncio.sleep(0.02)
+            if mgr.get("looped").version == "2":
+                reloaded_on.append(mgr.get("looped").thread)
+                break
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert mgr.watch_stats() == []
+
+    asyncio.run(main())
+    assert reloaded_on == [threading.main_thread()]
+    assert mgr.reload_stats()[-1]["burst"] == 1